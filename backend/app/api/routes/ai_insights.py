@@ -1,11 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 from services.ai_threat_detection import AIThreatDetectionService
+from services.analysis_executor import AnalysisQueueFull, AnalysisCancelled
 from services.siem_connector import SIEMConnector
 from services.query_generator import QueryGenerator
+from services.trend_analyzer import TrendAnalyzer
 from api.dependencies import get_current_user
 from models.siem_models import SecurityEvent
+import asyncio
 import logging
 
 router = APIRouter()
@@ -15,9 +18,19 @@ logger = logging.getLogger(__name__)
 ai_service = AIThreatDetectionService()
 siem_connector = SIEMConnector()
 query_generator = QueryGenerator()
+trend_analyzer = TrendAnalyzer(siem_connector, query_generator, ai_service)
+
+# Summary time range -> (rollup granularity, number of buckets)
+ROLLUP_WINDOWS = {
+    "1h": ("hour", 1),
+    "24h": ("hour", 24),
+    "7d": ("day", 7),
+    "30d": ("day", 30)
+}
 
 @router.get("/insights/summary")
 async def get_insights_summary(
+    request: Request,
     time_range: str = "24h",
     current_user = Depends(get_current_user)
 ):
@@ -39,11 +52,18 @@ async def get_insights_summary(
             [{"type": "time_range", "value": time_range}]
         )
         
-        # Execute query
-        siem_response = await siem_connector.execute_query(siem_query)
+        # Execute query; the risk timeline comes from precomputed rollups
+        granularity, bucket_count = ROLLUP_WINDOWS.get(time_range, ("hour", 24))
+        siem_response, risk_trend = await asyncio.gather(
+            siem_connector.execute_query(siem_query),
+            trend_analyzer.rollups(granularity, bucket_count)
+        )
         
         # Perform AI analysis
-        analysis = await ai_service.analyze_events(siem_response.events)
+        analysis = await ai_service.analyze_events(
+            siem_response.events,
+            is_disconnected=request.is_disconnected
+        )
         
         return {
             "summary": {
@@ -52,16 +72,30 @@ async def get_insights_summary(
                 "risk_score": analysis["risk_score"],
                 "anomalies_count": len(analysis["anomalies"]),
                 "threats_count": len(analysis["threats"]),
-                "recommendations": analysis["recommendations"]
+                "recommendations": analysis.get("recommendations", [])
             },
             "top_threats": analysis["threats"][:5],
             "critical_anomalies": [
                 a for a in analysis["anomalies"] 
                 if a.get("confidence", 0) > 0.8
             ][:5],
+            "risk_trend": [
+                {
+                    "start": rollup["start"],
+                    "score": rollup["risk_score"],
+                    "events": rollup["events"],
+                    "threats": rollup["threats"]
+                }
+                for rollup in risk_trend
+            ],
             "generated_at": datetime.now().isoformat()
         }
         
+    except AnalysisQueueFull as e:
+        logger.warning(f"Rejected insights summary, analysis queue full: {e}")
+        raise HTTPException(status_code=503, detail="Analysis capacity exhausted, retry shortly")
+    except AnalysisCancelled:
+        raise HTTPException(status_code=499, detail="Client closed request")
     except Exception as e:
         logger.error(f"Failed to generate insights summary: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -73,43 +107,29 @@ async def get_security_trends(
 ):
     """Get security trends over time"""
     try:
-        trends_data = {
-            "period": f"last_{days}_days",
-            "daily_stats": [],
-            "threat_evolution": {},
-            "risk_score_trend": []
-        }
+        if days < 1 or days > 365:
+            raise HTTPException(status_code=400, detail="days must be between 1 and 365")
         
-        for i in range(days):
-            date = datetime.now() - timedelta(days=days-i-1)
-            
-            # Query for each day
-            siem_query = query_generator.generate_elasticsearch_query(
-                "search_logs",
-                [{
-                    "type": "time_range",
-                    "value": f"{date.strftime('%Y-%m-%d')}"
-                }]
-            )
-            
-            siem_response = await siem_connector.execute_query(siem_query)
-            analysis = await ai_service.analyze_events(siem_response.events)
-            
-            trends_data["daily_stats"].append({
-                "date": date.strftime("%Y-%m-%d"),
-                "events": siem_response.total_hits,
-                "risk_score": analysis["risk_score"],
-                "threats": len(analysis["threats"]),
-                "anomalies": len(analysis["anomalies"])
-            })
-            
-            trends_data["risk_score_trend"].append({
-                "date": date.strftime("%Y-%m-%d"),
-                "score": analysis["risk_score"]
-            })
+        # Closed days come from the rollup store; only today hits the SIEM
+        daily_stats = await trend_analyzer.daily_stats(days)
         
-        return trends_data
+        threat_evolution: Dict[str, List[int]] = {}
+        for i, day in enumerate(daily_stats):
+            for threat_type, count in day["threat_counts"].items():
+                threat_evolution.setdefault(threat_type, [0] * len(daily_stats))[i] = count
+        
+        return {
+            "period": f"last_{days}_days",
+            "daily_stats": daily_stats,
+            "threat_evolution": threat_evolution,
+            "risk_score_trend": [
+                {"date": day["date"], "score": day["risk_score"]}
+                for day in daily_stats
+            ]
+        }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to generate trends: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,13 +1,17 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, WebSocketDisconnect
+from fastapi.encoders import jsonable_encoder
 import logging
+import asyncio
+import time
 import uuid
-from typing import Dict, Any
+from typing import Dict, Any, AsyncIterator, Awaitable, Callable, Tuple
 
-from models.chat_models import QueryRequest, QueryResponse, MessageType
-from services.nlp_service import NLPService
+from models.chat_models import QueryRequest, QueryResponse, BatchQueryRequest, MessageType
+from services.nlp_service import NLPService, get_nlp_service
 from services.query_generator import QueryGenerator  
 from services.siem_connector import SIEMConnector
 from services.response_formatter import ResponseFormatter
+from services.context_manager import ContextManager, get_context_manager
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -16,6 +20,7 @@ logger = logging.getLogger(__name__)
 nlp_service: NLPService = None
 query_generator: QueryGenerator = None
 siem_connector: SIEMConnector = None
+context_manager: ContextManager = None
 response_formatter: ResponseFormatter = None
 
 async def get_services():
@@ -24,7 +29,7 @@ async def get_services():
     
     if not all([nlp_service, query_generator, siem_connector, context_manager, response_formatter]):
         # Initialize services if not already done
-        nlp_service = NLPService()
+        nlp_service = get_nlp_service()
         await nlp_service.initialize()
         
         query_generator = QueryGenerator()
@@ -32,7 +37,7 @@ async def get_services():
         siem_connector = SIEMConnector()
         await siem_connector.initialize()
         
-        context_manager = ContextManager()
+        context_manager = get_context_manager()
         await context_manager.initialize()
         
         response_formatter = ResponseFormatter()
@@ -45,6 +50,186 @@ async def get_services():
         "formatter": response_formatter
     }
 
+# Fire-and-forget context writes; referenced here so they are not garbage collected
+_background_tasks: set = set()
+
+def run_in_background(coro) -> asyncio.Task:
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_task_done)
+    return task
+
+def _background_task_done(task: asyncio.Task):
+    _background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Background context write failed: {task.exception()}")
+
+def discard_task(task: asyncio.Task):
+    """Cancel a task whose result is no longer wanted, retrieving any exception it ended with"""
+    task.cancel()
+    task.add_done_callback(lambda done: done.cancelled() or done.exception())
+
+async def record_answer(
+    user_write: asyncio.Task,
+    services: Dict[str, Any],
+    session_id: str,
+    response: str,
+    metadata: Dict[str, Any],
+    context_updates: Dict[str, Any]
+):
+    """Store the assistant's answer once the user's message is stored"""
+    await asyncio.gather(user_write, return_exceptions=True)
+    await services["context"].add_message(session_id, MessageType.ASSISTANT, response, metadata=metadata)
+    await services["context"].update_context(session_id, context_updates)
+
+async def chat_query_stages(
+    request: QueryRequest,
+    services: Dict[str, Any],
+    timings: Dict[str, float] = None
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """Run the chat pipeline, yielding each stage's output as soon as it is ready
+    
+    Stages, in order: intent (parsed intent and entities), events (first
+    page of hits), results (formatted answer, aggregations and charts) and
+    suggestions. Context writes happen in the background, a secondary
+    aggregation query runs alongside the hits query, and suggestions are
+    built while the answer is formatted. Per-stage durations in seconds
+    are recorded in `timings` when given.
+    """
+    timings = timings if timings is not None else {}
+    started = time.perf_counter()
+    mark = started
+    
+    def lap(stage: str):
+        nonlocal mark
+        now = time.perf_counter()
+        timings[stage] = now - mark
+        mark = now
+    
+    # Generate session ID if not provided
+    if not request.session_id:
+        request.session_id = str(uuid.uuid4())
+    
+    # Store the user message in the background; only the context is needed now
+    user_write = run_in_background(services["context"].add_message(
+        request.session_id,
+        MessageType.USER,
+        request.message
+    ))
+    context = await services["context"].get_context(request.session_id)
+    lap("context")
+    
+    # Process with NLP service
+    await services["nlp"].wait_until_ready()
+    nlp_result = services["nlp"].process_query(request.message, context)
+    lap("nlp")
+    
+    if not nlp_result["processed"]:
+        raise HTTPException(status_code=500, detail="Failed to process natural language query")
+    
+    yield "intent", {
+        "session_id": request.session_id,
+        "intent": nlp_result["intent"],
+        "confidence": nlp_result["confidence"],
+        "entities": nlp_result["entities"]
+    }
+    mark = time.perf_counter()
+    
+    # Generate SIEM queries: hits, plus aggregations the answer needs but the hits query lacks
+    siem_query = services["query_gen"].generate_elasticsearch_query(
+        nlp_result["intent"],
+        nlp_result["entities"],
+        context
+    )
+    aggregation_query = services["query_gen"].generate_aggregation_query(siem_query, nlp_result["intent"])
+    lap("query_generation")
+    
+    # Execute both concurrently
+    aggregation_task = None
+    if aggregation_query is not None:
+        aggregation_task = asyncio.create_task(services["siem"].execute_query(aggregation_query))
+    
+    try:
+        siem_response = await services["siem"].execute_query(siem_query)
+        lap("siem_query")
+        
+        yield "events", {
+            "total_hits": siem_response.total_hits,
+            "events": services["formatter"].format_events_page(siem_response.events),
+            "query_used": str(siem_query.query),
+            "execution_time": siem_response.execution_time
+        }
+        mark = time.perf_counter()
+        
+        if aggregation_task is not None:
+            try:
+                aggregation_response = await aggregation_task
+                siem_response = siem_response.model_copy(update={
+                    "aggregations": {**(siem_response.aggregations or {}), **(aggregation_response.aggregations or {})}
+                })
+            except Exception as e:
+                # Optional: the answer is still useful without the breakdowns
+                logger.warning(f"Secondary aggregation query failed: {e}")
+            lap("aggregation_query")
+    finally:
+        # The hits query failed, or the consumer closed the stream after "events" (e.g. WebSocket disconnect)
+        if aggregation_task is not None:
+            discard_task(aggregation_task)
+    
+    # Format in a worker thread while the suggestions are built here
+    formatting = asyncio.create_task(asyncio.to_thread(
+        services["formatter"].format_response,
+        siem_response,
+        nlp_result["intent"], 
+        request.message,
+        context
+    ))
+    suggestions_started = time.perf_counter()
+    suggestions = generate_follow_up_suggestions(nlp_result, siem_response)
+    timings["suggestions"] = time.perf_counter() - suggestions_started
+    formatted_response = await formatting
+    lap("formatting")
+    
+    yield "results", {
+        "response": formatted_response["response"],
+        "data": formatted_response.get("data"),
+        "visualization": formatted_response.get("visualization")
+    }
+    
+    yield "suggestions", {
+        "suggestions": suggestions
+    }
+    
+    # Store the answer and the updated context in the background
+    run_in_background(record_answer(
+        user_write,
+        services,
+        request.session_id,
+        formatted_response["response"],
+        metadata={
+            "intent": nlp_result["intent"].value,
+            "confidence": nlp_result["confidence"],
+            "query_execution_time": siem_response.execution_time,
+            "total_hits": siem_response.total_hits
+        },
+        context_updates={
+            "last_query": request.message,
+            "last_intent": nlp_result["intent"].value,
+            "last_results_count": siem_response.total_hits,
+            "entities_found": nlp_result["entities"]
+        }
+    ))
+    timings["total"] = sum(duration for stage, duration in timings.items() if stage not in ("suggestions", "total"))
+
+async def record_query_error(request: QueryRequest, services: Dict[str, Any], error: Exception):
+    """Add a failed query to the session's conversation"""
+    if request.session_id:
+        await services["context"].add_message(
+            request.session_id,
+            MessageType.ERROR,
+            f"Error processing query: {str(error)}"
+        )
+
 @router.post("/chat/query", response_model=QueryResponse)
 async def process_chat_query(
     request: QueryRequest,
@@ -55,94 +240,101 @@ async def process_chat_query(
     try:
         logger.info(f"Processing query: {request.message}")
         
-        # Generate session ID if not provided
-        if not request.session_id:
-            request.session_id = str(uuid.uuid4())
+        stages = {}
+        timings = {}
+        async for stage, payload in chat_query_stages(request, services, timings):
+            stages[stage] = payload
         
-        # Add user message to context
-        await services["context"].add_message(
-            request.session_id,
-            MessageType.USER,
-            request.message
+        return QueryResponse(
+            response=stages["results"]["response"],
+            intent=stages["intent"]["intent"],
+            confidence=stages["intent"]["confidence"],
+            data=stages["results"]["data"],
+            suggestions=stages["suggestions"]["suggestions"],
+            visualization=stages["results"]["visualization"],
+            query_used=stages["events"]["query_used"],
+            execution_time=stages["events"]["execution_time"],
+            stage_timings=timings
         )
         
-        # Get conversation context
-        context = await services["context"].get_context(request.session_id)
-        
-        # Process with NLP service
-        nlp_result = services["nlp"].process_query(request.message, context)
+    except Exception as e:
+        logger.error(f"Error processing chat query: {e}")
         
-        if not nlp_result["processed"]:
-            raise HTTPException(status_code=500, detail="Failed to process natural language query")
+        # Add error message to context
+        await record_query_error(request, services, e)
         
-        # Generate SIEM query
-        siem_query = services["query_gen"].generate_elasticsearch_query(
-            nlp_result["intent"],
-            nlp_result["entities"],
-            context
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error processing query: {str(e)}"
         )
-        
-        # Execute SIEM query
-        siem_response = await services["siem"].execute_query(siem_query)
-        
-        # Format response for user
-        formatted_response = services["formatter"].format_response(
-            siem_response,
-            nlp_result["intent"], 
-            request.message,
-            context
+
+async def stream_chat_query(payload: Dict[str, Any], send: Callable[[str, Dict[str, Any]], Awaitable[None]]):
+    """Answer a WebSocket chat_query, sending one chat_<stage> message per pipeline stage
+    
+    Every message carries the client's request_id so answers to overlapping
+    queries can be told apart. The stream ends with chat_complete or chat_error.
+    """
+    request_id = payload.get("request_id") or str(uuid.uuid4())
+    request = None
+    services = None
+    
+    try:
+        request = QueryRequest(
+            message=payload.get("message", ""),
+            session_id=payload.get("session_id") or "",
+            user_id=payload.get("user_id"),
+            context=payload.get("context")
         )
+        logger.info(f"Streaming query: {request.message}")
+        services = await get_services()
         
-        # Add assistant response to context
-        await services["context"].add_message(
-            request.session_id,
-            MessageType.ASSISTANT,
-            formatted_response["response"],
-            metadata={
-                "intent": nlp_result["intent"].value,
-                "confidence": nlp_result["confidence"],
-                "query_execution_time": siem_response.execution_time,
-                "total_hits": siem_response.total_hits
-            }
-        )
+        started = time.perf_counter()
+        timings = {}
+        async for stage, stage_payload in chat_query_stages(request, services, timings):
+            await send(f"chat_{stage}", {
+                "request_id": request_id,
+                "elapsed": time.perf_counter() - started,
+                **jsonable_encoder(stage_payload)
+            })
         
-        # Update context with query results
-        await services["context"].update_context(request.session_id, {
-            "last_query": request.message,
-            "last_intent": nlp_result["intent"].value,
-            "last_results_count": siem_response.total_hits,
-            "entities_found": nlp_result["entities"]
+        await send("chat_complete", {
+            "request_id": request_id,
+            "session_id": request.session_id,
+            "elapsed": time.perf_counter() - started,
+            "stage_timings": timings
         })
         
-        # Generate suggestions for follow-up queries
-        suggestions = generate_follow_up_suggestions(nlp_result, siem_response)
-        
-        return QueryResponse(
-            response=formatted_response["response"],
-            intent=nlp_result["intent"],
-            confidence=nlp_result["confidence"],
-            data=formatted_response.get("data"),
-            suggestions=suggestions,
-            visualization=formatted_response.get("visualization"),
-            query_used=str(siem_query.query),
-            execution_time=siem_response.execution_time
-        )
-        
+    except WebSocketDisconnect:
+        raise
     except Exception as e:
-        logger.error(f"Error processing chat query: {e}")
+        logger.error(f"Error streaming chat query: {e}")
         
-        # Add error message to context
-        if request.session_id:
-            await services["context"].add_message(
-                request.session_id,
-                MessageType.ERROR,
-                f"Error processing query: {str(e)}"
-            )
+        if request is not None and services is not None:
+            await record_query_error(request, services, e)
         
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error processing query: {str(e)}"
+        await send("chat_error", {
+            "request_id": request_id,
+            "detail": f"Error processing query: {getattr(e, 'detail', None) or str(e)}"
+        })
+
+@router.post("/chat/classify/batch")
+async def classify_queries_batch(
+    request: BatchQueryRequest,
+    services: Dict[str, Any] = Depends(get_services)
+):
+    """Classify many natural language queries in one spaCy batch"""
+    
+    try:
+        results = await asyncio.to_thread(
+            services["nlp"].process_queries_batch,
+            request.messages,
+            request.context
         )
+        return {"results": results, "count": len(results)}
+        
+    except Exception as e:
+        logger.error(f"Error classifying query batch: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/chat/history/{session_id}")
 async def get_chat_history(
@@ -0,0 +1,47 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+import logging
+from core.metrics import metrics
+from services.query_cache import query_cache
+from services.analysis_executor import analysis_executor
+from services.connection_hub import connection_hub
+from services.context_manager import get_context_manager
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+QUERY_CACHE_ENTRIES = metrics.gauge("siem_query_cache_entries", "Responses held in the query result cache")
+QUERY_CACHE_BYTES = metrics.gauge("siem_query_cache_bytes", "Approximate size of the query result cache")
+ANALYSIS_IN_FLIGHT = metrics.gauge("siem_analysis_in_flight", "Analysis batches queued or running in the worker pool")
+WEBSOCKET_CONNECTIONS = metrics.gauge("siem_websocket_connections", "Open WebSocket connections")
+WEBSOCKET_QUEUED = metrics.gauge("siem_websocket_queued_messages", "Messages waiting in WebSocket send queues")
+CONTEXT_SESSIONS = metrics.gauge("siem_context_cached_sessions", "Conversations held in the context LRU")
+CONTEXT_PENDING = metrics.gauge("siem_context_pending_messages", "Chat messages not yet flushed to the database")
+
+
+def _collect_service_gauges():
+    """Refresh point-in-time gauges from the shared services' own stats"""
+    cache = query_cache.stats()
+    QUERY_CACHE_ENTRIES.set(cache["entries"])
+    QUERY_CACHE_BYTES.set(cache["bytes"])
+
+    ANALYSIS_IN_FLIGHT.set(analysis_executor.stats()["in_flight"])
+
+    hub = connection_hub.stats()
+    WEBSOCKET_CONNECTIONS.set(hub["connections"])
+    WEBSOCKET_QUEUED.set(hub["queued_messages"])
+
+    context = get_context_manager().stats()
+    CONTEXT_SESSIONS.set(context["cached_sessions"])
+    CONTEXT_PENDING.set(context["pending_messages"])
+
+
+metrics.register_collector(_collect_service_gauges)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus text exposition of request, stage, cache and error metrics"""
+    return PlainTextResponse(metrics.render(), media_type=CONTENT_TYPE)
@@ -1,10 +1,14 @@
 from fastapi import APIRouter, HTTPException, Depends
+import asyncio
 import logging
+import time
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 
+from core.config import settings
+from models.chat_models import QueryIntent
 from models.report_models import ReportRequest, ReportResponse, ReportType
-from services.nlp_service import NLPService
+from services.nlp_service import get_nlp_service
 from services.query_generator import QueryGenerator
 from services.siem_connector import SIEMConnector
 from services.response_formatter import ResponseFormatter
@@ -16,13 +20,26 @@ async def get_report_services():
     """Get services for report generation"""
     # Same pattern as chat.py - initialize if needed
     services = {
-        "nlp": NLPService(),
+        "nlp": get_nlp_service(),
         "query_gen": QueryGenerator(),
         "siem": SIEMConnector(),
         "formatter": ResponseFormatter()
     }
     return services
 
+async def _report_aggregations(siem: SIEMConnector, aggregation_query) -> Dict[str, Any]:
+    """Aggregations for a streamed report; the report still renders without them"""
+    try:
+        return (await siem.execute_query(aggregation_query)).aggregations or {}
+    except Exception as e:
+        logger.warning(f"Report aggregation query failed: {e}")
+        return {}
+
+def _report_visualizations(formatted_response: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """The formatter's main chart followed by its additional charts"""
+    charts = [formatted_response.get("visualization")] + list(formatted_response.get("additional_charts") or [])
+    return [chart for chart in charts if chart]
+
 @router.post("/reports/generate", response_model=ReportResponse)
 async def generate_report(
     request: ReportRequest,
@@ -32,8 +49,10 @@ async def generate_report(
     
     try:
         logger.info(f"Generating report: {request.description}")
+        start_time = time.perf_counter()
         
         # Process request with NLP
+        await services["nlp"].wait_until_ready()
         nlp_result = services["nlp"].process_query(request.description)
         
         # Generate appropriate query for report
@@ -51,7 +70,36 @@ async def generate_report(
                 nlp_result["intent"],
                 nlp_result["entities"]
             )
-            siem_query.size = 5000  # Even more events for detailed report
+            
+            # The stream carries no aggregations; a size-0 query computes the breakdowns alongside it
+            aggregation_query = services["query_gen"].generate_aggregation_query(siem_query, QueryIntent.GENERATE_REPORT)
+            aggregation_task = None
+            if aggregation_query is not None:
+                aggregation_task = asyncio.create_task(_report_aggregations(services["siem"], aggregation_query))
+            
+            # Stream the matching events (up to REPORT_MAX_STREAM_EVENTS) instead of one capped response
+            max_events = settings.REPORT_MAX_STREAM_EVENTS
+            try:
+                formatted_response = await services["formatter"].format_report_stream(
+                    services["siem"].stream_query(siem_query, max_events=max_events),
+                    request.description,
+                    aggregation_task
+                )
+            finally:
+                if aggregation_task is not None and not aggregation_task.done():
+                    aggregation_task.cancel()
+            formatted_response["data"]["stream_limit_reached"] = formatted_response["data"]["total_hits"] >= max_events
+            
+            return ReportResponse(
+                title=f"Security Report - {request.description}",
+                content=formatted_response["response"],
+                data=formatted_response.get("data", {}),
+                visualizations=_report_visualizations(formatted_response),
+                generated_at=datetime.now(),
+                query_used=str(siem_query.query),
+                total_events=formatted_response["data"]["total_hits"],
+                execution_time=time.perf_counter() - start_time
+            )
             
         else:  # CUSTOM
             siem_query = services["query_gen"].generate_elasticsearch_query(
@@ -73,7 +121,7 @@ async def generate_report(
             title=f"Security Report - {request.description}",
             content=formatted_response["response"],
             data=formatted_response.get("data", {}),
-            visualizations=formatted_response.get("visualization", []),
+            visualizations=_report_visualizations(formatted_response),
             generated_at=datetime.now(),
             query_used=str(siem_query.query),
             total_events=siem_response.total_hits,
@@ -15,11 +15,37 @@ class Settings(BaseSettings):
     
     # Elasticsearch Configuration
     ELASTICSEARCH_HOST: str = os.getenv("ELASTICSEARCH_HOST", "localhost:9200")
+    # Used for ELASTICSEARCH_HOST entries given without a scheme or port
+    ELASTICSEARCH_PORT: int = int(os.getenv("ELASTICSEARCH_PORT", "9200"))
     ELASTICSEARCH_USERNAME: str = os.getenv("ELASTICSEARCH_USERNAME", "elastic")
     ELASTICSEARCH_PASSWORD: str = os.getenv("ELASTICSEARCH_PASSWORD", "")
     ELASTICSEARCH_USE_SSL: bool = os.getenv("ELASTICSEARCH_USE_SSL", "false").lower() == "true"
     ELASTICSEARCH_VERIFY_CERTS: bool = os.getenv("ELASTICSEARCH_VERIFY_CERTS", "false").lower() == "true"
-    
+
+    # Elasticsearch connection pool
+    ELASTICSEARCH_MAX_CONNECTIONS: int = int(os.getenv("ELASTICSEARCH_MAX_CONNECTIONS", "100"))
+    ELASTICSEARCH_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("ELASTICSEARCH_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    ELASTICSEARCH_KEEPALIVE_EXPIRY: float = float(os.getenv("ELASTICSEARCH_KEEPALIVE_EXPIRY", "30"))
+    ELASTICSEARCH_MAX_CONCURRENCY_PER_HOST: int = int(os.getenv("ELASTICSEARCH_MAX_CONCURRENCY_PER_HOST", "32"))
+    ELASTICSEARCH_CONNECT_TIMEOUT: float = float(os.getenv("ELASTICSEARCH_CONNECT_TIMEOUT", "5"))
+    ELASTICSEARCH_REQUEST_TIMEOUT: float = float(os.getenv("ELASTICSEARCH_REQUEST_TIMEOUT", "30"))
+
+    # Streaming (point-in-time + search_after) pagination
+    ELASTICSEARCH_STREAM_BATCH_SIZE: int = int(os.getenv("ELASTICSEARCH_STREAM_BATCH_SIZE", "1000"))
+    ELASTICSEARCH_PIT_KEEP_ALIVE: str = os.getenv("ELASTICSEARCH_PIT_KEEP_ALIVE", "1m")
+    # Events a single detailed report may page through (bounds run time and PIT hold time)
+    REPORT_MAX_STREAM_EVENTS: int = int(os.getenv("REPORT_MAX_STREAM_EVENTS", "100000"))
+
+    # SIEM query result cache
+    QUERY_CACHE_ENABLED: bool = os.getenv("QUERY_CACHE_ENABLED", "true").lower() == "true"
+    QUERY_CACHE_TTL_SECONDS: float = float(os.getenv("QUERY_CACHE_TTL_SECONDS", "60"))
+    QUERY_CACHE_MAX_ENTRIES: int = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "256"))
+    QUERY_CACHE_MAX_BYTES: int = int(os.getenv("QUERY_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    QUERY_CACHE_TIME_BUCKET_SECONDS: int = int(os.getenv("QUERY_CACHE_TIME_BUCKET_SECONDS", "60"))
+
+    # Local database (users, audit logs, risk rollups)
+    DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./siem_assistant.db")
+
     # Wazuh Configuration 
     
     # (Wazuh ek open-source security monitoring tool hai jo primarily system monitoring, intrusion detection, and compliance management ke liye use hota hai.)
@@ -31,6 +57,49 @@ class Settings(BaseSettings):
     # NLP Configuration
     NLP_MODEL_NAME: str = "distilbert-base-cased"
     SPACY_MODEL: str = "en_core_web_sm"
+    NLP_BATCH_SIZE: int = int(os.getenv("NLP_BATCH_SIZE", "64"))
+    NLP_N_PROCESS: int = int(os.getenv("NLP_N_PROCESS", "1"))
+    # Most messages one /chat/classify/batch request may send (larger requests get a 422)
+    NLP_MAX_BATCH: int = int(os.getenv("NLP_MAX_BATCH", "1000"))
+    NLP_WARMUP_IN_BACKGROUND: bool = os.getenv("NLP_WARMUP_IN_BACKGROUND", "true").lower() == "true"
+
+    # Anomaly detection model
+    ANOMALY_MODEL_PATH: str = os.getenv("ANOMALY_MODEL_PATH", "data/anomaly_model.joblib")
+    ANOMALY_RETRAIN_INTERVAL_SECONDS: float = float(os.getenv("ANOMALY_RETRAIN_INTERVAL_SECONDS", "3600"))
+    ANOMALY_BASELINE_SAMPLE_SIZE: int = int(os.getenv("ANOMALY_BASELINE_SAMPLE_SIZE", "50000"))
+    ANOMALY_MIN_TRAINING_SAMPLES: int = int(os.getenv("ANOMALY_MIN_TRAINING_SAMPLES", "1000"))
+    ANOMALY_CONTAMINATION: float = float(os.getenv("ANOMALY_CONTAMINATION", "0.1"))
+
+    # Threat analysis process pool
+    ANALYSIS_EXECUTOR_ENABLED: bool = os.getenv("ANALYSIS_EXECUTOR_ENABLED", "true").lower() == "true"
+    ANALYSIS_WORKERS: int = int(os.getenv("ANALYSIS_WORKERS", "2"))
+    ANALYSIS_MAX_QUEUE_DEPTH: int = int(os.getenv("ANALYSIS_MAX_QUEUE_DEPTH", "8"))
+    ANALYSIS_OFFLOAD_MIN_EVENTS: int = int(os.getenv("ANALYSIS_OFFLOAD_MIN_EVENTS", "500"))
+
+    # Trend rollups: a bucket is only cached once it ended this long ago (late-arriving events)
+    TRENDS_INGEST_LAG_SECONDS: float = float(os.getenv("TRENDS_INGEST_LAG_SECONDS", "900"))
+
+    # Chart payloads
+    CHART_MAX_POINTS_PER_SERIES: int = int(os.getenv("CHART_MAX_POINTS_PER_SERIES", "2000"))
+
+    # WebSocket fan-out (slow consumer policy: drop_oldest, drop_newest or disconnect)
+    WS_SEND_QUEUE_SIZE: int = int(os.getenv("WS_SEND_QUEUE_SIZE", "256"))
+    WS_SEND_TIMEOUT_SECONDS: float = float(os.getenv("WS_SEND_TIMEOUT_SECONDS", "10"))
+    WS_SLOW_CONSUMER_POLICY: str = os.getenv("WS_SLOW_CONSUMER_POLICY", "drop_oldest")
+
+    # Cross-worker pub/sub (backend: memory for a single worker, socket for several)
+    PUBSUB_BACKEND: str = os.getenv("PUBSUB_BACKEND", "memory")
+    PUBSUB_HOST: str = os.getenv("PUBSUB_HOST", "127.0.0.1")
+    PUBSUB_PORT: int = int(os.getenv("PUBSUB_PORT", "8765"))
+    PUBSUB_EMBEDDED_BROKER: bool = os.getenv("PUBSUB_EMBEDDED_BROKER", "true").lower() == "true"
+    PUBSUB_REPLAY_LIMIT: int = int(os.getenv("PUBSUB_REPLAY_LIMIT", "10000"))
+    
+    # Conversation context store (in-memory LRU, write-behind to DATABASE_URL)
+    CONTEXT_MAX_SESSIONS: int = int(os.getenv("CONTEXT_MAX_SESSIONS", "1000"))
+    CONTEXT_MAX_HISTORY: int = int(os.getenv("CONTEXT_MAX_HISTORY", "100"))
+    CONTEXT_FLUSH_INTERVAL_SECONDS: float = float(os.getenv("CONTEXT_FLUSH_INTERVAL_SECONDS", "1"))
+    CONTEXT_FLUSH_BATCH_SIZE: int = int(os.getenv("CONTEXT_FLUSH_BATCH_SIZE", "200"))
+    CONTEXT_FLUSH_MAX_RETRIES: int = int(os.getenv("CONTEXT_FLUSH_MAX_RETRIES", "5"))
     
     # # Redis Configuration (for context management)
     # REDIS_HOST: str = os.getenv("REDIS_HOST", "localhost")
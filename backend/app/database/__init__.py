@@ -6,7 +6,7 @@ from database.connection import (
     get_db,
     init_db
 )
-from database.models import User, AuditLog, QueryLog
+from database.models import User, AuditLog, QueryLog, RiskRollup, ChatSessionRecord, ChatMessageRecord
 
 __all__ = [
     "engine",
@@ -16,5 +16,8 @@ __all__ = [
     "init_db",
     "User",
     "AuditLog",
-    "QueryLog"
+    "QueryLog",
+    "RiskRollup",
+    "ChatSessionRecord",
+    "ChatMessageRecord"
 ]
\ No newline at end of file
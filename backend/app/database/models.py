@@ -1,7 +1,7 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, Float, JSON, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from app.database.connection import Base
+from database.connection import Base
 
 class User(Base):
     __tablename__ = "users"
@@ -51,3 +51,43 @@ class QueryLog(Base):
     
     # Relationships
     user = relationship("User", back_populates="queries")
+
+class RiskRollup(Base):
+    __tablename__ = "risk_rollups"
+    __table_args__ = (
+        UniqueConstraint("scope", "granularity", "bucket_start", name="uq_risk_rollup_bucket"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    scope = Column(String, nullable=False)  # index pattern the bucket was computed over
+    granularity = Column(String, nullable=False)  # "hour" or "day"
+    bucket_start = Column(DateTime, nullable=False)  # naive UTC
+    events = Column(Integer, default=0)
+    threats = Column(Integer, default=0)
+    threat_counts = Column(JSON)
+    severity = Column(JSON)
+    risk_score = Column(Float, default=0)
+    computed_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class ChatSessionRecord(Base):
+    __tablename__ = "chat_sessions"
+    
+    session_id = Column(String, primary_key=True)
+    user_id = Column(String, index=True)
+    context = Column(JSON)
+    created_at = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
+
+class ChatMessageRecord(Base):
+    __tablename__ = "chat_messages"
+    __table_args__ = (
+        UniqueConstraint("session_id", "seq", name="uq_chat_message_seq"),
+    )
+    
+    id = Column(String, primary_key=True)
+    session_id = Column(String, nullable=False, index=True)
+    seq = Column(Integer, nullable=False)  # position within the session
+    type = Column(String, nullable=False)
+    content = Column(Text, nullable=False)
+    message_metadata = Column("metadata", JSON)
+    timestamp = Column(DateTime, nullable=False)
@@ -1,62 +1,58 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 import uvicorn
+import asyncio
+import json
 import logging
+import time
 from contextlib import asynccontextmanager
 from core.config import settings
 from core.logging import setup_logging
-from api.routes import chat, reports, health
-from services.nlp_service import NLPService
+from core.metrics import HTTP_REQUESTS, HTTP_REQUEST_DURATION, HTTP_IN_FLIGHT
+from api.routes import chat, reports, health, metrics
+from services.nlp_service import get_nlp_service
+from services.context_manager import get_context_manager
+from services.connection_hub import connection_hub
+from services.pubsub import pubsub
+from services.collaboration_service import get_collaboration_service
 
 # Global instances
 nlp_service = None
 context_manager = None
-
-# If ContextManager is not already defined, we define it here
-class ContextManager:
-    """Context Manager class for handling various resources or states."""
-    async def initialize(self):
-        logging.info("Initializing context manager...")
-        # Add any setup code for your context manager here
-        await self.setup_resources()
-
-    async def cleanup(self):
-        logging.info("Cleaning up context manager...")
-        # Add any teardown code for your context manager here
-        await self.release_resources()
-
-    async def setup_resources(self):
-        # Resource setup logic (e.g., databases, files, etc.)
-        logging.info("Setting up resources.")
-
-    async def release_resources(self):
-        # Resource cleanup logic
-        logging.info("Releasing resources.")
-
+collaboration_service = None
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager"""
-    global nlp_service, context_manager
+    global nlp_service, context_manager, collaboration_service
     
     # Startup
     setup_logging()
     logging.info("Starting SIEM NLP Assistant...")
+    startup_start = time.perf_counter()
 
-    # Initialize services
-    nlp_service = NLPService()
+    # Initialize services (models warm up in the background)
+    nlp_service = get_nlp_service()
     await nlp_service.initialize()
 
-    context_manager = ContextManager()
+    context_manager = get_context_manager()
     await context_manager.initialize()
 
-    logging.info("All services initialized successfully")
+    # Cross-worker replication of collaboration state
+    await pubsub.start()
+    collaboration_service = get_collaboration_service()
+    await collaboration_service.start()
+
+    logging.info(f"All services initialized successfully in {time.perf_counter() - startup_start:.2f}s")
 
     yield
 
     # Shutdown
     logging.info("Shutting down SIEM NLP Assistant...")
+    await connection_hub.close_all()
+    await collaboration_service.stop()
+    await pubsub.close()
     await nlp_service.cleanup()
     await context_manager.cleanup()
 
@@ -77,44 +73,77 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Count and time every HTTP request, labelled by route template"""
+    start = time.perf_counter()
+    HTTP_IN_FLIGHT.inc()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        HTTP_IN_FLIGHT.inc(-1)
+        # The template (/api/reports/{report_id}), not the raw path, keeps label cardinality bounded
+        route = request.scope.get("route")
+        route_path = getattr(route, "path", "unmatched")
+        HTTP_REQUEST_DURATION.observe(time.perf_counter() - start, method=request.method, route=route_path)
+        HTTP_REQUESTS.inc(method=request.method, route=route_path, status=str(status))
+
 # Include routers
 app.include_router(health.router, prefix="/api", tags=["health"])
 app.include_router(chat.router, prefix="/api", tags=["chat"])
 app.include_router(reports.router, prefix="/api", tags=["reports"])
+app.include_router(metrics.router, prefix="/api", tags=["metrics"])
 
-# WebSocket connection manager
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: list[WebSocket] = []
-        self.user_connections: dict[str, WebSocket] = {}
-
-    async def connect(self, websocket: WebSocket, user_id: str):
-        await websocket.accept()
-        self.active_connections.append(websocket)
-        self.user_connections[user_id] = websocket
-
-    def disconnect(self, websocket: WebSocket, user_id: str = None):
-        self.active_connections.remove(websocket)
-        if user_id and user_id in self.user_connections:
-            del self.user_connections[user_id]
-
-    async def send_personal_message(self, message: str, user_id: str):
-        if user_id in self.user_connections:
-            await self.user_connections[user_id].send_text(message)
+@app.websocket("/ws/{user_id}")
+async def websocket_endpoint(websocket: WebSocket, user_id: str):
+    connection = await connection_hub.connect(websocket, user_id)
 
+    async def send(message_type: str, payload: dict):
+        connection_hub.send(connection, message_type, payload)
 
-manager = ConnectionManager()
+    # Queries run beside the receive loop, so several can overlap and a disconnect is seen at once
+    query_tasks = set()
 
-@app.websocket("/ws/{user_id}")
-async def websocket_endpoint(websocket: WebSocket, user_id: str):
-    await manager.connect(websocket, user_id)
     try:
         while True:
             data = await websocket.receive_text()
-            # Process WebSocket messages here
-            await manager.send_personal_message(f"Echo: {data}", user_id)
+            try:
+                message = json.loads(data)
+            except ValueError:
+                message = None
+
+            message_type = message.get("type") if isinstance(message, dict) else None
+            payload = (message.get("payload") or {}) if message_type else {}
+
+            # {"type": "chat_query", "payload": {"message": ..., "session_id": ..., "request_id": ...}}
+            if message_type == "chat_query":
+                payload.setdefault("user_id", user_id)
+                task = asyncio.create_task(chat.stream_chat_query(payload, send))
+                query_tasks.add(task)
+                task.add_done_callback(query_tasks.discard)
+            # {"type": "subscribe", "payload": {"channel": "investigation:<id>:messages"}}
+            elif message_type == "subscribe" and payload.get("channel"):
+                if get_collaboration_service().can_join_room(user_id, payload["channel"]):
+                    connection_hub.join(connection, payload["channel"])
+                else:
+                    connection_hub.send(connection, "subscribe_error", {
+                        "channel": payload["channel"],
+                        "detail": "Not a participant of this investigation"
+                    })
+            elif message_type == "unsubscribe" and payload.get("channel"):
+                connection_hub.leave(connection, payload["channel"])
+            else:
+                # Plain-text echo, unchanged for existing clients
+                connection_hub.send_text(connection, f"Echo: {data}")
     except WebSocketDisconnect:
-        manager.disconnect(websocket, user_id)
+        pass
+    finally:
+        for task in list(query_tasks):
+            chat.discard_task(task)
+        connection_hub.disconnect(connection)
 
 if __name__ == "__main__":
     uvicorn.run(
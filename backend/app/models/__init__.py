@@ -3,6 +3,7 @@ from models.chat_models import (
     ChatMessage,
     QueryRequest,
     QueryResponse,
+    BatchQueryRequest,
     ChatSession,
     MessageType,
     QueryIntent
@@ -32,6 +33,7 @@ __all__ = [
     "ChatMessage",
     "QueryRequest",
     "QueryResponse",
+    "BatchQueryRequest",
     "ChatSession",
     "MessageType",
     "QueryIntent",
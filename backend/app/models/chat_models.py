@@ -1,7 +1,8 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 from enum import Enum
+from core.config import settings
 
 class MessageType(str, Enum):
     USER = "user"
@@ -30,6 +31,11 @@ class QueryRequest(BaseModel):
     user_id: Optional[str] = None
     context: Optional[Dict[str, Any]] = None
 
+class BatchQueryRequest(BaseModel):
+    # Bounded: the whole batch runs through spaCy on one worker thread
+    messages: List[str] = Field(..., max_length=settings.NLP_MAX_BATCH)
+    context: Optional[Dict[str, Any]] = None
+
 class QueryResponse(BaseModel):
     response: str
     intent: QueryIntent
@@ -39,6 +45,7 @@ class QueryResponse(BaseModel):
     visualization: Optional[Dict[str, Any]] = None
     query_used: Optional[str] = None
     execution_time: Optional[float] = None
+    stage_timings: Optional[Dict[str, float]] = None  # seconds per pipeline stage
 
 class ChatSession(BaseModel):
     session_id: str
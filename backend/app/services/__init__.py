@@ -5,7 +5,7 @@ from services.siem_connector import SIEMConnector
 from services.context_manager import ContextManager
 from services.response_formatter import ResponseFormatter
 from services.ai_threat_detection import AIThreatDetectionService
-from services.collaborative_investigation import CollaborativeInvestigationService
+from services.collaboration_service import CollaborativeInvestigationService
 
 __all__ = [
     "NLPService",
@@ -1,34 +1,77 @@
 import numpy as np
-from sklearn.ensemble import IsolationForest
-from sklearn.preprocessing import StandardScaler
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, FrozenSet, List, Optional, AsyncIterator, Awaitable, Callable, Tuple
 from datetime import datetime, timedelta
 import asyncio
+import zlib
+from functools import lru_cache
 from models.siem_models import SecurityEvent
+from services.anomaly_model import anomaly_model
+from services.brute_force_detector import BruteForceDetector
+from services.indicator_matcher import IndicatorMatcher
+from services.analysis_executor import analysis_executor, AnalysisQueueFull, AnalysisCancelled
+from core.config import settings
+from core.metrics import ERRORS, timed
+from utils import ecs
 
 logger = logging.getLogger(__name__)
 
+FEATURE_NAMES = (
+    "hour_of_day",
+    "description_length",
+    "event_type_code",
+    "has_source_ip",
+    "severity",
+    "metadata_size"
+)
+
+SEVERITY_CODES = {'low': 1, 'medium': 2, 'high': 3, 'critical': 4}
+
+# Risk points per detected threat, scaled by its confidence
+SEVERITY_WEIGHTS = {'low': 10, 'medium': 25, 'high': 50, 'critical': 80}
+
+@lru_cache(maxsize=4096)
+def encode_category(value: str) -> int:
+    """Stable categorical code; unlike hash() it is not salted per process"""
+    return zlib.crc32(value.encode()) % 1000
+
 class AIThreatDetectionService:
     """AI-powered threat detection and anomaly analysis"""
     
     def __init__(self):
-        self.isolation_forest = IsolationForest(contamination=0.1, random_state=42)
-        self.scaler = StandardScaler()
-        self.is_trained = False
+        self.anomaly_model = anomaly_model
+        self.executor = analysis_executor if settings.ANALYSIS_EXECUTOR_ENABLED else None
+        self.offload_min_events = settings.ANALYSIS_OFFLOAD_MIN_EVENTS
+        self.baseline_rows_per_batch = 1000
+        # Worker processes score only; the parent process owns the baseline sample
+        self.collect_baseline = True
         self.threat_patterns = {}
+        self.indicator_matcher = IndicatorMatcher([])
         
     async def initialize(self):
         """Initialize AI models"""
         try:
             logger.info("Initializing AI threat detection service...")
             await self._load_threat_patterns()
+            await asyncio.to_thread(self.anomaly_model.load)
+            if self.executor is not None:
+                await self.executor.start()
             logger.info("AI threat detection service initialized")
         except Exception as e:
             logger.error(f"Failed to initialize AI service: {e}")
     
+    async def cleanup(self):
+        """Stop background model training and analysis workers"""
+        self.anomaly_model.shutdown()
+        if self.executor is not None:
+            self.executor.shutdown()
+    
     async def _load_threat_patterns(self):
         """Load known threat patterns"""
+        self.load_threat_patterns()
+    
+    def load_threat_patterns(self):
+        """Known threat patterns and the indicator matcher built from them"""
         self.threat_patterns = {
             'brute_force': {
                 'min_attempts': 5,
@@ -45,83 +88,224 @@ class AIThreatDetectionService:
                 'suspicious_processes': ['powershell', 'cmd', 'wmic']
             }
         }
+        self.indicator_matcher = IndicatorMatcher.from_threat_patterns(self.threat_patterns)
+    
+    def _ensure_threat_patterns(self):
+        """Load patterns on first use, for instances that were never initialize()d"""
+        if not self.threat_patterns:
+            self.load_threat_patterns()
+    
+    def create_brute_force_detector(self) -> BruteForceDetector:
+        """Sliding-window detector configured from the brute force pattern"""
+        self._ensure_threat_patterns()
+        pattern = self.threat_patterns['brute_force']
+        return BruteForceDetector(
+            min_attempts=pattern['min_attempts'],
+            time_window=pattern['time_window']
+        )
     
-    async def analyze_events(self, events: List[SecurityEvent]) -> Dict[str, Any]:
-        """Analyze security events using AI"""
+    @timed("threat_analysis")
+    async def analyze_events(
+        self,
+        events: List[SecurityEvent],
+        brute_force: Optional[BruteForceDetector] = None,
+        is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None
+    ) -> Dict[str, Any]:
+        """Analyze security events using AI without blocking the event loop
+
+        Large batches go to the analysis process pool; small ones, and
+        batches that share a long-lived BruteForceDetector across a stream,
+        run on a thread. Raises AnalysisQueueFull when the pool is saturated
+        and AnalysisCancelled when is_disconnected() reports the client left.
+        """
         if not events:
             return {"anomalies": [], "threats": [], "risk_score": 0}
         
+        if self.executor is None or brute_force is not None or len(events) < self.offload_min_events:
+            return await asyncio.to_thread(self.analyze_events_sync, events, brute_force)
+        
+        try:
+            result = await self.executor.analyze(events, is_disconnected)
+        except (AnalysisQueueFull, AnalysisCancelled):
+            raise
+        except Exception as e:
+            ERRORS.inc(component="threat_analysis")
+            logger.error(f"AI analysis failed: {e}")
+            return {"anomalies": [], "threats": [], "risk_score": 0, "error": str(e)}
+        
+        if "error" in result:
+            # Failed inside the worker, whose own registry is never scraped
+            ERRORS.inc(component="threat_analysis")
+        
+        # Workers send back a sample of their features for the baseline
+        baseline_sample = result.pop("_baseline_sample", None)
+        if baseline_sample is not None:
+            self.anomaly_model.observe(baseline_sample)
+        
+        return result
+    
+    def analyze_events_sync(
+        self,
+        events: List[SecurityEvent],
+        brute_force: Optional[BruteForceDetector] = None
+    ) -> Dict[str, Any]:
+        """Analyze security events using AI (CPU-bound; runs in a thread or worker)"""
+        if not events:
+            return {"anomalies": [], "threats": [], "risk_score": 0}
+        
+        self._ensure_threat_patterns()
         try:
             # Extract features from events
             features = self._extract_features(events)
             
             # Detect anomalies
-            anomalies = await self._detect_anomalies(features, events)
+            anomalies = self._detect_anomalies(features, events)
             
             # Detect known threat patterns
-            threats = await self._detect_threat_patterns(events)
+            threats = self._detect_threat_patterns(events, brute_force)
             
             # Calculate overall risk score
             risk_score = self._calculate_risk_score(anomalies, threats)
             
-            return {
+            result = {
                 "anomalies": anomalies,
                 "threats": threats,
                 "risk_score": risk_score,
                 "recommendations": self._generate_recommendations(threats, risk_score)
             }
+            if not self.collect_baseline:
+                result["_baseline_sample"] = self.anomaly_model.sample(features, self.baseline_rows_per_batch)
+            return result
             
         except Exception as e:
+            ERRORS.inc(component="threat_analysis")
             logger.error(f"AI analysis failed: {e}")
             return {"anomalies": [], "threats": [], "risk_score": 0, "error": str(e)}
     
+    async def analyze_event_stream(
+        self,
+        event_batches: AsyncIterator[List[SecurityEvent]],
+        max_findings: int = 100
+    ) -> Dict[str, Any]:
+        """Analyze streamed event batches, keeping only the strongest findings"""
+        anomalies = []
+        threats = []
+        total_events = 0
+        brute_force = self.create_brute_force_detector()
+
+        async for batch in event_batches:
+            total_events += len(batch)
+            result = await self.analyze_events(batch, brute_force)
+
+            anomalies = sorted(
+                anomalies + result["anomalies"],
+                key=lambda x: x['anomaly_score']
+            )[:max_findings]
+            threats = sorted(
+                threats + [t for t in result["threats"] if t["threat_type"] != "brute_force"],
+                key=lambda x: x.get('confidence', 0),
+                reverse=True
+            )[:max_findings]
+
+        # Brute force windows span batches, so report each source's peak once
+        threats = sorted(
+            threats + brute_force.threats(),
+            key=lambda x: x.get('confidence', 0),
+            reverse=True
+        )[:max_findings]
+
+        risk_score = self._calculate_risk_score(anomalies, threats)
+
+        return {
+            "anomalies": anomalies,
+            "threats": threats,
+            "risk_score": risk_score,
+            "recommendations": self._generate_recommendations(threats, risk_score),
+            "total_events": total_events
+        }
+
     def _extract_features(self, events: List[SecurityEvent]) -> np.ndarray:
-        """Extract numerical features from security events"""
-        features = []
-        
-        for event in events:
-            feature_vector = [
-                event.timestamp.hour,  # Hour of day
-                len(event.description),  # Description length
-                hash(event.event_type) % 1000,  # Event type hash
-                1 if event.source_ip else 0,  # Has source IP
-                {'low': 1, 'medium': 2, 'high': 3, 'critical': 4}.get(event.severity.value, 0),
-                len(event.metadata),  # Metadata richness
-            ]
-            features.append(feature_vector)
-        
-        return np.array(features)
+        """Extract numerical features from security events in a single pass"""
+        features, (hours, description_lengths, event_type_codes,
+                   has_source_ip, severities, metadata_sizes) = self._allocate_features(len(events))
+
+        severity_codes = SEVERITY_CODES
+        for i, event in enumerate(events):
+            hours[i] = event.timestamp.hour
+            description_lengths[i] = len(event.description)
+            event_type_codes[i] = encode_category(event.event_type)
+            has_source_ip[i] = 1 if event.source_ip else 0
+            severities[i] = severity_codes.get(event.severity, 0)
+            metadata_sizes[i] = len(event.metadata)
+
+        return features
+
+    def extract_features_from_sources(self, sources: List[Dict[str, Any]]) -> np.ndarray:
+        """Extract the same features straight from raw ES _source documents
+
+        Skips building SecurityEvent models entirely, which dominates the
+        cost for large result sets.
+        """
+        features, (hours, description_lengths, event_type_codes,
+                   has_source_ip, severities, metadata_sizes) = self._allocate_features(len(sources))
+
+        severity_codes = SEVERITY_CODES
+        metadata_fields = ecs.METADATA_FIELDS
+        for i, source in enumerate(sources):
+            timestamp = ecs.get_field(source, "@timestamp")
+            if isinstance(timestamp, str) and len(timestamp) >= 13 and timestamp[10] == "T":
+                hours[i] = int(timestamp[11:13])
+            else:
+                hours[i] = ecs.parse_timestamp(timestamp).hour
+            description_lengths[i] = len(ecs.description(source))
+            event_type_codes[i] = encode_category(ecs.event_type(source))
+            has_source_ip[i] = 1 if ecs.get_field(source, "source.ip") else 0
+            severities[i] = severity_codes.get(ecs.severity_name(source), 0)
+            metadata_size = 1  # the index name is always recorded
+            for field in metadata_fields:
+                if ecs.get_field(source, field) is not None:
+                    metadata_size += 1
+            metadata_sizes[i] = metadata_size
+
+        return features
+
+    def _allocate_features(self, n: int) -> Tuple[np.ndarray, Tuple[np.ndarray, ...]]:
+        """Empty feature matrix plus a writable view of each of its columns
+
+        Extraction writes straight into the column views, so the matrix is
+        filled in one pass with no intermediate lists to copy afterwards.
+        """
+        features = np.empty((n, len(FEATURE_NAMES)), dtype=np.float64)
+        return features, tuple(features[:, index] for index in range(len(FEATURE_NAMES)))
     
-    async def _detect_anomalies(self, features: np.ndarray, events: List[SecurityEvent]) -> List[Dict[str, Any]]:
+    def _detect_anomalies(self, features: np.ndarray, events: List[SecurityEvent]) -> List[Dict[str, Any]]:
         """Use Isolation Forest to detect anomalous events"""
         if len(features) < 10:  # Need minimum samples
             return []
         
         try:
-            # Scale features
-            features_scaled = self.scaler.fit_transform(features)
+            # Feed the baseline sample; retraining happens in a worker process
+            if self.collect_baseline:
+                self.anomaly_model.observe(features)
             
-            # Train or use existing model
-            if not self.is_trained:
-                self.isolation_forest.fit(features_scaled)
-                self.is_trained = True
-            
-            # Predict anomalies (-1 for anomaly, 1 for normal)
-            predictions = self.isolation_forest.predict(features_scaled)
-            anomaly_scores = self.isolation_forest.decision_function(features_scaled)
+            # Score against the persisted baseline (nothing to report until one exists)
+            result = self.anomaly_model.score(features)
+            if result is None:
+                return []
+            is_anomaly, anomaly_scores = result
             
             anomalies = []
-            for i, (prediction, score) in enumerate(zip(predictions, anomaly_scores)):
-                if prediction == -1:  # Anomaly detected
-                    anomalies.append({
-                        "event_id": events[i].id,
-                        "event_type": events[i].event_type,
-                        "timestamp": events[i].timestamp.isoformat(),
-                        "anomaly_score": float(score),
-                        "description": events[i].description[:100],
-                        "severity": events[i].severity.value,
-                        "confidence": min(abs(score) * 10, 1.0)  # Normalize to 0-1
-                    })
+            for i in np.flatnonzero(is_anomaly):
+                score = anomaly_scores[i]
+                anomalies.append({
+                    "event_id": events[i].id,
+                    "event_type": events[i].event_type,
+                    "timestamp": events[i].timestamp.isoformat(),
+                    "anomaly_score": float(score),
+                    "description": events[i].description[:100],
+                    "severity": events[i].severity.value,
+                    "confidence": min(abs(score) * 10, 1.0)  # Normalize to 0-1
+                })
             
             return sorted(anomalies, key=lambda x: x['anomaly_score'])
             
@@ -129,73 +313,71 @@ class AIThreatDetectionService:
             logger.error(f"Anomaly detection failed: {e}")
             return []
     
-    async def _detect_threat_patterns(self, events: List[SecurityEvent]) -> List[Dict[str, Any]]:
+    def _detect_threat_patterns(
+        self,
+        events: List[SecurityEvent],
+        brute_force: Optional[BruteForceDetector] = None
+    ) -> List[Dict[str, Any]]:
         """Detect known threat patterns"""
         threats = []
         
-        # Group events by source IP and time
-        ip_events = {}
-        for event in events:
-            if event.source_ip:
-                if event.source_ip not in ip_events:
-                    ip_events[event.source_ip] = []
-                ip_events[event.source_ip].append(event)
+        # Lowercase and scan each description once for every indicator
+        tags = self.indicator_matcher.tag(event.description for event in events)
         
         # Detect brute force attacks
-        for ip, ip_event_list in ip_events.items():
-            brute_force = await self._detect_brute_force(ip_event_list, ip)
-            if brute_force:
-                threats.append(brute_force)
+        threats.extend(self._detect_brute_force(events, tags, brute_force))
         
         # Detect data exfiltration
-        exfiltration = await self._detect_data_exfiltration(events)
+        exfiltration = self._detect_data_exfiltration(events, tags)
         if exfiltration:
             threats.extend(exfiltration)
         
         # Detect privilege escalation
-        privilege_esc = await self._detect_privilege_escalation(events)
+        privilege_esc = self._detect_privilege_escalation(events, tags)
         if privilege_esc:
             threats.extend(privilege_esc)
         
         return threats
     
-    async def _detect_brute_force(self, events: List[SecurityEvent], ip: str) -> Optional[Dict[str, Any]]:
-        """Detect brute force attacks"""
-        pattern = self.threat_patterns['brute_force']
+    def _detect_brute_force(
+        self,
+        events: List[SecurityEvent],
+        tags: List[FrozenSet[str]],
+        detector: Optional[BruteForceDetector] = None
+    ) -> List[Dict[str, Any]]:
+        """Detect brute force attacks with a per-source sliding window"""
+        indicators = self.threat_patterns['brute_force']['indicators']
+        detector = detector or self.create_brute_force_detector()
         
-        # Filter failed login attempts
-        failed_logins = [
-            e for e in events 
-            if any(indicator in e.description.lower() for indicator in pattern['indicators'])
-        ]
+        # One sort for the whole batch instead of one per source IP
+        failed_logins = sorted(
+            (
+                (e.timestamp.timestamp(), e.source_ip) for e, event_tags in zip(events, tags)
+                if e.source_ip and not event_tags.isdisjoint(indicators)
+            ),
+            key=lambda x: x[0]
+        )
         
-        if len(failed_logins) >= pattern['min_attempts']:
-            # Check time window
-            time_sorted = sorted(failed_logins, key=lambda x: x.timestamp)
-            time_diff = (time_sorted[-1].timestamp - time_sorted[0].timestamp).total_seconds()
-            
-            if time_diff <= pattern['time_window']:
-                return {
-                    "threat_type": "brute_force",
-                    "source_ip": ip,
-                    "attempts": len(failed_logins),
-                    "time_window": time_diff,
-                    "severity": "high",
-                    "confidence": min(len(failed_logins) / 10.0, 1.0),
-                    "description": f"Detected {len(failed_logins)} failed login attempts from {ip} in {time_diff:.0f} seconds"
-                }
+        alerting = {}
+        for timestamp, ip in failed_logins:
+            if detector.observe(ip, timestamp):
+                alerting[ip] = None
         
-        return None
+        return detector.threats(list(alerting))
     
-    async def _detect_data_exfiltration(self, events: List[SecurityEvent]) -> List[Dict[str, Any]]:
+    def _detect_data_exfiltration(
+        self,
+        events: List[SecurityEvent],
+        tags: List[FrozenSet[str]]
+    ) -> List[Dict[str, Any]]:
         """Detect potential data exfiltration"""
         threats = []
         pattern = self.threat_patterns['data_exfiltration']
         
         # Look for large data transfers during unusual hours
-        for event in events:
+        for event, event_tags in zip(events, tags):
             if event.timestamp.hour in pattern['unusual_hours']:
-                if any(indicator in event.description.lower() for indicator in pattern['indicators']):
+                if not event_tags.isdisjoint(pattern['indicators']):
                     # Mock data size analysis (in real scenario, parse from event metadata)
                     estimated_size = len(event.description) * 100  # Mock calculation
                     
@@ -212,14 +394,21 @@ class AIThreatDetectionService:
         
         return threats
     
-    async def _detect_privilege_escalation(self, events: List[SecurityEvent]) -> List[Dict[str, Any]]:
+    def _detect_privilege_escalation(
+        self,
+        events: List[SecurityEvent],
+        tags: List[FrozenSet[str]]
+    ) -> List[Dict[str, Any]]:
         """Detect privilege escalation attempts"""
         threats = []
         pattern = self.threat_patterns['privilege_escalation']
         
-        for event in events:
+        for event, event_tags in zip(events, tags):
+            if not event_tags:
+                continue
+            
             # Check for admin actions
-            if any(action in event.description.lower() for action in pattern['admin_actions']):
+            if not event_tags.isdisjoint(pattern['admin_actions']):
                 threats.append({
                     "threat_type": "privilege_escalation",
                     "event_id": event.id,
@@ -231,7 +420,7 @@ class AIThreatDetectionService:
                 })
             
             # Check for suspicious processes
-            if any(process in event.description.lower() for process in pattern['suspicious_processes']):
+            if not event_tags.isdisjoint(pattern['suspicious_processes']):
                 threats.append({
                     "threat_type": "suspicious_process",
                     "event_id": event.id,
@@ -244,6 +433,88 @@ class AIThreatDetectionService:
         
         return threats
     
+    def trend_aggregations(self) -> Dict[str, Any]:
+        """Per-bucket sub-aggregations that count threat pattern indicators in ES"""
+        brute_force = self.threat_patterns['brute_force']
+        exfiltration = self.threat_patterns['data_exfiltration']
+        privilege = self.threat_patterns['privilege_escalation']
+        
+        def any_phrase(indicators: List[str]) -> Dict[str, Any]:
+            return {
+                "bool": {
+                    "should": [{"match_phrase": {"message": indicator}} for indicator in indicators],
+                    "minimum_should_match": 1
+                }
+            }
+        
+        return {
+            "brute_force": {
+                "filter": any_phrase(brute_force['indicators']),
+                "aggs": {
+                    "sources": {
+                        "terms": {
+                            "field": "source.ip",
+                            "min_doc_count": brute_force['min_attempts'],
+                            "size": 100
+                        }
+                    }
+                }
+            },
+            "indicators": {
+                "filters": {
+                    "filters": {
+                        "data_exfiltration": {
+                            "bool": {
+                                "filter": [
+                                    any_phrase(exfiltration['indicators']),
+                                    {
+                                        "script": {
+                                            "script": {
+                                                "source": "params.hours.contains(doc['@timestamp'].value.getHour())",
+                                                "params": {"hours": exfiltration['unusual_hours']}
+                                            }
+                                        }
+                                    }
+                                ]
+                            }
+                        },
+                        "privilege_escalation": any_phrase(privilege['admin_actions']),
+                        "suspicious_process": any_phrase(privilege['suspicious_processes'])
+                    }
+                }
+            }
+        }
+    
+    def assess_bucket(self, bucket: Dict[str, Any]) -> Dict[str, Any]:
+        """Risk for one date_histogram bucket built from trend_aggregations()
+
+        Mirrors _calculate_risk_score with every matching event counted as
+        one threat; brute force counts one threat per source over the
+        attempt threshold within the bucket.
+        """
+        threat_counts = {
+            "brute_force": len(bucket.get("brute_force", {}).get("sources", {}).get("buckets", []))
+        }
+        for threat_type, counts in bucket.get("indicators", {}).get("buckets", {}).items():
+            threat_counts[threat_type] = counts.get("doc_count", 0)
+        
+        risk_score = 0
+        for source in bucket.get("brute_force", {}).get("sources", {}).get("buckets", []):
+            risk_score += SEVERITY_WEIGHTS['high'] * min(source["doc_count"] / 10.0, 1.0)
+        risk_score += threat_counts.get("data_exfiltration", 0) * SEVERITY_WEIGHTS['critical'] * 0.7
+        risk_score += threat_counts.get("privilege_escalation", 0) * SEVERITY_WEIGHTS['high'] * 0.6
+        risk_score += threat_counts.get("suspicious_process", 0) * SEVERITY_WEIGHTS['medium'] * 0.5
+        
+        return {
+            "events": bucket.get("doc_count", 0),
+            "risk_score": min(risk_score, 100),
+            "threats": sum(threat_counts.values()),
+            "threat_counts": threat_counts,
+            "severity": {
+                b["key"]: b["doc_count"] for b in bucket.get("severity", {}).get("buckets", [])
+            }
+        }
+    
     def _calculate_risk_score(self, anomalies: List[Dict], threats: List[Dict]) -> float:
         """Calculate overall risk score (0-100)"""
         risk_score = 0
@@ -253,11 +524,10 @@ class AIThreatDetectionService:
             risk_score += anomaly.get('confidence', 0) * 20
         
         # Add risk from threats
-        severity_weights = {'low': 10, 'medium': 25, 'high': 50, 'critical': 80}
         for threat in threats:
             severity = threat.get('severity', 'medium')
             confidence = threat.get('confidence', 0.5)
-            risk_score += severity_weights.get(severity, 25) * confidence
+            risk_score += SEVERITY_WEIGHTS.get(severity, 25) * confidence
         
         return min(risk_score, 100)  # Cap at 100
     
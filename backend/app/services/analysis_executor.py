@@ -0,0 +1,194 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Per-process service built by the worker initializer
+_worker_service = None
+
+
+class AnalysisQueueFull(Exception):
+    """Raised when too many analyses are already queued; maps to HTTP 503"""
+    pass
+
+
+class AnalysisCancelled(Exception):
+    """Raised when the client went away before the analysis finished"""
+    pass
+
+
+def _init_worker():
+    """Warm a worker: threat patterns, indicator matcher and the mmap'd model"""
+    global _worker_service
+    from services.ai_threat_detection import AIThreatDetectionService
+
+    _worker_service = AIThreatDetectionService()
+    _worker_service.collect_baseline = False
+    asyncio.run(_worker_service._load_threat_patterns())
+    _worker_service.anomaly_model.load()
+
+
+def _analyze_in_worker(events: List[Any], submitted_at: float) -> Dict[str, Any]:
+    started_at = time.time()
+    _worker_service.anomaly_model.reload_if_changed()
+    result = _worker_service.analyze_events_sync(events)
+    result["_timings"] = {
+        "queue_wait": started_at - submitted_at,
+        "compute": time.time() - started_at
+    }
+    return result
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+class AnalysisExecutor:
+    """Process pool that runs CPU-bound threat analysis off the event loop
+
+    Workers are spawned once and keep the threat detection service warm, so
+    a request only pays for pickling its events. The number of analyses in
+    flight is bounded; beyond that callers get AnalysisQueueFull instead of
+    an ever-growing backlog.
+    """
+
+    def __init__(self, max_workers: int = None, max_queue_depth: int = None):
+        self.max_workers = max_workers or settings.ANALYSIS_WORKERS
+        self.max_queue_depth = max_queue_depth if max_queue_depth is not None else settings.ANALYSIS_MAX_QUEUE_DEPTH
+        self.disconnect_poll_interval = 0.5
+
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self.in_flight = 0
+
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.cancelled = 0
+        self.failed = 0
+        self.queue_wait_seconds_total = 0.0
+        self.compute_seconds_total = 0.0
+        self.queue_wait_seconds_max = 0.0
+        self.compute_seconds_max = 0.0
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    # spawn: the parent runs model/training threads that fork() would copy mid-lock
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=_init_worker
+                    )
+        return self._pool
+
+    async def start(self):
+        """Spawn and warm every worker ahead of the first request"""
+        pool = self._get_pool()
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(
+            loop.run_in_executor(pool, _ping) for _ in range(self.max_workers)
+        ))
+        logger.info(f"Analysis executor started with {self.max_workers} workers")
+
+    def _reset_pool(self):
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def analyze(
+        self,
+        events: List[Any],
+        is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None
+    ) -> Dict[str, Any]:
+        """Run analyze_events_sync in a worker and wait for the result"""
+        if self.in_flight >= self.max_workers + self.max_queue_depth:
+            self.rejected += 1
+            raise AnalysisQueueFull(
+                f"{self.in_flight} analyses in flight (limit {self.max_workers + self.max_queue_depth})"
+            )
+
+        self.in_flight += 1
+        self.submitted += 1
+        try:
+            future = self._get_pool().submit(_analyze_in_worker, events, time.time())
+            waiter = asyncio.wrap_future(future)
+
+            while True:
+                done, _ = await asyncio.wait({waiter}, timeout=self.disconnect_poll_interval)
+                if done:
+                    break
+                if is_disconnected is not None and await is_disconnected():
+                    # Queued work is dropped; a running task finishes but is discarded
+                    future.cancel()
+                    self.cancelled += 1
+                    raise AnalysisCancelled("Client disconnected")
+
+            result = waiter.result()
+
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM); start a fresh pool on the next call
+            self.failed += 1
+            self._reset_pool()
+            raise
+        except AnalysisCancelled:
+            raise
+        except asyncio.CancelledError:
+            future.cancel()
+            self.cancelled += 1
+            raise
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+
+        timings = result.pop("_timings")
+        self.completed += 1
+        self.queue_wait_seconds_total += timings["queue_wait"]
+        self.compute_seconds_total += timings["compute"]
+        self.queue_wait_seconds_max = max(self.queue_wait_seconds_max, timings["queue_wait"])
+        self.compute_seconds_max = max(self.compute_seconds_max, timings["compute"])
+        logger.debug(
+            f"Analysis of {len(events)} events: queued {timings['queue_wait'] * 1000:.1f}ms, "
+            f"computed {timings['compute'] * 1000:.1f}ms"
+        )
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Executor counters for health/metrics reporting"""
+        completed = self.completed or 1
+        return {
+            "workers": self.max_workers,
+            "started": self._pool is not None,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_workers + self.max_queue_depth,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "cancelled": self.cancelled,
+            "failed": self.failed,
+            "queue_wait_seconds_avg": self.queue_wait_seconds_total / completed,
+            "queue_wait_seconds_max": self.queue_wait_seconds_max,
+            "compute_seconds_avg": self.compute_seconds_total / completed,
+            "compute_seconds_max": self.compute_seconds_max
+        }
+
+
+# Process-wide executor shared by every AIThreatDetectionService instance
+analysis_executor = AnalysisExecutor()
@@ -0,0 +1,271 @@
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, Any, Optional, Tuple
+import numpy as np
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _train_and_save(
+    baseline: np.ndarray,
+    model_path: str,
+    contamination: float,
+    random_state: int
+) -> Dict[str, Any]:
+    """Fit scaler + forest on a baseline sample and persist them atomically
+
+    Runs in a worker process, so it only imports what it needs and never
+    touches the parent's state; the parent reloads the file when it is done.
+    """
+    import joblib
+    from sklearn.ensemble import IsolationForest
+    from sklearn.preprocessing import StandardScaler
+
+    start = time.perf_counter()
+    scaler = StandardScaler().fit(baseline)
+    forest = IsolationForest(contamination=contamination, random_state=random_state)
+    forest.fit(scaler.transform(baseline))
+
+    artifact = {
+        "scaler": scaler,
+        "forest": forest,
+        "trained_at": time.time(),
+        "training_samples": len(baseline),
+        "n_features": baseline.shape[1]
+    }
+
+    directory = os.path.dirname(model_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{model_path}.{os.getpid()}.tmp"
+    joblib.dump(artifact, tmp_path)
+    os.replace(tmp_path, model_path)
+
+    return {
+        "trained_at": artifact["trained_at"],
+        "training_samples": artifact["training_samples"],
+        "train_seconds": time.perf_counter() - start
+    }
+
+
+class AnomalyModel:
+    """Persisted anomaly baseline, scored with transform-only calls
+
+    Features from every analyzed batch feed a fixed-size reservoir sample.
+    Training on that sample happens in a separate process and the result is
+    written to disk; requests only ever load (memory-mapped) and score, so
+    their latency does not depend on how much data the model was trained on.
+    """
+
+    def __init__(
+        self,
+        model_path: str = None,
+        retrain_interval_seconds: float = None,
+        sample_size: int = None,
+        min_training_samples: int = None,
+        contamination: float = None,
+        random_state: int = 42
+    ):
+        self.model_path = model_path if model_path is not None else settings.ANOMALY_MODEL_PATH
+        self.retrain_interval_seconds = (
+            retrain_interval_seconds if retrain_interval_seconds is not None else settings.ANOMALY_RETRAIN_INTERVAL_SECONDS
+        )
+        self.sample_size = sample_size if sample_size is not None else settings.ANOMALY_BASELINE_SAMPLE_SIZE
+        self.min_training_samples = (
+            min_training_samples if min_training_samples is not None else settings.ANOMALY_MIN_TRAINING_SAMPLES
+        )
+        self.contamination = contamination if contamination is not None else settings.ANOMALY_CONTAMINATION
+        self.random_state = random_state
+
+        self.scaler = None
+        self.forest = None
+        self.trained_at: Optional[float] = None
+        self.training_samples = 0
+        self.last_training: Optional[Dict[str, Any]] = None
+        self.last_error: Optional[str] = None
+
+        self._reservoir: Optional[np.ndarray] = None
+        self._filled = 0
+        self._seen = 0
+        self._rng = np.random.default_rng(random_state)
+        self._lock = threading.Lock()
+        self._load_attempted = False
+        self._reload_pending = False
+        self._loaded_mtime: Optional[float] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._training: Optional[Future] = None
+        self._next_training_at = 0.0
+
+    @property
+    def is_ready(self) -> bool:
+        return self.forest is not None
+
+    def load(self) -> bool:
+        """Memory-map a previously persisted model, if there is one"""
+        with self._lock:
+            self._load_attempted = True
+        if not os.path.exists(self.model_path):
+            return False
+
+        try:
+            import joblib
+
+            mtime = os.path.getmtime(self.model_path)
+            artifact = joblib.load(self.model_path, mmap_mode="r")
+        except Exception as e:
+            self.last_error = str(e)
+            logger.error(f"Failed to load anomaly model from {self.model_path}: {e}")
+            return False
+
+        with self._lock:
+            self.scaler = artifact["scaler"]
+            self.forest = artifact["forest"]
+            self.trained_at = artifact["trained_at"]
+            self.training_samples = artifact["training_samples"]
+            self._loaded_mtime = mtime
+            self._next_training_at = max(self._next_training_at, self.trained_at + self.retrain_interval_seconds)
+        logger.info(f"Loaded anomaly model trained on {self.training_samples} samples")
+        return True
+
+    def reload_if_changed(self) -> bool:
+        """Pick up a model retrained by another process (one stat() call)"""
+        try:
+            mtime = os.path.getmtime(self.model_path)
+        except OSError:
+            return False
+        if mtime == self._loaded_mtime:
+            return False
+        return self.load()
+
+    def sample(self, features: np.ndarray, limit: int) -> np.ndarray:
+        """Random subset of rows to forward to the process that owns training"""
+        if len(features) <= limit:
+            return features
+        return features[self._rng.choice(len(features), size=limit, replace=False)]
+
+    def score(self, features: np.ndarray) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Return (is_anomaly, decision scores), or None until a model exists"""
+        # Claim the (re)load under the lock so concurrent callers load once
+        with self._lock:
+            reload = not self._load_attempted or self._reload_pending
+            self._load_attempted = True
+            self._reload_pending = False
+        if reload:
+            self.load()
+
+        with self._lock:
+            scaler, forest = self.scaler, self.forest
+        if forest is None:
+            return None
+
+        scores = forest.decision_function(scaler.transform(features))
+        # Same threshold IsolationForest.predict applies, without scoring twice
+        return scores < 0, scores
+
+    def observe(self, features: np.ndarray):
+        """Add a batch to the baseline sample and retrain when it is due"""
+        if len(features):
+            with self._lock:
+                self._sample(features)
+        self.maybe_retrain()
+
+    def maybe_retrain(self) -> bool:
+        """Start background training if there is no model or it is stale"""
+        if self._filled < self.min_training_samples:
+            return False
+        if time.time() < self._next_training_at:
+            return False
+        return self.start_training()
+
+    def start_training(self) -> bool:
+        """Fit a new model on the current sample in a worker process"""
+        # observe() runs on many threads: one check-and-submit at a time, or two
+        # could both start a fit (or both create an executor and leak a process)
+        with self._lock:
+            if self._training is not None and not self._training.done():
+                return False
+
+            baseline = self._reservoir[:self._filled].copy()
+
+            if self._executor is None:
+                # spawn, not fork: the parent has threads (model warmup, asyncio.to_thread)
+                self._executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+
+            self._next_training_at = time.time() + self.retrain_interval_seconds
+            logger.info(f"Training anomaly model on {len(baseline)} baseline samples")
+            self._training = self._executor.submit(
+                _train_and_save, baseline, self.model_path, self.contamination, self.random_state
+            )
+            training = self._training
+        # Outside the lock: a fit that is already done runs the callback right here
+        training.add_done_callback(self._on_trained)
+        return True
+
+    def shutdown(self):
+        """Stop the training worker without waiting for a running fit"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "ready": self.is_ready,
+            "model_path": self.model_path,
+            "trained_at": self.trained_at,
+            "training_samples": self.training_samples,
+            "baseline_samples": self._filled,
+            "observed_samples": self._seen,
+            "training": self._training is not None and not self._training.done(),
+            "last_training": self.last_training,
+            "last_error": self.last_error
+        }
+
+    def _on_trained(self, future: Future):
+        if future.cancelled():
+            return
+        try:
+            self.last_training = future.result()
+        except Exception as e:
+            self.last_error = str(e)
+            logger.error(f"Anomaly model training failed: {e}")
+            return
+
+        logger.info(
+            f"Anomaly model retrained on {self.last_training['training_samples']} samples "
+            f"in {self.last_training['train_seconds']:.2f}s"
+        )
+        # Loaded by the next score() call: this runs on the pool's management
+        # thread, where first-time imports (joblib, sklearn) can fail
+        with self._lock:
+            self._reload_pending = True
+
+    def _sample(self, features: np.ndarray):
+        """Reservoir sampling (Algorithm R), vectorized per batch"""
+        if self._reservoir is None or self._reservoir.shape[1] != features.shape[1]:
+            self._reservoir = np.empty((self.sample_size, features.shape[1]), dtype=np.float64)
+            self._filled = 0
+            self._seen = 0
+
+        take = min(self.sample_size - self._filled, len(features))
+        if take:
+            self._reservoir[self._filled:self._filled + take] = features[:take]
+            self._filled += take
+            self._seen += take
+
+        rest = features[take:]
+        if len(rest):
+            positions = self._seen + np.arange(len(rest))
+            slots = self._rng.integers(0, positions + 1)
+            keep = slots < self.sample_size
+            self._reservoir[slots[keep]] = rest[keep]
+            self._seen += len(rest)
+
+
+# Process-wide model shared by every AIThreatDetectionService instance
+anomaly_model = AnomalyModel()
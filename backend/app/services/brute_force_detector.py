@@ -0,0 +1,130 @@
+from bisect import insort
+from heapq import heapify, heappop, heappush
+from collections import OrderedDict, deque
+from typing import Dict, Any, List, Optional, Tuple
+
+class BruteForceDetector:
+    """Streaming sliding-window counter of failed logins per source
+
+    Each source keeps a deque of failure timestamps no older than
+    time_window, so every observation is O(1) amortized and a burst is
+    found wherever it falls, not only when it spans the whole history.
+    Sources idle for longer than idle_timeout (in event time) are evicted
+    so memory stays bounded on long-running streams. An evicted source's
+    peak is kept for threats() among at most max_findings closed findings,
+    dropping the weakest first.
+    """
+
+    def __init__(
+        self,
+        min_attempts: int = 5,
+        time_window: float = 300,
+        idle_timeout: float = None,
+        max_sources: int = 100000,
+        max_findings: int = 1000
+    ):
+        self.min_attempts = min_attempts
+        self.time_window = time_window
+        self.idle_timeout = idle_timeout or time_window * 2
+        self.max_sources = max_sources
+        self.max_findings = max_findings
+
+        # source -> failure timestamps, least recently active source first
+        self._windows: "OrderedDict[str, deque]" = OrderedDict()
+        # source -> (attempts, span) of the densest window seen so far, for live sources
+        self._peaks: Dict[str, Tuple[int, float]] = {}
+        # Peaks of evicted sources, plus a min-heap of (attempts, source) to drop the weakest
+        self._closed: Dict[str, Tuple[int, float]] = {}
+        self._closed_heap: List[Tuple[int, str]] = []
+        self.evictions = 0
+        self.dropped_findings = 0
+
+    def observe(self, source: str, timestamp: float) -> bool:
+        """Record one failure; True when the source is at or over the threshold"""
+        window = self._windows.get(source)
+        if window is None:
+            window = deque()
+            self._windows[source] = window
+        else:
+            self._windows.move_to_end(source)
+
+        if not window or timestamp >= window[-1]:
+            window.append(timestamp)
+        else:
+            insort(window, timestamp)  # late arrival from an unordered stream
+
+        newest = window[-1]
+        while newest - window[0] > self.time_window:
+            window.popleft()
+
+        self._evict_idle(newest)
+
+        attempts = len(window)
+        if attempts < self.min_attempts:
+            return False
+
+        peak = self._peaks.get(source)
+        if peak is None or attempts > peak[0]:
+            self._peaks[source] = (attempts, newest - window[0])
+        return True
+
+    def peak(self, source: str) -> Optional[Tuple[int, float]]:
+        """(attempts, span in seconds) of the worst window for a source"""
+        live = self._peaks.get(source)
+        closed = self._closed.get(source)
+        if live is None or closed is None:
+            return live or closed
+        return live if live[0] >= closed[0] else closed
+
+    def threats(self, sources: List[str] = None) -> List[Dict[str, Any]]:
+        """Brute force findings for the given (default: all) alerting sources"""
+        if sources is None:
+            sources = list(self._closed) + [source for source in self._peaks if source not in self._closed]
+        
+        threats = []
+        for source in sources:
+            peak = self.peak(source)
+            if peak is None:
+                continue
+            attempts, span = peak
+            threats.append({
+                "threat_type": "brute_force",
+                "source_ip": source,
+                "attempts": attempts,
+                "time_window": span,
+                "severity": "high",
+                "confidence": min(attempts / 10.0, 1.0),
+                "description": f"Detected {attempts} failed login attempts from {source} in {span:.0f} seconds"
+            })
+        return threats
+
+    def _evict_idle(self, now: float):
+        while self._windows:
+            source, window = next(iter(self._windows.items()))
+            if len(self._windows) <= self.max_sources and now - window[-1] <= self.idle_timeout:
+                break
+            self._windows.popitem(last=False)
+            self.evictions += 1
+            peak = self._peaks.pop(source, None)
+            if peak is not None:
+                self._close(source, peak)
+
+    def _close(self, source: str, peak: Tuple[int, float]):
+        """Keep an evicted source's peak, within the max_findings budget"""
+        previous = self._closed.get(source)
+        if previous is not None and previous[0] >= peak[0]:
+            return
+        self._closed[source] = peak
+        heappush(self._closed_heap, (peak[0], source))
+
+        while len(self._closed) > self.max_findings:
+            attempts, weakest = heappop(self._closed_heap)
+            # Skip entries superseded by a later, higher peak for the same source
+            current = self._closed.get(weakest)
+            if current is not None and current[0] == attempts:
+                del self._closed[weakest]
+                self.dropped_findings += 1
+
+        if len(self._closed_heap) > 2 * max(self.max_findings, len(self._closed)):
+            self._closed_heap = [(attempts, source) for source, (attempts, _) in self._closed.items()]
+            heapify(self._closed_heap)
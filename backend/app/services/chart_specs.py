@@ -0,0 +1,155 @@
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Sequence
+from core.config import settings
+from services import downsampling
+
+# Plotly-compatible figure dicts ({"data": [...], "layout": {...}}) built
+# straight from event columns. react-plotly renders them as-is, so the
+# backend never has to build a plotly Figure and round-trip it through JSON.
+
+SEVERITY_COLORS = {
+    'low': '#28a745',
+    'medium': '#ffc107',
+    'high': '#fd7e14',
+    'critical': '#dc3545'
+}
+DEFAULT_COLOR = '#6c757d'
+
+def plotly_date(value: datetime) -> str:
+    """Datetime in the format plotly.js expects (no offset, UTC wall time)"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.isoformat()
+
+
+def layout(title: str, xaxis_title: str = None, yaxis_title: str = None, showlegend: bool = True,
+           height: int = 400, **extra) -> Dict[str, Any]:
+    spec = {"title": {"text": title}, "showlegend": showlegend, "height": height}
+    if xaxis_title is not None:
+        spec["xaxis"] = {"title": {"text": xaxis_title}}
+    if yaxis_title is not None:
+        spec["yaxis"] = {"title": {"text": yaxis_title}}
+    spec.update(extra)
+    return spec
+
+
+def timeline_chart(
+    timestamps: Sequence[datetime],
+    event_types: Sequence[str],
+    severities: Sequence[str],
+    descriptions: Sequence[str],
+    max_points: int = None
+) -> Dict[str, Any]:
+    """Event scatter over time, one trace per severity (first-seen order)
+
+    Traces longer than max_points are thinned on a time x event type grid;
+    each kept marker's hover shows how many events it stands for.
+    """
+    max_points = max_points or settings.CHART_MAX_POINTS_PER_SERIES
+    rows_by_severity: Dict[str, List[int]] = {}
+    for i, severity in enumerate(severities):
+        rows_by_severity.setdefault(severity, []).append(i)
+
+    traces = []
+    points = 0
+    for severity, rows in rows_by_severity.items():
+        hovertemplate = f"severity={severity}<br>timestamp=%{{x}}<br>event_type=%{{y}}<br>description=%{{customdata[0]}}"
+        if len(rows) > max_points:
+            rows.sort(key=timestamps.__getitem__)
+            kept, counts = downsampling.time_grid(
+                [timestamps[i].timestamp() for i in rows],
+                [event_types[i] for i in rows],
+                max_points
+            )
+            rows = [rows[i] for i in kept]
+            customdata = [[descriptions[i], int(count)] for i, count in zip(rows, counts)]
+            hovertemplate += "<br>events=%{customdata[1]}"
+        else:
+            customdata = [[descriptions[i]] for i in rows]
+
+        points += len(rows)
+        traces.append({
+            "type": "scatter",
+            "mode": "markers",
+            "name": severity,
+            "legendgroup": severity,
+            "x": [plotly_date(timestamps[i]) for i in rows],
+            "y": [event_types[i] for i in rows],
+            "customdata": customdata,
+            "marker": {"color": SEVERITY_COLORS.get(severity, DEFAULT_COLOR), "symbol": "circle"},
+            "hovertemplate": hovertemplate + "<extra></extra>"
+        })
+
+    return {
+        "data": traces,
+        "layout": layout(
+            "Security Events Timeline",
+            xaxis_title="Time",
+            yaxis_title="Event Type",
+            legend={"title": {"text": "severity"}},
+            meta={"downsampling": downsampling.reduction(len(severities), points, "time_grid")}
+        )
+    }
+
+
+def time_series_chart(
+    timestamps: Sequence[datetime],
+    counts: Sequence[int],
+    max_points: int = None
+) -> Dict[str, Any]:
+    """Line chart of event counts per histogram bucket, LTTB-reduced past max_points"""
+    max_points = max_points or settings.CHART_MAX_POINTS_PER_SERIES
+    rows = downsampling.minmax_lttb([timestamp.timestamp() for timestamp in timestamps], counts, max_points)
+    return {
+        "data": [{
+            "type": "scatter",
+            "mode": "lines+markers",
+            "name": "Events",
+            "x": [plotly_date(timestamps[i]) for i in rows],
+            "y": [counts[i] for i in rows],
+            "line": {"color": "#007bff", "width": 2},
+            "marker": {"size": 6}
+        }],
+        "layout": layout(
+            "Events Over Time",
+            xaxis_title="Time",
+            yaxis_title="Number of Events",
+            showlegend=False,
+            meta={"downsampling": downsampling.reduction(len(timestamps), len(rows), "minmax_lttb")}
+        )
+    }
+
+
+def downsampling_info(*charts: Optional[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Reduction metadata of the given charts, keyed by chart title"""
+    info = {}
+    for chart in charts:
+        meta = (chart or {}).get("layout", {}).get("meta") or {}
+        if "downsampling" in meta:
+            info[chart["layout"]["title"]["text"]] = meta["downsampling"]
+    return info
+
+
+def severity_bar_chart(severity_data: Dict[str, int]) -> Dict[str, Any]:
+    severities = list(severity_data.keys())
+    return {
+        "data": [{
+            "type": "bar",
+            "x": severities,
+            "y": list(severity_data.values()),
+            "marker": {"color": [SEVERITY_COLORS.get(s, DEFAULT_COLOR) for s in severities]}
+        }],
+        "layout": layout(
+            "Events by Severity Level",
+            xaxis_title="Severity",
+            yaxis_title="Number of Events",
+            showlegend=False
+        )
+    }
+
+
+def pie_chart(labels: Sequence[Any], values: Sequence[int], title: str, hole: Optional[float] = .3) -> Dict[str, Any]:
+    return {
+        "data": [{"type": "pie", "labels": list(labels), "values": list(values), "hole": hole}],
+        "layout": layout(title)
+    }
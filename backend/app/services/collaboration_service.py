@@ -2,17 +2,48 @@ from typing import Dict, Any, List, Optional
 from datetime import datetime
 import asyncio
 import json
+import logging
 from models.chat_models import ChatSession
-from services.context_manager import ContextManager
+from services.context_manager import ContextManager, get_context_manager
+from services.connection_hub import ConnectionHub, connection_hub
+from services.pubsub import PubSub, pubsub
+
+logger = logging.getLogger(__name__)
+
+INVESTIGATIONS_CHANNEL = "investigations"
+ROOM_PREFIX, ROOM_SUFFIX = "investigation:", ":messages"
+
+def investigation_room(investigation_id: str) -> str:
+    """WebSocket room that receives an investigation's updates"""
+    return f"{ROOM_PREFIX}{investigation_id}{ROOM_SUFFIX}"
 
 class CollaborativeInvestigationService:
-    """Real-time collaborative investigation platform"""
+    """Real-time collaborative investigation platform
+    
+    Every change is a mutation dict: applied locally, published on the
+    investigations channel so the other API workers apply it too, and
+    pushed to the investigation's WebSocket room on each worker.
+    """
     
-    def __init__(self, context_manager: ContextManager):
+    def __init__(self, context_manager: ContextManager, pubsub: PubSub = pubsub, hub: ConnectionHub = connection_hub):
         self.context_manager = context_manager
+        self.pubsub = pubsub
+        self.hub = hub
         self.active_investigations = {}  # investigation_id -> investigation_data
         self.investigation_participants = {}  # investigation_id -> [user_ids]
         self.investigation_timeline = {}  # investigation_id -> [timeline_events]
+        self._subscribed = False
+    
+    async def start(self):
+        """Receive mutations made on other workers"""
+        if not self._subscribed:
+            await self.pubsub.subscribe(INVESTIGATIONS_CHANNEL, self._on_remote_mutation)
+            self._subscribed = True
+    
+    async def stop(self):
+        if self._subscribed:
+            await self.pubsub.unsubscribe(INVESTIGATIONS_CHANNEL, self._on_remote_mutation)
+            self._subscribed = False
         
     async def create_investigation(self, creator_id: str, title: str, description: str) -> str:
         """Create a new collaborative investigation"""
@@ -33,14 +64,12 @@ class CollaborativeInvestigationService:
             "collaborative_notes": []
         }
         
-        self.active_investigations[investigation_id] = investigation
-        self.investigation_participants[investigation_id] = [creator_id]
-        self.investigation_timeline[investigation_id] = [{
-            "timestamp": datetime.now().isoformat(),
-            "user_id": creator_id,
-            "action": "created_investigation",
-            "details": {"title": title, "description": description}
-        }]
+        await self._commit({
+            "op": "create_investigation",
+            "investigation_id": investigation_id,
+            "investigation": investigation,
+            "timeline_event": self._timeline_event(creator_id, "created_investigation", {"title": title, "description": description})
+        })
         
         return investigation_id
     
@@ -50,14 +79,11 @@ class CollaborativeInvestigationService:
             return False
         
         if user_id not in self.investigation_participants[investigation_id]:
-            self.investigation_participants[investigation_id].append(user_id)
-            
-            # Add to timeline
-            self.investigation_timeline[investigation_id].append({
-                "timestamp": datetime.now().isoformat(),
+            await self._commit({
+                "op": "join_investigation",
+                "investigation_id": investigation_id,
                 "user_id": user_id,
-                "action": "joined_investigation",
-                "details": {}
+                "timeline_event": self._timeline_event(user_id, "joined_investigation", {})
             })
         
         return True
@@ -81,14 +107,11 @@ class CollaborativeInvestigationService:
             "annotations": []
         }
         
-        self.active_investigations[investigation_id]['shared_queries'].append(shared_query)
-        
-        # Add to timeline
-        self.investigation_timeline[investigation_id].append({
-            "timestamp": datetime.now().isoformat(),
-            "user_id": user_id,
-            "action": "added_evidence",
-            "details": {"title": evidence_item["title"], "type": evidence_item["type"]}
+        await self._commit({
+            "op": "share_query",
+            "investigation_id": investigation_id,
+            "shared_query": shared_query,
+            "timeline_event": self._timeline_event(user_id, "shared_query", {"query_id": shared_query["id"], "query": query})
         })
         
         return True
@@ -107,10 +130,85 @@ class CollaborativeInvestigationService:
             "replies": []
         }
         
-        self.active_investigations[investigation_id]['collaborative_notes'].append(note_item)
+        await self._commit({
+            "op": "add_note",
+            "investigation_id": investigation_id,
+            "note": note_item
+        })
+        
+        return True
+    
+    def _timeline_event(self, user_id: str, action: str, details: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "timestamp": datetime.now().isoformat(),
+            "user_id": user_id,
+            "action": action,
+            "details": details
+        }
+    
+    async def _commit(self, mutation: Dict[str, Any]):
+        """Apply a local change, then replicate it to the other workers"""
+        if self._apply(mutation):
+            self._push(mutation)
+        await self.pubsub.publish(INVESTIGATIONS_CHANNEL, mutation)
+    
+    async def _on_remote_mutation(self, mutation: Dict[str, Any]):
+        if mutation.get("origin") == self.pubsub.origin:
+            return
+        if self._apply(mutation):
+            self._push(mutation)
+    
+    def _apply(self, mutation: Dict[str, Any]) -> bool:
+        """Apply a mutation to the in-process state; False if it changed nothing"""
+        op = mutation["op"]
+        investigation_id = mutation["investigation_id"]
+        
+        if op == "create_investigation":
+            if investigation_id in self.active_investigations:
+                return False
+            self.active_investigations[investigation_id] = mutation["investigation"]
+            self.investigation_participants[investigation_id] = [mutation["investigation"]["creator_id"]]
+            self.investigation_timeline[investigation_id] = [mutation["timeline_event"]]
+            return True
+        
+        investigation = self.active_investigations.get(investigation_id)
+        if investigation is None:
+            logger.warning(f"Mutation {op} for unknown investigation {investigation_id}")
+            return False
+        
+        if op == "join_investigation":
+            if mutation["user_id"] in self.investigation_participants[investigation_id]:
+                return False
+            self.investigation_participants[investigation_id].append(mutation["user_id"])
+            self.investigation_timeline[investigation_id].append(mutation["timeline_event"])
+        elif op == "share_query":
+            investigation["shared_queries"].append(mutation["shared_query"])
+            self.investigation_timeline[investigation_id].append(mutation["timeline_event"])
+        elif op == "add_note":
+            investigation["collaborative_notes"].append(mutation["note"])
+        else:
+            logger.warning(f"Unknown investigation mutation: {op}")
+            return False
         
         return True
     
+    def _push(self, mutation: Dict[str, Any]):
+        """Send a mutation to this worker's sockets in the investigation room"""
+        payload = {key: value for key, value in mutation.items() if key != "origin"}
+        if "shared_query" in payload:
+            # Members fetch full results on demand; the room only gets the summary
+            payload["shared_query"] = {k: v for k, v in payload["shared_query"].items() if k != "full_results"}
+        
+        room = investigation_room(mutation["investigation_id"])
+        self.hub.broadcast(room, "message" if mutation["op"] == "add_note" else "update", payload)
+    
+    def can_join_room(self, user_id: str, room: str) -> bool:
+        """Only an investigation's participants may join its room; other rooms are refused"""
+        if not (room.startswith(ROOM_PREFIX) and room.endswith(ROOM_SUFFIX)):
+            return False
+        investigation_id = room[len(ROOM_PREFIX):-len(ROOM_SUFFIX)]
+        return user_id in self.investigation_participants.get(investigation_id, ())
+    
     async def get_investigation_summary(self, investigation_id: str) -> Optional[Dict[str, Any]]:
         """Get comprehensive investigation summary"""
         if investigation_id not in self.active_investigations:
@@ -142,4 +240,14 @@ class CollaborativeInvestigationService:
         start_time = datetime.fromisoformat(timeline[0]["timestamp"])
         end_time = datetime.fromisoformat(timeline[-1]["timestamp"])
         
-        return (end_time - start_time).total_seconds() / 3600
\ No newline at end of file
+        return (end_time - start_time).total_seconds() / 3600
+
+
+_shared_collaboration_service: Optional[CollaborativeInvestigationService] = None
+
+def get_collaboration_service() -> CollaborativeInvestigationService:
+    """Process-wide collaboration service, started in the application lifespan"""
+    global _shared_collaboration_service
+    if _shared_collaboration_service is None:
+        _shared_collaboration_service = CollaborativeInvestigationService(get_context_manager())
+    return _shared_collaboration_service
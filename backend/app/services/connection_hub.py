@@ -0,0 +1,225 @@
+import asyncio
+import itertools
+import json
+import logging
+from collections import defaultdict
+from typing import Dict, Any, Iterable, List, Optional
+from fastapi import WebSocket
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# What to do when a connection's send queue is full
+SLOW_CONSUMER_POLICIES = ("drop_oldest", "drop_newest", "disconnect")
+
+
+class Connection:
+    """One accepted WebSocket with its own bounded send queue and writer task"""
+
+    __slots__ = ("id", "user_id", "websocket", "queue", "rooms", "policy", "sender",
+                 "sent", "dropped", "closed")
+
+    def __init__(self, connection_id: int, user_id: str, websocket: WebSocket, max_queue_size: int, policy: str):
+        self.id = connection_id
+        self.user_id = user_id
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self.rooms: set = set()
+        self.policy = policy
+        self.sender: Optional[asyncio.Task] = None
+        self.sent = 0
+        self.dropped = 0
+        self.closed = False
+
+    def enqueue(self, text: str) -> bool:
+        """Queue an already serialized message; False means the consumer is too slow to keep"""
+        if self.closed:
+            return True
+        try:
+            self.queue.put_nowait(text)
+            return True
+        except asyncio.QueueFull:
+            pass
+
+        if self.policy == "disconnect":
+            return False
+
+        self.dropped += 1
+        if self.policy == "drop_oldest":
+            self.queue.get_nowait()
+            self.queue.put_nowait(text)
+        return True
+
+
+class ConnectionHub:
+    """WebSocket fan-out: many sockets per user, named rooms, bounded queues
+
+    Sending never awaits a socket. Each message is serialized once and put
+    on every target's bounded queue; a writer task per connection drains
+    its queue, so one slow analyst cannot hold up a broadcast. When a
+    queue is full the slow-consumer policy decides between dropping the
+    oldest message, dropping the new one, or disconnecting the socket.
+    """
+
+    def __init__(self, max_queue_size: int = None, send_timeout: float = None, policy: str = None):
+        self.max_queue_size = max_queue_size or settings.WS_SEND_QUEUE_SIZE
+        self.send_timeout = send_timeout or settings.WS_SEND_TIMEOUT_SECONDS
+        self.policy = policy or settings.WS_SLOW_CONSUMER_POLICY
+        if self.policy not in SLOW_CONSUMER_POLICIES:
+            raise ValueError(f"Unknown slow consumer policy: {self.policy}")
+
+        self._ids = itertools.count(1)
+        # Dicts keyed by connection id double as ordered sets with O(1) removal
+        self.connections: Dict[int, Connection] = {}
+        self.users: Dict[str, Dict[int, Connection]] = defaultdict(dict)
+        self.rooms: Dict[str, Dict[int, Connection]] = defaultdict(dict)
+
+        # Close handshakes started outside a coroutine; referenced until done so they are not collected
+        self._close_tasks: set = set()
+
+        self.slow_consumer_disconnects = 0
+        self.send_failures = 0
+
+    async def connect(self, websocket: WebSocket, user_id: str) -> Connection:
+        await websocket.accept()
+        connection = Connection(next(self._ids), user_id, websocket, self.max_queue_size, self.policy)
+        self.connections[connection.id] = connection
+        self.users[user_id][connection.id] = connection
+        connection.sender = asyncio.create_task(self._sender(connection))
+        return connection
+
+    def disconnect(self, connection: Connection):
+        """Forget a connection; safe to call more than once"""
+        if connection.closed:
+            return
+        connection.closed = True
+        self.connections.pop(connection.id, None)
+
+        sockets = self.users.get(connection.user_id)
+        if sockets is not None:
+            sockets.pop(connection.id, None)
+            if not sockets:
+                del self.users[connection.user_id]
+
+        for room in connection.rooms:
+            members = self.rooms.get(room)
+            if members is not None:
+                members.pop(connection.id, None)
+                if not members:
+                    del self.rooms[room]
+        connection.rooms.clear()
+
+        if connection.sender is not None and connection.sender is not asyncio.current_task():
+            connection.sender.cancel()
+
+    def join(self, connection: Connection, room: str):
+        if connection.closed:
+            return
+        self.rooms[room][connection.id] = connection
+        connection.rooms.add(room)
+
+    def leave(self, connection: Connection, room: str):
+        members = self.rooms.get(room)
+        if members is not None:
+            members.pop(connection.id, None)
+            if not members:
+                del self.rooms[room]
+        connection.rooms.discard(room)
+
+    def send(self, connection: Connection, message_type: str, payload: Any) -> int:
+        """Queue a message for a single connection"""
+        return self._fan_out([connection], self._serialize(message_type, payload))
+
+    def send_text(self, connection: Connection, text: str) -> int:
+        """Queue a raw text frame (not a {"type", "payload"} envelope) for a single connection"""
+        return self._fan_out([connection], text)
+
+    def send_to_user(self, user_id: str, message_type: str, payload: Any) -> int:
+        """Queue a message for every socket the user has open"""
+        sockets = self.users.get(user_id)
+        if not sockets:
+            return 0
+        return self._fan_out(list(sockets.values()), self._serialize(message_type, payload))
+
+    def broadcast(self, room: str, message_type: str, payload: Any, exclude: Connection = None) -> int:
+        """Queue a message for every member of a room; returns how many accepted it"""
+        members = self.rooms.get(room)
+        if not members:
+            return 0
+        targets = [connection for connection in members.values() if connection is not exclude]
+        return self._fan_out(targets, self._serialize(message_type, payload))
+
+    def broadcast_all(self, message_type: str, payload: Any) -> int:
+        return self._fan_out(list(self.connections.values()), self._serialize(message_type, payload))
+
+    def room_members(self, room: str) -> List[str]:
+        """Users with at least one socket in the room"""
+        return list(dict.fromkeys(connection.user_id for connection in self.rooms.get(room, {}).values()))
+
+    async def close_all(self, code: int = 1001):
+        """Close every socket concurrently (server shutdown)"""
+        connections = list(self.connections.values())
+        for connection in connections:
+            self.disconnect(connection)
+        await asyncio.gather(
+            *(connection.websocket.close(code=code) for connection in connections),
+            *(connection.sender for connection in connections if connection.sender is not None),
+            *list(self._close_tasks),
+            return_exceptions=True
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        connections = self.connections.values()
+        return {
+            "connections": len(self.connections),
+            "users": len(self.users),
+            "rooms": len(self.rooms),
+            "queued_messages": sum(connection.queue.qsize() for connection in connections),
+            "dropped_messages": sum(connection.dropped for connection in connections),
+            "slow_consumer_policy": self.policy,
+            "slow_consumer_disconnects": self.slow_consumer_disconnects,
+            "send_failures": self.send_failures
+        }
+
+    def _serialize(self, message_type: str, payload: Any) -> str:
+        return json.dumps({"type": message_type, "payload": payload}, default=str)
+
+    def _fan_out(self, targets: Iterable[Connection], text: str) -> int:
+        accepted = 0
+        for connection in targets:
+            if connection.enqueue(text):
+                accepted += 1
+            else:
+                logger.warning(f"Disconnecting slow WebSocket consumer {connection.id} (user {connection.user_id})")
+                self.slow_consumer_disconnects += 1
+                self.disconnect(connection)
+                task = asyncio.create_task(self._close(connection, code=1013))
+                self._close_tasks.add(task)
+                task.add_done_callback(self._close_tasks.discard)
+        return accepted
+
+    async def _sender(self, connection: Connection):
+        """Drain one connection's queue onto its socket"""
+        try:
+            while not connection.closed:
+                text = await connection.queue.get()
+                await asyncio.wait_for(connection.websocket.send_text(text), timeout=self.send_timeout)
+                connection.sent += 1
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            # Closed socket or a send stuck past the timeout
+            logger.debug(f"WebSocket {connection.id} send failed: {e}")
+            self.send_failures += 1
+            self.disconnect(connection)
+            await self._close(connection, code=1011)
+
+    async def _close(self, connection: Connection, code: int):
+        try:
+            await connection.websocket.close(code=code)
+        except Exception:
+            pass
+
+
+# Process-wide hub shared by the WebSocket endpoint and the collaboration service
+connection_hub = ConnectionHub()
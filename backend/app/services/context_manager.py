@@ -0,0 +1,355 @@
+import asyncio
+import logging
+import threading
+import uuid
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+from sqlalchemy import delete, select
+from core.config import settings
+from core.metrics import CACHE_REQUESTS, ERRORS
+from database.connection import SessionLocal, engine
+from database.models import ChatSessionRecord, ChatMessageRecord
+from models.chat_models import ChatMessage, ChatSession, MessageType
+
+logger = logging.getLogger(__name__)
+
+
+class _SessionState:
+    """In-memory tier of one conversation: capped history plus context"""
+
+    __slots__ = ("session_id", "user_id", "messages", "context", "created_at", "updated_at", "next_seq")
+
+    def __init__(self, session_id: str, max_history: int, user_id: str = None):
+        now = datetime.now()
+        self.session_id = session_id
+        self.user_id = user_id
+        self.messages: deque = deque(maxlen=max_history)
+        self.context: Dict[str, Any] = {}
+        self.created_at = now
+        self.updated_at = now
+        self.next_seq = 0
+
+
+class ContextManager:
+    """Conversation history and context: LRU in memory, write-behind to SQLite
+
+    Hot sessions live in an LRU of at most max_sessions entries, each
+    holding only the last max_history messages, so every call costs the
+    same however long the conversation gets. A session missing from the
+    LRU is loaded lazily (its row plus the latest messages). Writes go to
+    memory first and are flushed to the database in batches every
+    flush_interval seconds, or sooner once flush_batch_size are pending.
+    A batch that fails flush_max_retries times in a row is dropped, so one
+    bad write cannot stall every later one.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = None,
+        max_history: int = None,
+        flush_interval: float = None,
+        flush_batch_size: int = None,
+        flush_max_retries: int = None,
+        session_factory=SessionLocal,
+        bind=engine
+    ):
+        self.max_sessions = max_sessions or settings.CONTEXT_MAX_SESSIONS
+        self.max_history = max_history or settings.CONTEXT_MAX_HISTORY
+        self.flush_interval = flush_interval or settings.CONTEXT_FLUSH_INTERVAL_SECONDS
+        self.flush_batch_size = flush_batch_size or settings.CONTEXT_FLUSH_BATCH_SIZE
+        self.flush_max_retries = flush_max_retries or settings.CONTEXT_FLUSH_MAX_RETRIES
+        self.session_factory = session_factory
+        self.bind = bind
+
+        self._sessions: "OrderedDict[str, _SessionState]" = OrderedDict()
+        self._loading: Dict[str, asyncio.Future] = {}
+
+        # Write-behind buffers, swapped out wholesale by flush()
+        self._pending_messages: List[Tuple[int, ChatMessage, str]] = []
+        self._dirty_sessions: Dict[str, _SessionState] = {}
+        self._cleared_sessions: set = set()
+        # Sessions in the batch flush() is writing right now
+        self._flushing: Dict[str, _SessionState] = {}
+        self._failed_flushes = 0
+
+        self._flush_lock = asyncio.Lock()
+        self._flush_requested = asyncio.Event()
+        self._flusher: Optional[asyncio.Task] = None
+        self._closing = False
+        self._table_lock = threading.Lock()
+        self._tables_ready = False
+
+        self.hits = 0
+        self.misses = 0
+        self.flushes = 0
+        self.flush_errors = 0
+        self.dropped_messages = 0
+
+    async def initialize(self):
+        await asyncio.to_thread(self._ensure_tables)
+        if self._flusher is None:
+            self._closing = False
+            self._flusher = asyncio.create_task(self._flush_loop())
+        logger.info("Context manager initialized")
+
+    async def cleanup(self):
+        if self._flusher is not None:
+            # Let the flusher finish its current batch rather than cancelling mid-write
+            self._closing = True
+            self._flush_requested.set()
+            await self._flusher
+            self._flusher = None
+        await self.flush()
+
+    async def create_session(self, session_id: str, user_id: str = None) -> ChatSession:
+        """Start (or restart) a session with empty history and context"""
+        state = _SessionState(session_id, self.max_history, user_id)
+        self._pending_messages = [entry for entry in self._pending_messages if entry[2] != session_id]
+        self._cleared_sessions.add(session_id)
+        self._remember(state)
+        self._dirty_sessions[session_id] = state
+        self._flush_requested.set()
+        return self._to_chat_session(state)
+
+    async def add_message(
+        self,
+        session_id: str,
+        message_type: MessageType,
+        content: str,
+        metadata: Dict[str, Any] = None
+    ) -> ChatMessage:
+        state = await self._get_state(session_id)
+        message = ChatMessage(
+            id=str(uuid.uuid4()),
+            type=message_type,
+            content=content,
+            timestamp=datetime.now(),
+            metadata=metadata
+        )
+        state.messages.append(message)
+        state.updated_at = message.timestamp
+
+        self._pending_messages.append((state.next_seq, message, session_id))
+        state.next_seq += 1
+        self._dirty_sessions[session_id] = state
+        if len(self._pending_messages) >= self.flush_batch_size:
+            self._flush_requested.set()
+        return message
+
+    async def get_context(self, session_id: str) -> Dict[str, Any]:
+        state = await self._get_state(session_id)
+        return dict(state.context)
+
+    async def update_context(self, session_id: str, updates: Dict[str, Any]):
+        state = await self._get_state(session_id)
+        state.context.update(updates)
+        state.updated_at = datetime.now()
+        self._dirty_sessions[session_id] = state
+
+    async def get_conversation_history(self, session_id: str, limit: int = 20) -> List[ChatMessage]:
+        """The last `limit` messages, oldest first (at most max_history are kept)"""
+        state = await self._get_state(session_id)
+        if limit >= len(state.messages):
+            return list(state.messages)
+        return list(state.messages)[-limit:]
+
+    async def get_session(self, session_id: str) -> ChatSession:
+        return self._to_chat_session(await self._get_state(session_id))
+
+    async def flush(self):
+        """Write pending messages and session updates in one transaction"""
+        async with self._flush_lock:
+            if not (self._pending_messages or self._dirty_sessions or self._cleared_sessions):
+                return
+            messages, self._pending_messages = self._pending_messages, []
+            sessions, self._dirty_sessions = self._dirty_sessions, {}
+            cleared, self._cleared_sessions = self._cleared_sessions, set()
+
+            rows = [self._session_row(state) for state in sessions.values()]
+            self._flushing = sessions
+            try:
+                await asyncio.to_thread(self._write_batch, messages, rows, cleared)
+                self.flushes += 1
+                self._failed_flushes = 0
+            except Exception as e:
+                self.flush_errors += 1
+                self._failed_flushes += 1
+                ERRORS.inc(component="context_store")
+                logger.error(f"Error flushing chat context: {e}")
+                if self._failed_flushes >= self.flush_max_retries:
+                    self.dropped_messages += len(messages)
+                    self._failed_flushes = 0
+                    logger.error(
+                        f"Dropping {len(messages)} chat messages and {len(sessions)} session updates "
+                        f"after {self.flush_max_retries} failed flushes"
+                    )
+                else:
+                    # Put the batch back in front of anything queued meanwhile; retried next flush
+                    self._pending_messages = messages + self._pending_messages
+                    self._dirty_sessions = {**sessions, **self._dirty_sessions}
+                    self._cleared_sessions |= cleared
+            finally:
+                self._flushing = {}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "cached_sessions": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "max_history": self.max_history,
+            "pending_messages": len(self._pending_messages),
+            "dirty_sessions": len(self._dirty_sessions),
+            "hits": self.hits,
+            "misses": self.misses,
+            "flushes": self.flushes,
+            "flush_errors": self.flush_errors,
+            "dropped_messages": self.dropped_messages
+        }
+
+    async def _flush_loop(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+            await self.flush()
+
+    async def _get_state(self, session_id: str) -> _SessionState:
+        state = self._sessions.get(session_id)
+        if state is not None:
+            self._sessions.move_to_end(session_id)
+            self.hits += 1
+            CACHE_REQUESTS.inc(cache="context", result="hit")
+            return state
+
+        # Evicted before its writes reached the database (or while flush() is
+        # writing them): memory is newer than the stored row and next_seq
+        unflushed = self._dirty_sessions.get(session_id) or self._flushing.get(session_id)
+        if unflushed is not None:
+            self.hits += 1
+            CACHE_REQUESTS.inc(cache="context", result="hit")
+            self._remember(unflushed)
+            return unflushed
+
+        # One database read per session, however many requests are waiting on it
+        loading = self._loading.get(session_id)
+        if loading is not None:
+            return await asyncio.shield(loading)
+
+        self.misses += 1
+        CACHE_REQUESTS.inc(cache="context", result="miss")
+        loading = asyncio.get_running_loop().create_future()
+        self._loading[session_id] = loading
+        try:
+            state = await asyncio.to_thread(self._read_session, session_id)
+            # create_session may have installed a fresh state while we were reading
+            state = self._sessions.get(session_id) or state
+            self._remember(state)
+            loading.set_result(state)
+            return state
+        except Exception as e:
+            loading.set_exception(e)
+            raise
+        finally:
+            del self._loading[session_id]
+
+    def _remember(self, state: _SessionState):
+        self._sessions[state.session_id] = state
+        self._sessions.move_to_end(state.session_id)
+        while len(self._sessions) > self.max_sessions:
+            # Pending writes keep their own reference; nothing is lost on eviction
+            self._sessions.popitem(last=False)
+
+    def _to_chat_session(self, state: _SessionState) -> ChatSession:
+        return ChatSession(
+            session_id=state.session_id,
+            user_id=state.user_id,
+            messages=list(state.messages),
+            context=dict(state.context),
+            created_at=state.created_at,
+            updated_at=state.updated_at
+        )
+
+    def _session_row(self, state: _SessionState) -> Dict[str, Any]:
+        return {
+            "session_id": state.session_id,
+            "user_id": state.user_id,
+            "context": dict(state.context),
+            "created_at": state.created_at,
+            "updated_at": state.updated_at
+        }
+
+    def _ensure_tables(self):
+        if self._tables_ready:
+            return
+        with self._table_lock:
+            if not self._tables_ready:
+                ChatSessionRecord.__table__.create(bind=self.bind, checkfirst=True)
+                ChatMessageRecord.__table__.create(bind=self.bind, checkfirst=True)
+                self._tables_ready = True
+
+    def _read_session(self, session_id: str) -> _SessionState:
+        """Session row plus its latest max_history messages"""
+        self._ensure_tables()
+        state = _SessionState(session_id, self.max_history)
+        with self.session_factory() as session:
+            record = session.get(ChatSessionRecord, session_id)
+            if record is None:
+                return state
+
+            state.user_id = record.user_id
+            state.context = dict(record.context or {})
+            state.created_at = record.created_at
+            state.updated_at = record.updated_at
+
+            rows = session.execute(
+                select(ChatMessageRecord)
+                .where(ChatMessageRecord.session_id == session_id)
+                .order_by(ChatMessageRecord.seq.desc())
+                .limit(self.max_history)
+            ).scalars().all()
+
+        for row in reversed(rows):
+            state.messages.append(ChatMessage(
+                id=row.id,
+                type=MessageType(row.type),
+                content=row.content,
+                timestamp=row.timestamp,
+                metadata=row.message_metadata
+            ))
+        state.next_seq = rows[0].seq + 1 if rows else 0
+        return state
+
+    def _write_batch(self, messages: List[Tuple[int, ChatMessage, str]], sessions: List[Dict[str, Any]], cleared: set):
+        self._ensure_tables()
+        with self.session_factory() as session:
+            if cleared:
+                session.execute(delete(ChatMessageRecord).where(ChatMessageRecord.session_id.in_(cleared)))
+
+            for row in sessions:
+                session.merge(ChatSessionRecord(**row))
+
+            session.add_all([
+                ChatMessageRecord(
+                    id=message.id,
+                    session_id=session_id,
+                    seq=seq,
+                    type=message.type.value,
+                    content=message.content,
+                    message_metadata=message.metadata,
+                    timestamp=message.timestamp
+                )
+                for seq, message, session_id in messages
+            ])
+            session.commit()
+
+
+_shared_context_manager: Optional[ContextManager] = None
+
+def get_context_manager() -> ContextManager:
+    """Process-wide ContextManager shared by the app lifespan and the chat routes"""
+    global _shared_context_manager
+    if _shared_context_manager is None:
+        _shared_context_manager = ContextManager()
+    return _shared_context_manager
@@ -0,0 +1,132 @@
+from typing import Dict, Any, Sequence, Tuple
+import numpy as np
+
+# Server-side point reduction for chart series. Every function returns the
+# sorted indices of the points to keep, so callers can pick the matching
+# labels, descriptions or colours out of their own columns.
+
+
+def lttb(x: Sequence[float], y: Sequence[float], max_points: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets
+
+    Keeps the first and last point, and from every bucket in between the
+    point forming the largest triangle with the previously kept point and
+    the next bucket's average. Peaks and dips win that contest, so spikes
+    survive while flat stretches are thinned.
+    """
+    n = len(x)
+    if max_points >= n:
+        return np.arange(n)
+    if max_points < 3:
+        return np.array([0, n - 1][:max_points], dtype=np.int64)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    every = (n - 2) / (max_points - 2)
+    kept = np.empty(max_points, dtype=np.int64)
+    kept[0] = 0
+    kept[-1] = n - 1
+
+    a = 0
+    for i in range(max_points - 2):
+        avg_start = int((i + 1) * every) + 1
+        avg_end = min(int((i + 2) * every) + 1, n)
+        avg_x = x[avg_start:avg_end].mean()
+        avg_y = y[avg_start:avg_end].mean()
+
+        range_start = int(i * every) + 1
+        range_end = int((i + 1) * every) + 1
+        areas = np.abs(
+            (x[a] - avg_x) * (y[range_start:range_end] - y[a])
+            - (x[a] - x[range_start:range_end]) * (avg_y - y[a])
+        )
+        a = range_start + int(areas.argmax())
+        kept[i + 1] = a
+
+    return kept
+
+
+def min_max(y: Sequence[float], max_points: int) -> np.ndarray:
+    """Keep the minimum and maximum of each of max_points // 2 equal index buckets"""
+    n = len(y)
+    if max_points >= n:
+        return np.arange(n)
+
+    y = np.asarray(y, dtype=np.float64)
+    buckets = max(1, max_points // 2)
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    kept = []
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end > start:
+            segment = y[start:end]
+            kept.append(start + int(segment.argmin()))
+            kept.append(start + int(segment.argmax()))
+    return np.unique(kept)
+
+
+def minmax_lttb(x: Sequence[float], y: Sequence[float], max_points: int, preselect_ratio: int = 4) -> np.ndarray:
+    """LTTB over a min-max preselection
+
+    For series much longer than max_points, min-max first cuts the input to
+    preselect_ratio * max_points candidates (every local extreme survives),
+    then LTTB picks the final points from those. Same shape as plain LTTB
+    at a fraction of the cost on long series.
+    """
+    n = len(x)
+    if n <= max_points * preselect_ratio or max_points < 3:
+        return lttb(x, y, max_points)
+
+    y = np.asarray(y, dtype=np.float64)
+    interior = min_max(y[1:-1], max_points * preselect_ratio) + 1
+    candidates = np.concatenate(([0], interior, [n - 1]))
+
+    x = np.asarray(x, dtype=np.float64)
+    return candidates[lttb(x[candidates], y[candidates], max_points)]
+
+
+def time_grid(x: Sequence[float], categories: Sequence[Any], max_points: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Thin a categorical scatter (time on x, category on y)
+
+    The time range is split into max_points // len(categories) bins and the
+    first point of every occupied (bin, category) cell is kept, so bursts
+    and isolated events both stay visible. With more categories than
+    max_points, the rarest ones share a single cell so the result still
+    fits. Returns the kept indices and how many points each one stands for.
+    """
+    n = len(x)
+    if max_points >= n:
+        return np.arange(n), np.ones(n, dtype=np.int64)
+
+    codes: Dict[Any, int] = {}
+    category_codes = np.fromiter(
+        (codes.setdefault(category, len(codes)) for category in categories), dtype=np.int64, count=n
+    )
+    groups = len(codes)
+    if groups > max_points:
+        # Most frequent categories keep their own cell; the rest are merged into the last one
+        by_frequency = np.argsort(-np.bincount(category_codes, minlength=groups), kind="stable")
+        merged = np.full(groups, max_points - 1, dtype=np.int64)
+        merged[by_frequency[:max_points - 1]] = np.arange(max_points - 1)
+        category_codes = merged[category_codes]
+        groups = max_points
+    bins = max(1, max_points // groups)
+
+    x = np.asarray(x, dtype=np.float64)
+    low, high = x.min(), x.max()
+    span = (high - low) or 1.0
+    bin_index = np.minimum(((x - low) / span * bins).astype(np.int64), bins - 1)
+
+    _, kept, counts = np.unique(bin_index * groups + category_codes, return_index=True, return_counts=True)
+    order = np.argsort(kept)
+    return kept[order], counts[order]
+
+
+def reduction(original_points: int, points: int, method: str) -> Dict[str, Any]:
+    """Downsampling metadata reported alongside a chart"""
+    return {
+        "method": method,
+        "original_points": original_points,
+        "points": points,
+        "ratio": points / original_points if original_points else 1.0
+    }
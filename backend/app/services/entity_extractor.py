@@ -0,0 +1,116 @@
+import bisect
+import ipaddress
+import re
+from typing import Any, Dict, Iterable, List, NamedTuple, Tuple
+from models.siem_models import ExtractedEntity, EntityType
+
+# 0-255 without leading zeros, which is what ipaddress accepts
+_OCTET = r"(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)"
+
+# One alternative per entity kind, tried left to right at each position.
+# Only the named groups capture, so match.lastgroup names the kind.
+ENTITY_PATTERNS: Tuple[Tuple[str, str], ...] = (
+    ("ipv6", r"(?<![\w:.])(?:[0-9a-f]{0,4}:){2,7}(?:\d{1,3}(?:\.\d{1,3}){3}|[0-9a-f]{1,4})?(?:/\d{1,3})?(?![\w:]|\.\d)"),
+    ("ipv4", rf"(?<![\w.]){_OCTET}(?:\.{_OCTET}){{3}}(?:/(?:3[0-2]|[12]?\d))?(?![\w/]|\.\d)"),
+    ("port", r"(?<=\bport)\s+\d{1,5}\b"),
+    ("time", r"\b(?:yesterday|last\s+24\s+hours?|last\s+week|past\s+week|last\s+month|past\s+month|today|last\s+hour)\b"),
+    ("path", r"[/\\][^\s]*[/\\][^\s]*"),
+)
+
+ENTITY_KINDS: Dict[str, Tuple[EntityType, float]] = {
+    "ipv6": (EntityType.IP_ADDRESS, 0.9),
+    "ipv4": (EntityType.IP_ADDRESS, 0.9),
+    "port": (EntityType.PORT, 0.8),
+    "time": (EntityType.TIME_RANGE, 0.8),
+    "path": (EntityType.FILE_PATH, 0.7),
+}
+
+
+class EntitySpan(NamedTuple):
+    """Lightweight ExtractedEntity for the query hot path (no pydantic validation)"""
+    type: EntityType
+    value: str
+    confidence: float
+    start_pos: int
+    end_pos: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Same shape as ExtractedEntity.dict()"""
+        return self._asdict()
+
+    def to_model(self) -> ExtractedEntity:
+        return ExtractedEntity(**self._asdict())
+
+
+def valid_ip(value: str) -> bool:
+    """IPv4/IPv6 address or CIDR block, as the ipaddress module accepts it"""
+    try:
+        if "/" in value:
+            ipaddress.ip_network(value, strict=False)
+        else:
+            ipaddress.ip_address(value)
+        return True
+    except ValueError:
+        return False
+
+
+class EntityExtractor:
+    """Regex entities (IPs, ports, time ranges, file paths) in a single scan
+
+    Every rule is an alternative of one compiled pattern, so a query is
+    scanned once instead of once per rule. IPv4 octets and prefix lengths
+    are range-checked by the pattern itself (no 999.999.999.999); the rarer
+    IPv6 candidates go through ipaddress. Results are EntitySpan tuples,
+    which cost a fraction of a validated pydantic model.
+    """
+
+    def __init__(self, patterns: Tuple[Tuple[str, str], ...] = ENTITY_PATTERNS):
+        self._regex = re.compile(
+            "|".join(f"(?P<{name}>{pattern})" for name, pattern in patterns),
+            re.IGNORECASE
+        )
+
+    def extract(self, text: str) -> List[EntitySpan]:
+        """Non-overlapping entities in order of position"""
+        entities = []
+        for match in self._regex.finditer(text):
+            kind = match.lastgroup
+            value = match.group()
+            start, end = match.span()
+
+            if kind == "ipv6":
+                # A bare "::" (e.g. C++ scope or prose) needs a hex digit to count as an address
+                if not value.split("/", 1)[0].strip(":") or not valid_ip(value):
+                    continue
+            elif kind == "port":
+                # The match includes the whitespace after "port"
+                stripped = value.lstrip()
+                start += len(value) - len(stripped)
+                value = stripped
+                if int(value) > 65535:
+                    continue
+
+            entity_type, confidence = ENTITY_KINDS[kind]
+            entities.append(EntitySpan(entity_type, value, confidence, start, end))
+        return entities
+
+    def merge(self, named_entities: Iterable[EntitySpan], regex_entities: List[EntitySpan]) -> List[EntitySpan]:
+        """Named (spaCy) entities that overlap no regex entity, plus the regex entities, by position
+
+        The regex entities are validated and specifically typed, so they win
+        any overlap: "yesterday" stays one TIME_RANGE, and an IP that spaCy
+        tags as something else is not reported twice.
+        """
+        starts = [entity.start_pos for entity in regex_entities]
+        ends = [entity.end_pos for entity in regex_entities]
+
+        merged = list(regex_entities)
+        for entity in named_entities:
+            # Regex entities never overlap each other, so their ends are sorted too
+            i = bisect.bisect_right(ends, entity.start_pos)
+            if i < len(starts) and starts[i] < entity.end_pos:
+                continue
+            merged.append(entity)
+
+        merged.sort(key=lambda entity: entity.start_pos)
+        return merged
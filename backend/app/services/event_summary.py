@@ -0,0 +1,113 @@
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+from models.siem_models import SecurityEvent
+
+HIGH_SEVERITIES = ("high", "critical")
+
+class EventSummary:
+    """Counts, top source IPs, unique users, severity histogram and time bounds
+
+    Each update() walks the events once, copying the fields it needs into
+    per-column lists; the counting, set building and min/max then run over
+    those columns in C. Batches can be fed one at a time, so the same
+    object summarizes a list or a stream.
+    """
+
+    def __init__(self, top_k: int = 10):
+        self.top_k = top_k
+        self.total = 0
+        self.event_types: Counter = Counter()
+        self.severity_counts: Counter = Counter()
+        self.source_ips: Counter = Counter()
+        self.users: set = set()
+        self.start_time: Optional[datetime] = None
+        self.end_time: Optional[datetime] = None
+
+    @classmethod
+    def from_events(cls, events: List[SecurityEvent], top_k: int = 10) -> "EventSummary":
+        return cls(top_k).update(events)
+
+    def update(self, events: List[SecurityEvent]) -> "EventSummary":
+        """Fold a batch of events into the summary"""
+        n = len(events)
+        if not n:
+            return self
+
+        event_types = [None] * n
+        severities = [None] * n
+        source_ips = [None] * n
+        users = [None] * n
+        timestamps = [None] * n
+        for i, event in enumerate(events):
+            event_types[i] = event.event_type
+            severities[i] = event.severity
+            source_ips[i] = event.source_ip
+            users[i] = event.user
+            timestamps[i] = event.timestamp
+
+        self.total += n
+        self.event_types.update(event_types)
+        for severity, count in Counter(severities).items():
+            self.severity_counts[getattr(severity, "value", severity)] += count
+
+        # Events without a source IP / user carry None (occasionally "")
+        ip_counts = Counter(source_ips)
+        ip_counts.pop(None, None)
+        ip_counts.pop("", None)
+        self.source_ips.update(ip_counts)
+
+        self.users.update(users)
+        self.users.discard(None)
+        self.users.discard("")
+
+        batch_start = min(timestamps)
+        batch_end = max(timestamps)
+        if self.start_time is None or batch_start < self.start_time:
+            self.start_time = batch_start
+        if self.end_time is None or batch_end > self.end_time:
+            self.end_time = batch_end
+        return self
+
+    @property
+    def high_severity_count(self) -> int:
+        return sum(self.severity_counts[severity] for severity in HIGH_SEVERITIES)
+
+    def span_hours(self) -> float:
+        """Time span in hours, never less than one"""
+        if self.start_time is None:
+            return 1.0
+        return max(1.0, (self.end_time - self.start_time).total_seconds() / 3600)
+
+    def time_range_summary(self) -> str:
+        """Human-readable time range"""
+        if not self.total:
+            return "No events"
+        return f"{self.start_time.strftime('%Y-%m-%d %H:%M')} to {self.end_time.strftime('%Y-%m-%d %H:%M')}"
+
+    def as_dict(self, aggregations: Dict[str, Any] = None, include_metrics: bool = False) -> Dict[str, Any]:
+        """Summary payload in the shape the chat and report responses use"""
+        summary = {}
+        if self.total:
+            summary = {
+                "event_types": dict(self.event_types),
+                "severity_counts": dict(self.severity_counts),
+                "top_source_ips": dict(self.source_ips.most_common(self.top_k)),
+                "time_range": {
+                    "start": self.start_time.isoformat(),
+                    "end": self.end_time.isoformat()
+                }
+            }
+
+        if aggregations:
+            summary["aggregations"] = aggregations
+
+        if include_metrics and self.total:
+            summary["metrics"] = {
+                "events_per_hour": self.total / self.span_hours(),
+                "unique_source_ips": len(self.source_ips),
+                "unique_users": len(self.users),
+                "high_severity_percentage": self.high_severity_count / self.total * 100
+            }
+
+        return summary
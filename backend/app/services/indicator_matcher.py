@@ -0,0 +1,69 @@
+import re
+from typing import Dict, FrozenSet, Iterable, List
+
+class IndicatorMatcher:
+    """Every threat pattern indicator compiled into one trie-shaped regex
+
+    The indicators are folded into a character trie and emitted as a single
+    pattern, which behaves like an Aho-Corasick automaton: cost grows with
+    the length of the text, not the number of indicators. A lookahead
+    reports a match at every start position, so overlapping indicators are
+    all found; indicators that are prefixes of a longer match at the same
+    position are added from a precomputed table.
+    """
+
+    def __init__(self, indicators: Iterable[str]):
+        self.indicators = sorted({indicator.lower() for indicator in indicators if indicator})
+        self._prefixes: Dict[str, FrozenSet[str]] = {
+            indicator: frozenset(p for p in self.indicators if indicator.startswith(p))
+            for indicator in self.indicators
+        }
+        self._regex = re.compile(f"(?=({self._trie_pattern(self.indicators)}))") if self.indicators else None
+
+    @classmethod
+    def from_threat_patterns(cls, threat_patterns: Dict[str, Dict]) -> "IndicatorMatcher":
+        """Collect every string list found in the threat pattern definitions"""
+        indicators = []
+        for pattern in threat_patterns.values():
+            for value in pattern.values():
+                if isinstance(value, list):
+                    indicators.extend(item for item in value if isinstance(item, str))
+        return cls(indicators)
+
+    def match(self, text: str) -> FrozenSet[str]:
+        """All indicators contained in text (case-insensitive)"""
+        if self._regex is None or not text:
+            return frozenset()
+
+        found = self._regex.findall(text.lower())
+        if not found:
+            return frozenset()
+
+        matched = set()
+        for indicator in found:
+            matched |= self._prefixes[indicator]
+        return frozenset(matched)
+
+    def tag(self, texts: Iterable[str]) -> List[FrozenSet[str]]:
+        """Match a batch of texts, one tag set per text"""
+        match = self.match
+        return [match(text) for text in texts]
+
+    def _trie_pattern(self, words: List[str]) -> str:
+        trie: Dict = {}
+        for word in words:
+            node = trie
+            for char in word:
+                node = node.setdefault(char, {})
+            node[""] = {}
+
+        def build(node: Dict) -> str:
+            branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+            if not branches:
+                return ""
+            pattern = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+            # A word ends here but longer words continue: the rest is optional
+            # and greedy, so the longest indicator at each position wins
+            return f"(?:{pattern})?" if "" in node else pattern
+
+        return build(trie)
@@ -0,0 +1,97 @@
+import re
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from models.chat_models import QueryIntent
+
+# Ordered by priority: the first intent with a matching rule wins
+DEFAULT_INTENT_PATTERNS: Dict[QueryIntent, List[str]] = {
+    QueryIntent.SEARCH_LOGS: [
+        r"show.*logs?", r"find.*events?", r"search.*for", r"what.*happened",
+        r"suspicious.*activity", r"failed.*login", r"malware.*detection"
+    ],
+    QueryIntent.GENERATE_REPORT: [
+        r"generate.*report", r"create.*summary", r"show.*report",
+        r"summarize.*", r"give.*me.*overview"
+    ],
+    QueryIntent.GET_STATISTICS: [
+        r"how.*many", r"count.*", r"statistics.*", r"stats.*",
+        r"total.*number", r"frequency.*"
+    ],
+    QueryIntent.FILTER_RESULTS: [
+        r"filter.*", r"only.*show", r"exclude.*", r"remove.*",
+        r"just.*the.*ones", r"limit.*to"
+    ]
+}
+
+_LITERAL_PREFIX = re.compile(r"[\w ]+")
+_QUANTIFIERS = "?*{"
+
+
+class IntentRule(NamedTuple):
+    intent: QueryIntent
+    pattern: str
+    regex: "re.Pattern"
+    literals: Tuple[str, ...]
+
+
+class IntentMatch(NamedTuple):
+    intent: QueryIntent
+    confidence: float
+    rule: Optional[str]
+
+
+class IntentMatcher:
+    """Precompiled intent rules with a required-literal prefilter
+
+    Every rule is compiled once and guarded by the literal substrings it
+    cannot match without, so the common case is a handful of C-level
+    substring checks and at most one or two regex searches.
+    """
+
+    def __init__(
+        self,
+        intent_patterns: Dict[QueryIntent, List[str]] = None,
+        default_intent: QueryIntent = QueryIntent.SEARCH_LOGS,
+        match_confidence: float = 0.8,
+        default_confidence: float = 0.6
+    ):
+        self.default_intent = default_intent
+        self.match_confidence = match_confidence
+        self.default_confidence = default_confidence
+        self.rules = [
+            IntentRule(intent, pattern, re.compile(pattern), self._required_literals(pattern))
+            for intent, patterns in (intent_patterns or DEFAULT_INTENT_PATTERNS).items()
+            for pattern in patterns
+        ]
+
+    def match(self, text: str) -> IntentMatch:
+        """Resolve the intent of a query and report the rule that fired"""
+        text_lower = text.lower()
+
+        for rule in self.rules:
+            for literal in rule.literals:
+                if literal not in text_lower:
+                    break
+            else:
+                if rule.regex.search(text_lower):
+                    return IntentMatch(rule.intent, self.match_confidence, rule.pattern)
+
+        return IntentMatch(self.default_intent, self.default_confidence, None)
+
+    def _required_literals(self, pattern: str) -> Tuple[str, ...]:
+        """Literal prefixes of each ``.*``-separated segment of a rule"""
+        # Alternation or groups can make any prefix optional; skip the guard
+        if "|" in pattern or "(" in pattern:
+            return ()
+
+        literals = []
+        for segment in pattern.split(".*"):
+            match = _LITERAL_PREFIX.match(segment)
+            if not match:
+                continue
+            literal = match.group()
+            # A quantifier after the prefix makes its last character optional
+            if match.end() < len(segment) and segment[match.end()] in _QUANTIFIERS:
+                literal = literal[:-1]
+            if literal:
+                literals.append(literal)
+        return tuple(literals)
@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SPACY_MODEL_KEY = "spacy"
+INTENT_CLASSIFIER_KEY = "intent_classifier"
+
+class ModelRegistry:
+    """Process-wide registry that loads each heavyweight model at most once
+
+    Loading is lazy and thread-safe: the first caller of get() loads the
+    model while concurrent callers wait on the same per-model lock, and
+    later callers return the cached instance without locking.
+    """
+
+    def __init__(self):
+        self._loaders: Dict[str, Callable[[], Any]] = {}
+        self._models: Dict[str, Any] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._load_seconds: Dict[str, float] = {}
+        self._errors: Dict[str, str] = {}
+        self._loading: set = set()
+
+    def register(self, name: str, loader: Callable[[], Any]):
+        """Register a zero-argument loader for a model"""
+        self._loaders[name] = loader
+        self._locks[name] = threading.Lock()
+
+    def get(self, name: str) -> Any:
+        """Return the model, loading it on first use"""
+        model = self._models.get(name)
+        if model is not None:
+            return model
+
+        with self._locks[name]:
+            if name in self._models:
+                return self._models[name]
+
+            self._loading.add(name)
+            start = time.perf_counter()
+            try:
+                logger.info(f"Loading model '{name}'...")
+                model = self._loaders[name]()
+            except Exception as e:
+                self._errors[name] = str(e)
+                logger.error(f"Failed to load model '{name}': {e}")
+                raise
+            finally:
+                self._loading.discard(name)
+
+            self._load_seconds[name] = time.perf_counter() - start
+            self._errors.pop(name, None)
+            self._models[name] = model
+            logger.info(f"Model '{name}' loaded in {self._load_seconds[name]:.2f}s")
+            return model
+
+    async def get_async(self, name: str) -> Any:
+        """get() for coroutines: a load in progress is awaited on a worker thread, not the event loop"""
+        model = self._models.get(name)
+        if model is not None:
+            return model
+        return await asyncio.to_thread(self.get, name)
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._models
+
+    def warmup(self, names: Optional[List[str]] = None) -> threading.Thread:
+        """Load models on a background thread so startup is not blocked"""
+        names = names or list(self._loaders)
+
+        def _warm():
+            for name in names:
+                try:
+                    self.get(name)
+                except Exception:
+                    pass  # already logged; the next get() retries
+
+        thread = threading.Thread(target=_warm, name="model-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Load state of every registered model, without loading anything"""
+        status = {}
+        for name in self._loaders:
+            if name in self._models:
+                state = "loaded"
+            elif name in self._loading:
+                state = "loading"
+            elif name in self._errors:
+                state = "error"
+            else:
+                state = "not_loaded"
+
+            status[name] = {"state": state, "load_seconds": self._load_seconds.get(name)}
+            if name in self._errors:
+                status[name]["error"] = self._errors[name]
+        return status
+
+
+def _load_spacy_model():
+    import spacy
+
+    try:
+        return spacy.load(settings.SPACY_MODEL)
+    except OSError:
+        logger.warning(f"SpaCy model {settings.SPACY_MODEL} not found, downloading...")
+        spacy.cli.download(settings.SPACY_MODEL)
+        return spacy.load(settings.SPACY_MODEL)
+
+
+def _load_intent_classifier():
+    from transformers import pipeline
+
+    return pipeline(
+        "text-classification",
+        model=settings.NLP_MODEL_NAME,
+        return_all_scores=True
+    )
+
+
+model_registry = ModelRegistry()
+model_registry.register(SPACY_MODEL_KEY, _load_spacy_model)
+model_registry.register(INTENT_CLASSIFIER_KEY, _load_intent_classifier)
@@ -1,60 +1,57 @@
-import spacy
 import logging
-from transformers import AutoTokenizer, AutoModelForSequenceClassification, pipeline
-import torch
+import asyncio
 from typing import List, Dict, Any, Tuple, Optional
-import re
 from datetime import datetime, timedelta
 from models.chat_models import QueryIntent
 from models.siem_models import ExtractedEntity, EntityType
+from services.intent_matcher import IntentMatcher, IntentMatch, DEFAULT_INTENT_PATTERNS
+from services.entity_extractor import EntityExtractor, EntitySpan
+from services.model_registry import model_registry, SPACY_MODEL_KEY, INTENT_CLASSIFIER_KEY
 from core.config import settings
+from core.metrics import STAGE_DURATION, ERRORS
 
 logger = logging.getLogger(__name__)
 
+# Pipeline components whose output is never read by entity extraction
+UNUSED_SPACY_COMPONENTS = ("parser", "lemmatizer")
+
 class NLPService:
     def __init__(self):
-        self.nlp = None
-        self.intent_classifier = None
         self.tokenizer = None
         self.model = None
-        self.intent_patterns = {
-            QueryIntent.SEARCH_LOGS: [
-                r"show.*logs?", r"find.*events?", r"search.*for", r"what.*happened",
-                r"suspicious.*activity", r"failed.*login", r"malware.*detection"
-            ],
-            QueryIntent.GENERATE_REPORT: [
-                r"generate.*report", r"create.*summary", r"show.*report",
-                r"summarize.*", r"give.*me.*overview"
-            ],
-            QueryIntent.GET_STATISTICS: [
-                r"how.*many", r"count.*", r"statistics.*", r"stats.*",
-                r"total.*number", r"frequency.*"
-            ],
-            QueryIntent.FILTER_RESULTS: [
-                r"filter.*", r"only.*show", r"exclude.*", r"remove.*",
-                r"just.*the.*ones", r"limit.*to"
-            ]
-        }
+        self.intent_patterns = dict(DEFAULT_INTENT_PATTERNS)
+        self.intent_matcher = IntentMatcher(self.intent_patterns)
+        self.entity_extractor = EntityExtractor()
+        self._disabled_components: Optional[List[str]] = None
         
+    @property
+    def nlp(self):
+        """spaCy pipeline, loaded once per process on first use"""
+        return model_registry.get(SPACY_MODEL_KEY)
+
+    @property
+    def intent_classifier(self):
+        """HuggingFace classifier, loaded once per process on first use"""
+        return model_registry.get(INTENT_CLASSIFIER_KEY)
+
+    @property
+    def disabled_components(self) -> List[str]:
+        """Pipeline components skipped during entity extraction"""
+        if self._disabled_components is None:
+            self._disabled_components = [
+                name for name in UNUSED_SPACY_COMPONENTS if name in self.nlp.pipe_names
+            ]
+        return self._disabled_components
+
     async def initialize(self):
-        """Initialize NLP models and components"""
+        """Start loading NLP models, in the background unless configured otherwise"""
         try:
             logger.info("Initializing NLP service...")
             
-            # Load spaCy model
-            try:
-                self.nlp = spacy.load(settings.SPACY_MODEL)
-            except OSError:
-                logger.warning(f"SpaCy model {settings.SPACY_MODEL} not found, downloading...")
-                spacy.cli.download(settings.SPACY_MODEL)
-                self.nlp = spacy.load(settings.SPACY_MODEL)
-            
-            # Initialize intent classification
-            self.intent_classifier = pipeline(
-                "text-classification",
-                model=settings.NLP_MODEL_NAME,
-                return_all_scores=True
-            )
+            if settings.NLP_WARMUP_IN_BACKGROUND:
+                model_registry.warmup([SPACY_MODEL_KEY])
+            else:
+                await self.wait_until_ready()
             
             logger.info("NLP service initialized successfully")
             
@@ -62,6 +59,14 @@ class NLPService:
             logger.error(f"Failed to initialize NLP service: {e}")
             raise
 
+    async def wait_until_ready(self):
+        """Wait for the spaCy pipeline without blocking the event loop
+        
+        Async callers await this before process_query, which would otherwise
+        block the loop on the registry lock while a background warmup runs.
+        """
+        await model_registry.get_async(SPACY_MODEL_KEY)
+
     async def cleanup(self):
         """Cleanup NLP resources"""
         logger.info("Cleaning up NLP service...")
@@ -69,39 +74,34 @@ class NLPService:
 
     def extract_intent(self, text: str) -> Tuple[QueryIntent, float]:
         """Extract intent from user query"""
-        text_lower = text.lower()
-        
-        # Pattern-based intent detection
-        for intent, patterns in self.intent_patterns.items():
-            for pattern in patterns:
-                if re.search(pattern, text_lower):
-                    return intent, 0.8
-        
-        # Default intent
-        return QueryIntent.SEARCH_LOGS, 0.6
+        match = self.intent_matcher.match(text)
+        return match.intent, match.confidence
+
+    def match_intent(self, text: str) -> IntentMatch:
+        """Extract intent along with the pattern rule that fired"""
+        return self.intent_matcher.match(text)
 
     def extract_entities(self, text: str) -> List[ExtractedEntity]:
         """Extract relevant entities from text"""
+        return [entity.to_model() for entity in self._entity_spans(text)]
+
+    def _entity_spans(self, text: str) -> List[EntitySpan]:
+        """Entities as lightweight spans, for the query hot path"""
+        doc = self.nlp(text, disable=self.disabled_components)
+        return self._entities_from_doc(doc, text)
+
+    def _entities_from_doc(self, doc, text: str) -> List[EntitySpan]:
+        """Combine spaCy named entities with regex-based custom entities"""
         entities = []
-        doc = self.nlp(text)
         
         # Extract named entities
         for ent in doc.ents:
             entity_type = self._map_spacy_entity_type(ent.label_)
             if entity_type:
-                entities.append(ExtractedEntity(
-                    type=entity_type,
-                    value=ent.text,
-                    confidence=0.8,
-                    start_pos=ent.start_char,
-                    end_pos=ent.end_char
-                ))
-        
-        # Extract custom entities using regex patterns
-        custom_entities = self._extract_custom_entities(text)
-        entities.extend(custom_entities)
+                entities.append(EntitySpan(entity_type, ent.text, 0.8, ent.start_char, ent.end_char))
         
-        return entities
+        # Regex entities win where a named entity overlaps them
+        return self.entity_extractor.merge(entities, self._extract_custom_entities(text))
 
     def _map_spacy_entity_type(self, spacy_label: str) -> Optional[EntityType]:
         """Map spaCy entity labels to our custom entity types"""
@@ -114,105 +114,99 @@ class NLPService:
         }
         return mapping.get(spacy_label)
 
-    def _extract_custom_entities(self, text: str) -> List[ExtractedEntity]:
-        """Extract custom entities using regex patterns"""
-        entities = []
-        
-        # IP address pattern
-        ip_pattern = r'\b(?:[0-9]{1,3}\.){3}[0-9]{1,3}\b'
-        for match in re.finditer(ip_pattern, text):
-            entities.append(ExtractedEntity(
-                type=EntityType.IP_ADDRESS,
-                value=match.group(),
-                confidence=0.9,
-                start_pos=match.start(),
-                end_pos=match.end()
-            ))
-        
-        # Port pattern
-        port_pattern = r'\bport\s+(\d{1,5})\b'
-        for match in re.finditer(port_pattern, text, re.IGNORECASE):
-            entities.append(ExtractedEntity(
-                type=EntityType.PORT,
-                value=match.group(1),
-                confidence=0.8,
-                start_pos=match.start(1),
-                end_pos=match.end(1)
-            ))
-        
-        # File path pattern
-        path_pattern = r'[/\\][^\s]*[/\\][^\s]*'
-        for match in re.finditer(path_pattern, text):
-            entities.append(ExtractedEntity(
-                type=EntityType.FILE_PATH,
-                value=match.group(),
-                confidence=0.7,
-                start_pos=match.start(),
-                end_pos=match.end()
-            ))
-        
-        # Time range patterns
-        time_entities = self._extract_time_entities(text)
-        entities.extend(time_entities)
-        
-        return entities
-
-    def _extract_time_entities(self, text: str) -> List[ExtractedEntity]:
-        """Extract time-related entities"""
-        entities = []
-        
-        # Time keywords mapping
-        time_patterns = {
-            r'\b(yesterday|last\s+24\s+hours?)\b': -1,
-            r'\b(last\s+week|past\s+week)\b': -7,
-            r'\b(last\s+month|past\s+month)\b': -30,
-            r'\b(today|last\s+hour)\b': 0,
-        }
-        
-        for pattern, days_offset in time_patterns.items():
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
-                entities.append(ExtractedEntity(
-                    type=EntityType.TIME_RANGE,
-                    value=match.group(),
-                    confidence=0.8,
-                    start_pos=match.start(),
-                    end_pos=match.end()
-                ))
-        
-        return entities
+    def _extract_custom_entities(self, text: str) -> List[EntitySpan]:
+        """Extract custom entities (IPs, ports, file paths, time ranges) in one regex scan"""
+        return self.entity_extractor.extract(text)
 
     def process_query(self, query: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
         """Process a user query and extract structured information"""
         try:
             # Extract intent
-            intent, confidence = self.extract_intent(query)
+            with STAGE_DURATION.time(stage="nlp_intent"):
+                intent_match = self.match_intent(query)
             
             # Extract entities
-            entities = self.extract_entities(query)
+            with STAGE_DURATION.time(stage="nlp_entities"):
+                entities = self._entity_spans(query)
             
-            # Create structured output
-            result = {
-                "intent": intent,
-                "confidence": confidence,
-                "entities": [entity.dict() for entity in entities],
-                "original_query": query,
-                "processed": True
-            }
-            
-            # Add context if available
-            if context:
-                result["context"] = context
-            
-            return result
+            return self._build_result(query, intent_match, entities, context)
             
         except Exception as e:
+            ERRORS.inc(component="nlp")
             logger.error(f"Error processing query: {e}")
-            return {
-                "intent": QueryIntent.UNKNOWN,
-                "confidence": 0.0,
-                "entities": [],
-                "original_query": query,
-                "processed": False,
-                "error": str(e)
-            }
\ No newline at end of file
+            return self._build_error_result(query, e)
+
+    def process_queries_batch(
+        self,
+        queries: List[str],
+        context: Dict[str, Any] = None,
+        batch_size: Optional[int] = None,
+        n_process: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Process many queries at once, running spaCy through nlp.pipe
+        
+        Returns one result per query, in order, with the same shape as
+        process_query.
+        """
+        docs = self.nlp.pipe(
+            queries,
+            batch_size=batch_size or settings.NLP_BATCH_SIZE,
+            n_process=n_process or settings.NLP_N_PROCESS,
+            disable=self.disabled_components
+        )
+        
+        results = []
+        for query, doc in zip(queries, docs):
+            try:
+                intent_match = self.match_intent(query)
+                entities = self._entities_from_doc(doc, query)
+                results.append(self._build_result(query, intent_match, entities, context))
+            except Exception as e:
+                logger.error(f"Error processing query in batch: {e}")
+                results.append(self._build_error_result(query, e))
+        
+        return results
+
+    def _build_result(
+        self,
+        query: str,
+        intent_match: IntentMatch,
+        entities: List[EntitySpan],
+        context: Dict[str, Any] = None
+    ) -> Dict[str, Any]:
+        """Create structured output for a processed query"""
+        result = {
+            "intent": intent_match.intent,
+            "confidence": intent_match.confidence,
+            "intent_rule": intent_match.rule,
+            "entities": [entity.to_dict() for entity in entities],
+            "original_query": query,
+            "processed": True
+        }
+        
+        # Add context if available
+        if context:
+            result["context"] = context
+        
+        return result
+
+    def _build_error_result(self, query: str, error: Exception) -> Dict[str, Any]:
+        """Create the result returned when a query cannot be processed"""
+        return {
+            "intent": QueryIntent.UNKNOWN,
+            "confidence": 0.0,
+            "entities": [],
+            "original_query": query,
+            "processed": False,
+            "error": str(error)
+        }
+
+
+_shared_nlp_service: Optional[NLPService] = None
+
+def get_nlp_service() -> NLPService:
+    """Process-wide NLPService; models are shared through the registry"""
+    global _shared_nlp_service
+    if _shared_nlp_service is None:
+        _shared_nlp_service = NLPService()
+    return _shared_nlp_service
@@ -0,0 +1,326 @@
+import asyncio
+import inspect
+import json
+import logging
+import uuid
+from collections import defaultdict, deque
+from typing import Dict, Any, Awaitable, Callable, List, Optional, Tuple, Union
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[Dict[str, Any]], Union[None, Awaitable[None]]]
+
+
+class PubSub:
+    """Channel publish/subscribe shared by every API worker
+
+    Handlers receive the published message with an "origin" key naming the
+    publishing process, so a worker can skip mutations it already applied
+    locally. Backends differ only in how messages reach other processes.
+    """
+
+    def __init__(self):
+        self.origin = uuid.uuid4().hex
+        self._handlers: Dict[str, List[Handler]] = defaultdict(list)
+        self.published = 0
+        self.delivered = 0
+        self.handler_errors = 0
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def subscribe(self, channel: str, handler: Handler):
+        self._handlers[channel].append(handler)
+
+    async def unsubscribe(self, channel: str, handler: Handler):
+        handlers = self._handlers.get(channel)
+        if handlers and handler in handlers:
+            handlers.remove(handler)
+
+    async def publish(self, channel: str, message: Dict[str, Any]):
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": type(self).__name__,
+            "channels": len(self._handlers),
+            "published": self.published,
+            "delivered": self.delivered,
+            "handler_errors": self.handler_errors
+        }
+
+    async def _dispatch(self, channel: str, message: Dict[str, Any]):
+        for handler in list(self._handlers.get(channel, ())):
+            try:
+                result = handler(message)
+                if inspect.isawaitable(result):
+                    await result
+                self.delivered += 1
+            except Exception as e:
+                self.handler_errors += 1
+                logger.error(f"Pub/sub handler for {channel} failed: {e}")
+
+
+class InMemoryPubSub(PubSub):
+    """Delivers to every InMemoryPubSub in this process (tests, single worker)
+
+    Several instances stand in for several workers: each one's handlers
+    see what the others publish, exactly as with a real broker.
+    """
+
+    _instances: List["InMemoryPubSub"] = []
+
+    async def start(self):
+        if self not in InMemoryPubSub._instances:
+            InMemoryPubSub._instances.append(self)
+
+    async def close(self):
+        if self in InMemoryPubSub._instances:
+            InMemoryPubSub._instances.remove(self)
+
+    async def publish(self, channel: str, message: Dict[str, Any]):
+        await self.start()
+        self.published += 1
+        data = json.dumps({**message, "origin": self.origin}, default=str)
+        for instance in list(InMemoryPubSub._instances):
+            # A fresh copy per instance, as over the wire: workers never share state
+            await instance._dispatch(channel, json.loads(data))
+
+
+class PubSubBroker:
+    """Tiny fan-out broker speaking newline-delimited JSON over TCP
+
+    Clients send {"op": "sub", "channel", "epoch", "after"} and
+    {"op": "pub", "channel", "message"}; every publish is numbered and
+    relayed to the channel's subscribers as {"op": "msg", ...}. The last
+    replay_limit messages per channel are kept so a worker that connects
+    late, or reconnects, catches up on what it missed.
+    """
+
+    def __init__(self, replay_limit: int = None, max_client_buffer: int = 8 * 1024 * 1024):
+        self.replay_limit = replay_limit or settings.PUBSUB_REPLAY_LIMIT
+        self.max_client_buffer = max_client_buffer
+        self.epoch = uuid.uuid4().hex
+        self._seq = 0
+        self._history: Dict[str, deque] = defaultdict(lambda: deque(maxlen=self.replay_limit))
+        self._subscribers: Dict[str, set] = defaultdict(set)
+        self._clients: set = set()
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self, host: str, port: int):
+        self._server = await asyncio.start_server(self._handle_client, host, port)
+        logger.info(f"Pub/sub broker listening on {host}:{port}")
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            for task in list(self._clients):
+                task.cancel()
+            await asyncio.gather(*self._clients, return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        channels = set()
+        task = asyncio.current_task()
+        self._clients.add(task)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                frame = json.loads(line)
+
+                if frame["op"] == "sub":
+                    channel = frame["channel"]
+                    channels.add(channel)
+                    self._subscribers[channel].add(writer)
+                    # Same broker: only what the client has not seen; new broker: everything
+                    after = frame.get("after", 0) if frame.get("epoch") == self.epoch else 0
+                    for seq, data in self._history[channel]:
+                        if seq > after:
+                            writer.write(data)
+                    await writer.drain()
+
+                elif frame["op"] == "pub":
+                    self._seq += 1
+                    channel = frame["channel"]
+                    data = (json.dumps({
+                        "op": "msg",
+                        "channel": channel,
+                        "epoch": self.epoch,
+                        "seq": self._seq,
+                        "message": frame["message"]
+                    }, default=str) + "\n").encode()
+                    self._history[channel].append((self._seq, data))
+                    for subscriber in list(self._subscribers[channel]):
+                        if subscriber.transport.get_write_buffer_size() > self.max_client_buffer:
+                            # Stalled worker: drop it; it will reconnect and replay
+                            self._subscribers[channel].discard(subscriber)
+                            subscriber.close()
+                            continue
+                        subscriber.write(data)
+
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError, KeyError) as e:
+            logger.debug(f"Pub/sub client dropped: {e}")
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._clients.discard(task)
+            for channel in channels:
+                self._subscribers[channel].discard(writer)
+            writer.close()
+
+
+class SocketPubSub(PubSub):
+    """Pub/sub through a PubSubBroker on a local TCP port
+
+    With embed_broker every worker tries to host the broker; the first to
+    bind the port wins and the others connect to it. If the hosting worker
+    exits, the rest reconnect and one of them takes over. Messages
+    published while disconnected are buffered and sent on reconnect.
+    """
+
+    def __init__(self, host: str = None, port: int = None, embed_broker: bool = None, max_pending: int = 10000):
+        super().__init__()
+        self.host = host or settings.PUBSUB_HOST
+        self.port = port or settings.PUBSUB_PORT
+        self.embed_broker = settings.PUBSUB_EMBEDDED_BROKER if embed_broker is None else embed_broker
+        self.broker: Optional[PubSubBroker] = None
+
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._runner: Optional[asyncio.Task] = None
+        self._connected = asyncio.Event()
+        self._closing = False
+        self._pending: deque = deque(maxlen=max_pending)
+        # channel -> (broker epoch, last seq seen), for replay after reconnect
+        self._positions: Dict[str, Tuple[str, int]] = {}
+        self.reconnects = 0
+
+    async def start(self, timeout: float = 5.0):
+        if self._runner is None:
+            self._closing = False
+            self._runner = asyncio.create_task(self._run())
+        try:
+            await asyncio.wait_for(self._connected.wait(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Pub/sub broker {self.host}:{self.port} not reachable yet; publishing will be buffered")
+
+    async def close(self):
+        self._closing = True
+        if self._runner is not None:
+            self._runner.cancel()
+            await asyncio.gather(self._runner, return_exceptions=True)
+            self._runner = None
+        if self.broker is not None:
+            await self.broker.close()
+            self.broker = None
+
+    async def subscribe(self, channel: str, handler: Handler):
+        first = channel not in self._handlers
+        await super().subscribe(channel, handler)
+        if first and self._writer is not None:
+            self._send_frame(self._subscribe_frame(channel))
+
+    async def publish(self, channel: str, message: Dict[str, Any]):
+        self.published += 1
+        frame = {"op": "pub", "channel": channel, "message": {**message, "origin": self.origin}}
+        if self._writer is None:
+            self._pending.append(frame)
+            return
+        self._send_frame(frame)
+        await self._writer.drain()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **super().stats(),
+            "connected": self._connected.is_set(),
+            "hosting_broker": self.broker is not None,
+            "pending": len(self._pending),
+            "reconnects": self.reconnects
+        }
+
+    async def _run(self):
+        delay = 0.1
+        while not self._closing:
+            try:
+                await self._ensure_broker()
+                reader, writer = await asyncio.open_connection(self.host, self.port)
+                self._writer = writer
+                for channel in self._handlers:
+                    self._send_frame(self._subscribe_frame(channel))
+                while self._pending:
+                    self._send_frame(self._pending.popleft())
+                await writer.drain()
+                self._connected.set()
+                delay = 0.1
+
+                while True:
+                    line = await reader.readline()
+                    if not line:
+                        break
+                    frame = json.loads(line)
+                    self._positions[frame["channel"]] = (frame["epoch"], frame["seq"])
+                    await self._dispatch(frame["channel"], frame["message"])
+
+            except asyncio.CancelledError:
+                raise
+            except (OSError, ValueError, KeyError) as e:
+                logger.debug(f"Pub/sub connection error: {e}")
+            finally:
+                self._connected.clear()
+                if self._writer is not None:
+                    self._writer.close()
+                    self._writer = None
+
+            if not self._closing:
+                self.reconnects += 1
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 5.0)
+
+    async def _ensure_broker(self):
+        if not self.embed_broker or self.broker is not None:
+            return
+        broker = PubSubBroker()
+        try:
+            await broker.start(self.host, self.port)
+            self.broker = broker
+        except OSError:
+            # Another worker is hosting it
+            pass
+
+    def _subscribe_frame(self, channel: str) -> Dict[str, Any]:
+        epoch, seq = self._positions.get(channel, (None, 0))
+        return {"op": "sub", "channel": channel, "epoch": epoch, "after": seq}
+
+    def _send_frame(self, frame: Dict[str, Any]):
+        self._writer.write((json.dumps(frame, default=str) + "\n").encode())
+
+
+def create_pubsub(backend: str = None) -> PubSub:
+    """Backend named by PUBSUB_BACKEND: "memory" or "socket" """
+    backend = backend or settings.PUBSUB_BACKEND
+    if backend == "memory":
+        return InMemoryPubSub()
+    if backend == "socket":
+        return SocketPubSub()
+    raise ValueError(f"Unknown pub/sub backend: {backend}")
+
+
+# Process-wide pub/sub; started in the application lifespan
+pubsub = create_pubsub()
+
+
+if __name__ == "__main__":
+    # Standalone broker, for deployments that disable PUBSUB_EMBEDDED_BROKER
+    async def _serve():
+        broker = PubSubBroker()
+        await broker.start(settings.PUBSUB_HOST, settings.PUBSUB_PORT)
+        await asyncio.Event().wait()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_serve())
@@ -0,0 +1,173 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Any, Optional, Tuple
+from core.config import settings
+from core.metrics import CACHE_REQUESTS
+from models.siem_models import SIEMQuery, SIEMResponse
+
+logger = logging.getLogger(__name__)
+
+RANGE_BOUNDS = ("gte", "gt", "lte", "lt")
+
+class QueryResultCache:
+    """TTL + LRU cache of SIEM responses keyed on a canonical hash of the query"""
+
+    def __init__(
+        self,
+        max_entries: int = None,
+        max_bytes: int = None,
+        ttl_seconds: float = None,
+        time_bucket_seconds: int = None
+    ):
+        self.max_entries = max_entries or settings.QUERY_CACHE_MAX_ENTRIES
+        self.max_bytes = max_bytes or settings.QUERY_CACHE_MAX_BYTES
+        self.ttl_seconds = ttl_seconds or settings.QUERY_CACHE_TTL_SECONDS
+        self.time_bucket_seconds = time_bucket_seconds or settings.QUERY_CACHE_TIME_BUCKET_SECONDS
+
+        # key -> (response, expires_at, size_bytes)
+        self._entries: "OrderedDict[str, Tuple[SIEMResponse, float, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def make_key(self, siem_query: SIEMQuery) -> str:
+        """Hash the normalized DSL, index pattern and size"""
+        canonical = json.dumps(
+            {
+                "query": self._normalize(siem_query.query),
+                "index": siem_query.index_pattern,
+                "size": siem_query.size
+            },
+            sort_keys=True,
+            separators=(",", ":"),
+            default=str
+        )
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def get(self, siem_query: SIEMQuery) -> Optional[SIEMResponse]:
+        """Return a cached response, or None on miss/expiry"""
+        key = self.make_key(siem_query)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                CACHE_REQUESTS.inc(cache="query", result="miss")
+                return None
+
+            response, expires_at, size = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                CACHE_REQUESTS.inc(cache="query", result="expired")
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            CACHE_REQUESTS.inc(cache="query", result="hit")
+            return response
+
+    def put(self, siem_query: SIEMQuery, response: SIEMResponse):
+        """Store a response, evicting least recently used entries as needed"""
+        size = self._estimate_size(response)
+        if size > self.max_bytes:
+            return
+
+        key = self.make_key(siem_query)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            while self._entries and (
+                len(self._entries) >= self.max_entries
+                or self.current_bytes + size > self.max_bytes
+            ):
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+            self._entries[key] = (response, time.monotonic() + self.ttl_seconds, size)
+            self.current_bytes += size
+
+    def clear(self):
+        """Drop all cached entries"""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache counters for health/metrics reporting"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_ratio": self.hits / lookups if lookups else 0.0
+        }
+
+    def _remove(self, key: str):
+        _, _, size = self._entries.pop(key)
+        self.current_bytes -= size
+
+    def _normalize(self, node: Any) -> Any:
+        """Copy the DSL with absolute range bounds floored to the time bucket
+
+        QueryGenerator embeds datetime.now() (down to microseconds) in every
+        range filter, so without bucketing identical questions never collide.
+        """
+        if isinstance(node, dict):
+            normalized = {}
+            for key, value in node.items():
+                if key == "range" and isinstance(value, dict):
+                    normalized[key] = {
+                        field: self._normalize_bounds(bounds)
+                        for field, bounds in value.items()
+                    }
+                else:
+                    normalized[key] = self._normalize(value)
+            return normalized
+        if isinstance(node, list):
+            return [self._normalize(item) for item in node]
+        return node
+
+    def _normalize_bounds(self, bounds: Any) -> Any:
+        if not isinstance(bounds, dict):
+            return bounds
+
+        normalized = dict(bounds)
+        for bound in RANGE_BOUNDS:
+            value = normalized.get(bound)
+            if not isinstance(value, str):
+                continue
+            try:
+                timestamp = datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+            except ValueError:
+                continue  # date math such as "now-24h" is already stable
+            normalized[bound] = f"bucket:{int(timestamp) // self.time_bucket_seconds}"
+        return normalized
+
+    def _estimate_size(self, response: SIEMResponse) -> int:
+        """Cheap approximation of the memory held by a response"""
+        size = 256
+        for event in response.events:
+            size += 512 + len(event.description) + len(event.raw_log or "")
+        if response.aggregations:
+            size += len(json.dumps(response.aggregations, default=str))
+        return size
+
+
+# Process-wide cache shared by every SIEMConnector instance
+query_cache = QueryResultCache()
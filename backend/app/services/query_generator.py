@@ -5,6 +5,7 @@ import json
 from models.siem_models import SIEMQuery, EntityType
 from models.chat_models import QueryIntent
 from utils.query_templates import ELASTICSEARCH_TEMPLATES, KQL_TEMPLATES
+from core.metrics import ERRORS, timed
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +19,7 @@ class QueryGenerator:
             "default": "logs-*"
         }
     
+    @timed("query_generation")
     def generate_elasticsearch_query(
         self, 
         intent: QueryIntent,
@@ -110,6 +112,7 @@ class QueryGenerator:
             )
             
         except Exception as e:
+            ERRORS.inc(component="query_generation")
             logger.error(f"Error generating Elasticsearch query: {e}")
             # Return a basic query as fallback
             return SIEMQuery(
@@ -119,6 +122,100 @@ class QueryGenerator:
                 size=10
             )
     
+    def generate_aggregation_query(self, siem_query: SIEMQuery, intent: QueryIntent) -> Optional[SIEMQuery]:
+        """Aggregation-only companion of a hits query, or None if the intent needs none
+        
+        Reports show event type, source IP, severity and timeline breakdowns
+        that the hits query does not compute. Running them as a separate
+        size-0 query lets both execute in parallel, and the first page of
+        hits does not wait for the aggregations.
+        """
+        if intent != QueryIntent.GENERATE_REPORT or "aggs" in siem_query.query:
+            return None
+        
+        query_body = {
+            key: value for key, value in siem_query.query.items()
+            if key not in ("sort", "size", "from", "_source")
+        }
+        query_body["aggs"] = self._get_statistics_aggregations()
+        query_body["size"] = 0
+        
+        return SIEMQuery(
+            query_type=siem_query.query_type,
+            query=query_body,
+            index_pattern=siem_query.index_pattern,
+            time_range=siem_query.time_range,
+            size=0
+        )
+    
+    def generate_trends_query(
+        self,
+        start: datetime,
+        end: datetime,
+        sub_aggregations: Dict[str, Any] = None,
+        index_pattern: str = None,
+        calendar_interval: str = "1d"
+    ) -> SIEMQuery:
+        """Generate one date_histogram query that buckets [start, end) by interval
+
+        Each bucket carries severity and event type breakdowns plus any extra
+        sub-aggregations, so a multi-day trend costs a single round trip.
+        """
+        bucket_aggs = {
+            "severity": {
+                "terms": {
+                    "field": "event.severity.keyword",
+                    "size": 5
+                }
+            },
+            "event_types": {
+                "terms": {
+                    "field": "event.category.keyword",
+                    "size": 10
+                }
+            }
+        }
+        bucket_aggs.update(sub_aggregations or {})
+        
+        query_body = {
+            "query": {
+                "bool": {
+                    "must": self._get_security_filters(),
+                    "filter": [{
+                        "range": {
+                            "@timestamp": {
+                                "gte": start.isoformat(),
+                                "lt": end.isoformat()
+                            }
+                        }
+                    }]
+                }
+            },
+            "aggs": {
+                "per_interval": {
+                    "date_histogram": {
+                        "field": "@timestamp",
+                        "calendar_interval": calendar_interval,
+                        "min_doc_count": 0,
+                        "extended_bounds": {
+                            "min": start.isoformat(),
+                            "max": (end - timedelta(milliseconds=1)).isoformat()
+                        }
+                    },
+                    "aggs": bucket_aggs
+                }
+            },
+            "size": 0,
+            "track_total_hits": True
+        }
+        
+        return SIEMQuery(
+            query_type="elasticsearch_dsl",
+            query=query_body,
+            index_pattern=index_pattern or self.index_mappings["security_events"],
+            size=0
+        )
+    
     def generate_kql_query(
         self,
         intent: QueryIntent,
@@ -1,19 +1,22 @@
+import inspect
 import logging
-from typing import Dict, Any, List, Optional
-import json
-import pandas as pd
-import plotly.graph_objects as go
-import plotly.express as px
-from plotly.utils import PlotlyJSONEncoder
+from typing import Dict, Any, List, Optional, AsyncIterator, Awaitable, Union
+import time
+from datetime import datetime, timezone
 from models.siem_models import SIEMResponse, SecurityEvent
 from models.chat_models import QueryIntent
+from services.event_summary import EventSummary
+from services import chart_specs
+from core.metrics import ERRORS, timed
 
 logger = logging.getLogger(__name__)
 
 class ResponseFormatter:
     def __init__(self):
         self.max_events_display = 20
+        self.max_report_events = 1000
     
+    @timed("formatting")
     def format_response(
         self, 
         siem_response: SIEMResponse, 
@@ -37,6 +40,7 @@ class ResponseFormatter:
                 return self._format_generic_response(siem_response, query)
                 
         except Exception as e:
+            ERRORS.inc(component="formatting")
             logger.error(f"Error formatting response: {e}")
             return {
                 "response": f"I encountered an error while processing the results: {str(e)}",
@@ -86,7 +90,8 @@ class ResponseFormatter:
             "data": {
                 "total_hits": total_hits,
                 "events": [self._event_to_dict(event) for event in events],
-                "summary": self._create_events_summary(events)
+                "summary": EventSummary.from_events(events).as_dict(),
+                "downsampling": chart_specs.downsampling_info(visualization)
             },
             "visualization": visualization
         }
@@ -96,17 +101,104 @@ class ResponseFormatter:
         
         events = siem_response.events
         aggregations = siem_response.aggregations or {}
+        summary = EventSummary.from_events(events)
+        severity_data = dict(summary.severity_counts)
+        
+        report_text = self._render_report_text(
+            query,
+            siem_response.total_hits,
+            summary.time_range_summary(),
+            siem_response.execution_time,
+            aggregations,
+            severity_data
+        )
+        charts = self._create_report_charts(aggregations, severity_data)
+        
+        return {
+            "response": report_text,
+            "data": {
+                "events": [self._event_to_dict(event) for event in events],
+                "aggregations": aggregations,
+                "summary": summary.as_dict(aggregations, include_metrics=True),
+                "downsampling": chart_specs.downsampling_info(charts["visualization"], *charts["additional_charts"])
+            },
+            **charts
+        }
+    
+    async def format_report_stream(
+        self,
+        event_batches: AsyncIterator[List[SecurityEvent]],
+        query: str,
+        aggregations: Union[Dict[str, Any], Awaitable[Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        """Format a report from streamed event batches in bounded memory
+        
+        Only the first ``max_report_events`` events are kept for the response
+        payload; counts, severities and time bounds cover the whole stream.
+        ``aggregations`` may be awaitable (e.g. a task running the size-0
+        aggregation query); it is awaited only once the stream is consumed.
+        """
+        start = time.perf_counter()
+        
+        sample_events = []
+        summary = EventSummary()
+        
+        async for batch in event_batches:
+            summary.update(batch)
+            
+            room = self.max_report_events - len(sample_events)
+            if room > 0:
+                sample_events.extend(batch[:room])
+        
+        if inspect.isawaitable(aggregations):
+            aggregations = await aggregations
+        aggregations = aggregations or {}
+        
+        severity_counts = dict(summary.severity_counts)
+        report_text = self._render_report_text(
+            query,
+            summary.total,
+            summary.time_range_summary(),
+            time.perf_counter() - start,
+            aggregations,
+            severity_counts
+        )
+        charts = self._create_report_charts(aggregations, severity_counts)
+        
+        return {
+            "response": report_text,
+            "data": {
+                "total_hits": summary.total,
+                "events": [self._event_to_dict(event) for event in sample_events],
+                "events_truncated": summary.total > len(sample_events),
+                "aggregations": aggregations,
+                "summary": summary.as_dict(aggregations, include_metrics=True),
+                "downsampling": chart_specs.downsampling_info(charts["visualization"], *charts["additional_charts"])
+            },
+            **charts
+        }
+    
+    def _render_report_text(
+        self,
+        query: str,
+        total_hits: int,
+        time_range_summary: str,
+        execution_time: float,
+        aggregations: Dict[str, Any],
+        severity_data: Dict[str, int]
+    ) -> str:
+        """Render the markdown narrative shared by all report paths"""
         
         # Generate report narrative
         report_text = f"# Security Report\n\n"
         report_text += f"**Query:** {query}\n"
-        report_text += f"**Generated:** {pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+        report_text += f"**Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
         
         # Summary statistics
         report_text += f"## Summary\n\n"
-        report_text += f"- **Total Events:** {siem_response.total_hits}\n"
-        report_text += f"- **Time Range:** {self._get_time_range_summary(events)}\n"
-        report_text += f"- **Query Execution Time:** {siem_response.execution_time:.2f}s\n\n"
+        report_text += f"- **Total Events:** {total_hits}\n"
+        report_text += f"- **Time Range:** {time_range_summary}\n"
+        report_text += f"- **Query Execution Time:** {execution_time:.2f}s\n\n"
         
         # Event type breakdown
         if aggregations.get('event_types'):
@@ -123,13 +215,15 @@ class ResponseFormatter:
             report_text += "\n"
         
         # Severity analysis
-        severity_data = self._analyze_severity_distribution(events)
         if severity_data:
             report_text += f"## Severity Analysis\n\n"
             for severity, count in severity_data.items():
                 report_text += f"- **{severity.upper()}:** {count} events\n"
         
-        # Create visualizations
+        return report_text
+    
+    def _create_report_charts(self, aggregations: Dict[str, Any], severity_data: Dict[str, int]) -> Dict[str, Any]:
+        """Create the primary and additional report visualizations"""
         visualizations = []
         
         if aggregations.get('events_over_time'):
@@ -141,12 +235,6 @@ class ResponseFormatter:
             visualizations.append(viz)
         
         return {
-            "response": report_text,
-            "data": {
-                "events": [self._event_to_dict(event) for event in events],
-                "aggregations": aggregations,
-                "summary": self._create_comprehensive_summary(events, aggregations)
-            },
             "visualization": visualizations[0] if visualizations else None,
             "additional_charts": visualizations[1:] if len(visualizations) > 1 else []
         }
@@ -176,7 +264,7 @@ class ResponseFormatter:
                 response_text += f"- {bucket['key']}: {bucket['doc_count']} events\n"
         
         # Severity distribution
-        severity_stats = self._analyze_severity_distribution(events)
+        severity_stats = dict(EventSummary.from_events(events).severity_counts)
         if severity_stats:
             response_text += f"\n**Severity Distribution:**\n"
             for severity, count in severity_stats.items():
@@ -229,6 +317,10 @@ class ResponseFormatter:
             "visualization": None
         }
     
+    def format_events_page(self, events: List[SecurityEvent]) -> List[Dict[str, Any]]:
+        """First page of events, as shown before the full answer is formatted"""
+        return [self._event_to_dict(event) for event in events[:self.max_events_display]]
+    
     def _event_to_dict(self, event: SecurityEvent) -> Dict[str, Any]:
         """Convert SecurityEvent to dictionary"""
         return {
@@ -244,126 +336,30 @@ class ResponseFormatter:
             "metadata": event.metadata
         }
     
-    def _create_events_summary(self, events: List[SecurityEvent]) -> Dict[str, Any]:
-        """Create summary statistics for events"""
-        if not events:
-            return {}
-        
-        # Count by event type
-        event_types = {}
-        severity_counts = {}
-        source_ips = {}
-        
-        for event in events:
-            event_types[event.event_type] = event_types.get(event.event_type, 0) + 1
-            severity_counts[event.severity.value] = severity_counts.get(event.severity.value, 0) + 1
-            if event.source_ip:
-                source_ips[event.source_ip] = source_ips.get(event.source_ip, 0) + 1
-        
-        return {
-            "event_types": event_types,
-            "severity_counts": severity_counts,
-            "top_source_ips": dict(sorted(source_ips.items(), key=lambda x: x[1], reverse=True)[:10]),
-            "time_range": {
-                "start": min(event.timestamp for event in events).isoformat(),
-                "end": max(event.timestamp for event in events).isoformat()
-            }
-        }
-    
-    def _create_comprehensive_summary(self, events: List[SecurityEvent], aggregations: Dict[str, Any]) -> Dict[str, Any]:
-        """Create comprehensive summary for reports"""
-        summary = self._create_events_summary(events)
-        
-        # Add aggregation data
-        if aggregations:
-            summary["aggregations"] = aggregations
-        
-        # Calculate additional metrics
-        if events:
-            summary["metrics"] = {
-                "events_per_hour": len(events) / max(1, self._calculate_time_span_hours(events)),
-                "unique_source_ips": len(set(e.source_ip for e in events if e.source_ip)),
-                "unique_users": len(set(e.user for e in events if e.user)),
-                "high_severity_percentage": len([e for e in events if e.severity.value in ['high', 'critical']]) / len(events) * 100
-            }
-        
-        return summary
-    
-    def _analyze_severity_distribution(self, events: List[SecurityEvent]) -> Dict[str, int]:
-        """Analyze severity distribution of events"""
-        severity_counts = {}
-        for event in events:
-            severity = event.severity.value
-            severity_counts[severity] = severity_counts.get(severity, 0) + 1
-        return severity_counts
-    
-    def _get_time_range_summary(self, events: List[SecurityEvent]) -> str:
-        """Get human-readable time range summary"""
-        if not events:
-            return "No events"
-        
-        start_time = min(event.timestamp for event in events)
-        end_time = max(event.timestamp for event in events)
-        
-        return f"{start_time.strftime('%Y-%m-%d %H:%M')} to {end_time.strftime('%Y-%m-%d %H:%M')}"
-    
-    def _calculate_time_span_hours(self, events: List[SecurityEvent]) -> float:
-        """Calculate time span in hours"""
-        if len(events) < 2:
-            return 1.0
-        
-        start_time = min(event.timestamp for event in events)
-        end_time = max(event.timestamp for event in events)
-        
-        return max(1.0, (end_time - start_time).total_seconds() / 3600)
-    
+    @timed("chart_rendering")
     def _create_timeline_chart(self, events: List[SecurityEvent]) -> Optional[Dict[str, Any]]:
         """Create timeline visualization"""
         if not events:
             return None
         
         try:
-            # Prepare data for timeline
-            df_data = []
+            timestamps = []
+            event_types = []
+            severities = []
+            descriptions = []
             for event in events:
-                df_data.append({
-                    'timestamp': event.timestamp,
-                    'severity': event.severity.value,
-                    'event_type': event.event_type,
-                    'description': event.description[:50] + '...' if len(event.description) > 50 else event.description
-                })
+                timestamps.append(event.timestamp)
+                event_types.append(event.event_type)
+                severities.append(event.severity.value)
+                descriptions.append(event.description[:50] + '...' if len(event.description) > 50 else event.description)
             
-            df = pd.DataFrame(df_data)
-            
-            # Create scatter plot
-            fig = px.scatter(
-                df, 
-                x='timestamp', 
-                y='event_type',
-                color='severity',
-                hover_data=['description'],
-                title='Security Events Timeline',
-                color_discrete_map={
-                    'low': '#28a745',
-                    'medium': '#ffc107', 
-                    'high': '#fd7e14',
-                    'critical': '#dc3545'
-                }
-            )
-            
-            fig.update_layout(
-                xaxis_title="Time",
-                yaxis_title="Event Type",
-                showlegend=True,
-                height=400
-            )
-            
-            return json.loads(fig.to_json())
+            return chart_specs.timeline_chart(timestamps, event_types, severities, descriptions)
             
         except Exception as e:
             logger.error(f"Error creating timeline chart: {e}")
             return None
     
+    @timed("chart_rendering")
     def _create_time_series_chart(self, time_aggregation: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Create time series chart from aggregation data"""
         try:
@@ -371,75 +367,30 @@ class ResponseFormatter:
             if not buckets:
                 return None
             
-            timestamps = []
-            counts = []
-            
-            for bucket in buckets:
-                timestamps.append(pd.to_datetime(bucket['key_as_string']))
-                counts.append(bucket['doc_count'])
-            
-            fig = go.Figure()
-            fig.add_trace(go.Scatter(
-                x=timestamps,
-                y=counts,
-                mode='lines+markers',
-                name='Events',
-                line=dict(color='#007bff', width=2),
-                marker=dict(size=6)
-            ))
-            
-            fig.update_layout(
-                title='Events Over Time',
-                xaxis_title='Time',
-                yaxis_title='Number of Events',
-                showlegend=False,
-                height=400
-            )
+            # date_histogram keys are epoch milliseconds in UTC
+            timestamps = [datetime.fromtimestamp(bucket['key'] / 1000, tz=timezone.utc) for bucket in buckets]
+            counts = [bucket['doc_count'] for bucket in buckets]
             
-            return json.loads(fig.to_json())
+            return chart_specs.time_series_chart(timestamps, counts)
             
         except Exception as e:
             logger.error(f"Error creating time series chart: {e}")
             return None
     
+    @timed("chart_rendering")
     def _create_severity_chart(self, severity_data: Dict[str, int]) -> Optional[Dict[str, Any]]:
         """Create severity distribution chart"""
         try:
             if not severity_data:
                 return None
             
-            severities = list(severity_data.keys())
-            counts = list(severity_data.values())
-            
-            colors = {
-                'low': '#28a745',
-                'medium': '#ffc107',
-                'high': '#fd7e14', 
-                'critical': '#dc3545'
-            }
-            
-            fig = go.Figure(data=[
-                go.Bar(
-                    x=severities,
-                    y=counts,
-                    marker_color=[colors.get(s, '#6c757d') for s in severities]
-                )
-            ])
-            
-            fig.update_layout(
-                title='Events by Severity Level',
-                xaxis_title='Severity',
-                yaxis_title='Number of Events',
-                showlegend=False,
-                height=400
-            )
-            
-            return json.loads(fig.to_json())
+            return chart_specs.severity_bar_chart(severity_data)
             
         except Exception as e:
             logger.error(f"Error creating severity chart: {e}")
             return None
     
+    @timed("chart_rendering")
     def _create_pie_chart(self, aggregation_data: Dict[str, Any], title: str) -> Optional[Dict[str, Any]]:
         """Create pie chart from aggregation data"""
         try:
@@ -450,14 +401,7 @@ class ResponseFormatter:
             labels = [bucket['key'] for bucket in buckets]
             values = [bucket['doc_count'] for bucket in buckets]
             
-            fig = go.Figure(data=[go.Pie(labels=labels, values=values, hole=.3)])
-            fig.update_layout(
-                title=title,
-                showlegend=True,
-                height=400
-            )
-            
-            return json.loads(fig.to_json())
+            return chart_specs.pie_chart(labels, values, title)
             
         except Exception as e:
             logger.error(f"Error creating pie chart: {e}")
@@ -0,0 +1,78 @@
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Any, Iterable
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from database.connection import SessionLocal, engine
+from database.models import RiskRollup
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_FIELDS = ("events", "threats", "threat_counts", "severity", "risk_score")
+
+class RiskRollupStore:
+    """Materialized per-hour / per-day risk rollups in the local database
+
+    Only closed buckets are written; each one is computed once from the
+    SIEM and read back from here on every later dashboard request.
+    """
+
+    def __init__(self, session_factory=SessionLocal, bind=engine):
+        self.session_factory = session_factory
+        self.bind = bind
+        self._table_ready = False
+        self._lock = threading.Lock()
+
+    def load(self, scope: str, granularity: str, starts: Iterable[datetime]) -> Dict[datetime, Dict[str, Any]]:
+        """Stored rollups for the requested bucket starts (naive UTC)"""
+        starts = list(starts)
+        if not starts:
+            return {}
+
+        self._ensure_table()
+        with self.session_factory() as session:
+            rows = session.execute(
+                select(RiskRollup).where(
+                    RiskRollup.scope == scope,
+                    RiskRollup.granularity == granularity,
+                    RiskRollup.bucket_start >= min(starts),
+                    RiskRollup.bucket_start <= max(starts)
+                )
+            ).scalars()
+            wanted = set(starts)
+            return {
+                row.bucket_start: {field: getattr(row, field) for field in ROLLUP_FIELDS}
+                for row in rows if row.bucket_start in wanted
+            }
+
+    def save(self, scope: str, granularity: str, rollups: Dict[datetime, Dict[str, Any]]):
+        """Insert closed buckets; ones already stored by another worker are skipped"""
+        if not rollups:
+            return
+
+        self._ensure_table()
+        existing = self.load(scope, granularity, rollups)
+        with self.session_factory() as session:
+            for bucket_start, stats in rollups.items():
+                if bucket_start in existing:
+                    continue
+                session.add(RiskRollup(
+                    scope=scope,
+                    granularity=granularity,
+                    bucket_start=bucket_start,
+                    **{field: stats.get(field) for field in ROLLUP_FIELDS}
+                ))
+            try:
+                session.commit()
+            except IntegrityError:
+                # Another worker stored the same closed buckets first
+                session.rollback()
+
+    def _ensure_table(self):
+        if self._table_ready:
+            return
+        with self._lock:
+            if not self._table_ready:
+                RiskRollup.__table__.create(bind=self.bind, checkfirst=True)
+                self._table_ready = True
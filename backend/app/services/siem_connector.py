@@ -1,36 +1,283 @@
 import logging
-from typing import Dict, Any, List, Optional
+import asyncio
+import time
+from typing import Dict, Any, List, Optional, AsyncIterator
 from datetime import datetime, timedelta
 import json
-from models.siem_models import SIEMQuery, EntityType
+from urllib.parse import urlsplit
+import httpx
+from core.config import settings
+from core.metrics import STAGE_DURATION, ERRORS
+from models.siem_models import SIEMQuery, SIEMResponse, SecurityEvent, LogLevel, EntityType
 from models.chat_models import QueryIntent
+from services.query_cache import QueryResultCache, query_cache
 from utils.query_templates import ELASTICSEARCH_TEMPLATES, KQL_TEMPLATES
+from utils import ecs
 
 logger = logging.getLogger(__name__)
 
+class SIEMConnectorError(Exception):
+    """Raised when the SIEM backend cannot be reached or rejects a request"""
+
+
 class SIEMConnector:
-    def __init__(self):
+    """Async Elasticsearch execution engine backed by a pooled HTTP client"""
+
+    def __init__(
+        self,
+        hosts: Optional[List[str]] = None,
+        cache: Optional[QueryResultCache] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.hosts = hosts or self._parse_hosts(settings.ELASTICSEARCH_HOST)
+        self.cache = cache or (query_cache if settings.QUERY_CACHE_ENABLED else None)
+        # Custom transport (e.g. httpx.ASGITransport to a local stand-in server); None for the network
+        self.transport = transport
+        self.es_client: Optional[httpx.AsyncClient] = None
         self.connected = False
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._next_host = 0
+        self._client_lock = asyncio.Lock()
 
-    def connect(self):
-        """Establish a connection to the SIEM system."""
-        try:
-            # Simulate a successful connection (replace with actual connection logic)
+    async def initialize(self):
+        """Create the pooled HTTP client used for all SIEM requests"""
+        async with self._client_lock:
+            if self.es_client is not None:
+                return
+
+            limits = httpx.Limits(
+                max_connections=settings.ELASTICSEARCH_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.ELASTICSEARCH_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.ELASTICSEARCH_KEEPALIVE_EXPIRY
+            )
+            timeout = httpx.Timeout(
+                settings.ELASTICSEARCH_REQUEST_TIMEOUT,
+                connect=settings.ELASTICSEARCH_CONNECT_TIMEOUT
+            )
+            auth = None
+            if settings.ELASTICSEARCH_PASSWORD:
+                auth = (settings.ELASTICSEARCH_USERNAME, settings.ELASTICSEARCH_PASSWORD)
+
+            self.es_client = httpx.AsyncClient(
+                limits=limits,
+                timeout=timeout,
+                auth=auth,
+                verify=settings.ELASTICSEARCH_VERIFY_CERTS,
+                headers={"Content-Type": "application/json"},
+                transport=self.transport
+            )
+            self._host_semaphores = {
+                host: asyncio.Semaphore(settings.ELASTICSEARCH_MAX_CONCURRENCY_PER_HOST)
+                for host in self.hosts
+            }
             self.connected = True
-            logger.info("Successfully connected to SIEM system.")
-            return True
-        except Exception as e:
-            logger.error(f"Failed to connect to SIEM system: {e}")
+            logger.info(f"SIEM connector initialized for hosts: {', '.join(self.hosts)}")
+
+    async def cleanup(self):
+        """Close pooled connections"""
+        if self.es_client is not None:
+            await self.es_client.aclose()
+            self.es_client = None
+        self.connected = False
+        logger.info("SIEM connector closed")
+
+    async def ping(self) -> bool:
+        """Check whether any configured host is reachable"""
+        try:
+            response = await self._request("GET", "/")
+            return response.status_code == 200
+        except SIEMConnectorError:
             return False
 
-    def get_data(self):
-        """Fetch data from the SIEM system."""
-        if self.connected:
-            # Simulate fetching data (replace with actual data retrieval)
-            return {"status": "connected", "data": []}
-        else:
-            logger.error("SIEM system is not connected.")
-            return {"status": "not connected"}
+    async def execute_query(self, siem_query: SIEMQuery) -> SIEMResponse:
+        """Execute an Elasticsearch DSL query and convert hits to security events"""
+        if self.cache is not None:
+            cached = self.cache.get(siem_query)
+            if cached is not None:
+                return cached.model_copy(update={
+                    "query_metadata": {**(cached.query_metadata or {}), "cache_hit": True}
+                })
+
+        start_time = time.perf_counter()
+
+        body = dict(siem_query.query)
+        if "size" not in body:
+            body["size"] = siem_query.size
+        body.setdefault("track_total_hits", True)
+
+        with STAGE_DURATION.time(stage="siem_round_trip"):
+            response = await self._request(
+                "POST",
+                f"/{siem_query.index_pattern}/_search",
+                body=body
+            )
+            result = response.json()
+
+        hits = result.get("hits", {})
+        total = hits.get("total", 0)
+        total_hits = total.get("value", 0) if isinstance(total, dict) else int(total)
+
+        events = self._hits_to_events(hits.get("hits", []))
+
+        siem_response = SIEMResponse(
+            total_hits=total_hits,
+            events=events,
+            aggregations=result.get("aggregations"),
+            execution_time=time.perf_counter() - start_time,
+            query_metadata={
+                "index_pattern": siem_query.index_pattern,
+                "took_ms": result.get("took"),
+                "timed_out": result.get("timed_out", False)
+            }
+        )
+
+        # Partial results must not be served to later callers
+        if self.cache is not None and not siem_response.query_metadata["timed_out"]:
+            self.cache.put(siem_query, siem_response)
+
+        return siem_response
+
+    async def stream_query(
+        self,
+        siem_query: SIEMQuery,
+        batch_size: Optional[int] = None,
+        max_events: Optional[int] = None
+    ) -> AsyncIterator[List[SecurityEvent]]:
+        """Yield SecurityEvent batches using point-in-time + search_after pagination
+
+        Unlike execute_query this is not limited by index.max_result_window and
+        only holds one page of hits in memory at a time.
+        """
+        batch_size = batch_size or settings.ELASTICSEARCH_STREAM_BATCH_SIZE
+        keep_alive = settings.ELASTICSEARCH_PIT_KEEP_ALIVE
+
+        response = await self._request(
+            "POST",
+            f"/{siem_query.index_pattern}/_pit?keep_alive={keep_alive}"
+        )
+        pit_id = response.json()["id"]
+
+        # Aggregations, offsets and sizes belong to single-shot queries, not pages
+        body = {
+            key: value for key, value in siem_query.query.items()
+            if key not in ("aggs", "aggregations", "size", "from", "sort")
+        }
+        body["sort"] = list(siem_query.query.get("sort", [{"@timestamp": {"order": "desc"}}]))
+        body["sort"].append({"_shard_doc": "asc"})
+        body["track_total_hits"] = False
+
+        yielded = 0
+        try:
+            while max_events is None or yielded < max_events:
+                page_size = batch_size
+                if max_events is not None:
+                    page_size = min(batch_size, max_events - yielded)
+
+                body["size"] = page_size
+                body["pit"] = {"id": pit_id, "keep_alive": keep_alive}
+
+                response = await self._request("POST", "/_search", body=body)
+                result = response.json()
+                pit_id = result.get("pit_id", pit_id)
+
+                hits = result.get("hits", {}).get("hits", [])
+                if not hits:
+                    break
+
+                yielded += len(hits)
+                yield self._hits_to_events(hits)
+
+                if len(hits) < page_size:
+                    break
+                body["search_after"] = hits[-1]["sort"]
+        finally:
+            try:
+                await self._request("DELETE", "/_pit", body={"id": pit_id})
+            except SIEMConnectorError as e:
+                logger.warning(f"Failed to close point-in-time: {e}")
+
+    async def _request(self, method: str, path: str, body: Optional[Dict[str, Any]] = None) -> httpx.Response:
+        """Send a request, rotating across hosts and bounding per-host concurrency"""
+        if self.es_client is None:
+            await self.initialize()
+
+        last_error = None
+        for _ in range(len(self.hosts)):
+            host = self.hosts[self._next_host % len(self.hosts)]
+            self._next_host += 1
+
+            try:
+                async with self._host_semaphores[host]:
+                    response = await self.es_client.request(method, f"{host}{path}", json=body)
+            except httpx.TransportError as e:
+                logger.warning(f"SIEM host {host} unavailable: {e}")
+                last_error = e
+                continue
+
+            if response.status_code >= 400:
+                ERRORS.inc(component="siem")
+                raise SIEMConnectorError(
+                    f"SIEM request {method} {path} failed with status {response.status_code}: {response.text[:200]}"
+                )
+            return response
+
+        ERRORS.inc(component="siem")
+        raise SIEMConnectorError(f"All SIEM hosts unavailable: {last_error}")
+
+    def _hits_to_events(self, hits: List[Dict[str, Any]]) -> List[SecurityEvent]:
+        """Convert raw hits, skipping documents that cannot be mapped"""
+        events = []
+        for hit in hits:
+            try:
+                events.append(self._hit_to_event(hit))
+            except Exception as e:
+                logger.warning(f"Skipping unparseable hit {hit.get('_id')}: {e}")
+        return events
+
+    def _hit_to_event(self, hit: Dict[str, Any]) -> SecurityEvent:
+        """Map an ECS-shaped search hit to a SecurityEvent"""
+        source = hit.get("_source", {})
+
+        metadata = {"index": hit.get("_index")}
+        for field in ecs.METADATA_FIELDS:
+            value = ecs.get_field(source, field)
+            if value is not None:
+                metadata[field] = value
+
+        rule_id = ecs.get_field(source, "rule.id")
+
+        return SecurityEvent(
+            id=hit.get("_id", ""),
+            timestamp=ecs.parse_timestamp(ecs.get_field(source, "@timestamp")),
+            source_ip=ecs.get_field(source, "source.ip"),
+            destination_ip=ecs.get_field(source, "destination.ip"),
+            user=ecs.get_field(source, "user.name"),
+            event_type=ecs.event_type(source),
+            severity=ecs.map_severity(source),
+            description=ecs.description(source),
+            rule_id=str(rule_id) if rule_id is not None else None,
+            raw_log=ecs.get_field(source, "event.original"),
+            metadata=metadata
+        )
+
+    def _parse_hosts(self, host_setting: str) -> List[str]:
+        """Turn a comma-separated host setting into base URLs
+        
+        Bare hosts get the scheme from ELASTICSEARCH_USE_SSL and, if they
+        name no port, ELASTICSEARCH_PORT. Full URLs are used as given.
+        """
+        scheme = "https" if settings.ELASTICSEARCH_USE_SSL else "http"
+        hosts = []
+        for host in host_setting.split(","):
+            host = host.strip().rstrip("/")
+            if not host:
+                continue
+            if "://" not in host:
+                host = f"{scheme}://{host}"
+                if urlsplit(host).port is None:
+                    host = f"{host}:{settings.ELASTICSEARCH_PORT}"
+            hosts.append(host)
+        return hosts
 
 class QueryGenerator:
     def __init__(self):
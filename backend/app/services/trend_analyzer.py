@@ -0,0 +1,141 @@
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List, Optional, Tuple
+from core.config import settings
+from services.risk_rollup_store import RiskRollupStore
+
+logger = logging.getLogger(__name__)
+
+# granularity -> (date_histogram calendar_interval, bucket length)
+GRANULARITIES = {
+    "hour": ("1h", timedelta(hours=1)),
+    "day": ("1d", timedelta(days=1))
+}
+
+class TrendAnalyzer:
+    """Hourly / daily event and risk rollups from a single date_histogram query
+
+    Settled buckets never change: they are computed once, materialized in
+    the rollup store and kept in memory, so a dashboard request only asks
+    the SIEM for buckets it has never seen plus the recent ones. A bucket
+    settles ingest_lag after it ends; until then late-arriving events can
+    still change it, so it is recomputed on every request.
+    """
+
+    def __init__(
+        self,
+        siem_connector,
+        query_generator,
+        ai_service,
+        store: Optional[RiskRollupStore] = None,
+        max_cached_buckets: int = 20000,
+        ingest_lag: timedelta = None
+    ):
+        self.siem_connector = siem_connector
+        self.query_generator = query_generator
+        self.ai_service = ai_service
+        self.store = store or RiskRollupStore()
+        self.max_cached_buckets = max_cached_buckets
+        self.ingest_lag = ingest_lag if ingest_lag is not None else timedelta(seconds=settings.TRENDS_INGEST_LAG_SECONDS)
+
+        # (index_pattern, granularity, bucket start in naive UTC) -> stats, least recently used first
+        self._closed_buckets: "OrderedDict[Tuple[str, str, datetime], Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.queries = 0
+
+    async def daily_stats(self, days: int, index_pattern: str = None) -> List[Dict[str, Any]]:
+        """Stats for the last `days` UTC days, oldest first, today included"""
+        rollups = await self.rollups("day", days, index_pattern)
+        return [{"date": rollup.pop("start")[:10], **rollup} for rollup in rollups]
+
+    async def rollups(self, granularity: str, count: int, index_pattern: str = None) -> List[Dict[str, Any]]:
+        """The last `count` buckets of a granularity, oldest first, open bucket included"""
+        if not self.ai_service.threat_patterns:
+            await self.ai_service.initialize()
+
+        index_pattern = index_pattern or self.query_generator.index_mappings["security_events"]
+        step = GRANULARITIES[granularity][1]
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        open_start = self._bucket_start(now, granularity)
+        wanted = [open_start - step * offset for offset in range(count - 1, -1, -1)]
+        # Buckets that ended at least ingest_lag ago; later ones may still receive events
+        settled = {start for start in wanted if start + step <= now - self.ingest_lag}
+
+        stats = {start: self._cached(index_pattern, granularity, start) if start in settled else None for start in wanted}
+
+        # Settled buckets a previous process already materialized
+        unknown = [start for start in wanted if start in settled and stats[start] is None]
+        if unknown:
+            stored = await asyncio.to_thread(self.store.load, index_pattern, granularity, unknown)
+            for start, bucket_stats in stored.items():
+                stats[start] = bucket_stats
+                self._remember(index_pattern, granularity, start, bucket_stats)
+
+        # Unsettled buckets (always including the open one) have no stats yet, so they are refetched
+        missing = [start for start, bucket_stats in stats.items() if bucket_stats is None]
+
+        fetched = await self._fetch_buckets(granularity, missing[0], open_start + step, index_pattern)
+        closed = {}
+        for start in missing:
+            stats[start] = fetched.get(start) or self._empty_bucket()
+            if start in settled:
+                closed[start] = stats[start]
+                self._remember(index_pattern, granularity, start, stats[start])
+
+        if closed:
+            await asyncio.to_thread(self.store.save, index_pattern, granularity, closed)
+
+        return [{"start": start.isoformat(), **stats[start]} for start in wanted]
+
+    async def _fetch_buckets(
+        self,
+        granularity: str,
+        start: datetime,
+        end: datetime,
+        index_pattern: str
+    ) -> Dict[datetime, Dict[str, Any]]:
+        """One aggregation round trip covering [start, end)"""
+        siem_query = self.query_generator.generate_trends_query(
+            start.replace(tzinfo=timezone.utc),
+            end.replace(tzinfo=timezone.utc),
+            sub_aggregations=self.ai_service.trend_aggregations(),
+            index_pattern=index_pattern,
+            calendar_interval=GRANULARITIES[granularity][0]
+        )
+        self.queries += 1
+        response = await self.siem_connector.execute_query(siem_query)
+
+        buckets = (response.aggregations or {}).get("per_interval", {}).get("buckets", [])
+        fetched = {}
+        for bucket in buckets:
+            bucket_start = datetime.fromtimestamp(bucket["key"] / 1000, tz=timezone.utc).replace(tzinfo=None)
+            fetched[bucket_start] = self.ai_service.assess_bucket(bucket)
+        return fetched
+
+    def _bucket_start(self, moment: datetime, granularity: str) -> datetime:
+        moment = moment.replace(minute=0, second=0, microsecond=0)
+        if granularity == "day":
+            moment = moment.replace(hour=0)
+        return moment
+
+    def _cached(self, index_pattern: str, granularity: str, start: datetime) -> Optional[Dict[str, Any]]:
+        key = (index_pattern, granularity, start)
+        with self._lock:
+            bucket_stats = self._closed_buckets.get(key)
+            if bucket_stats is not None:
+                self._closed_buckets.move_to_end(key)
+            return bucket_stats
+
+    def _remember(self, index_pattern: str, granularity: str, start: datetime, bucket_stats: Dict[str, Any]):
+        key = (index_pattern, granularity, start)
+        with self._lock:
+            self._closed_buckets[key] = bucket_stats
+            self._closed_buckets.move_to_end(key)
+            while len(self._closed_buckets) > self.max_cached_buckets:
+                self._closed_buckets.popitem(last=False)
+
+    def _empty_bucket(self) -> Dict[str, Any]:
+        return {"events": 0, "risk_score": 0, "threats": 0, "threat_counts": {}, "severity": {}}
@@ -0,0 +1,89 @@
+"""Helpers for reading Elastic Common Schema (ECS) documents"""
+from typing import Dict, Any, Tuple
+from datetime import datetime, timezone
+from functools import lru_cache
+from models.siem_models import LogLevel
+
+SEVERITY_NAMES = {level.value for level in LogLevel}
+
+# Optional fields copied into SecurityEvent.metadata alongside the index name
+METADATA_FIELDS = ("host.name", "event.action", "event.outcome", "rule.name")
+
+def get_field(source: Dict[str, Any], path: str) -> Any:
+    """Read a dotted ECS field from either nested or flattened documents"""
+    if path in source:
+        return source[path]
+
+    value = source
+    for part in _split_path(path):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+@lru_cache(maxsize=256)
+def _split_path(path: str) -> Tuple[str, ...]:
+    return tuple(path.split("."))
+
+def parse_timestamp(value: Any) -> datetime:
+    """Parse an ES timestamp (ISO string or epoch millis) as an aware UTC datetime
+    
+    Always aware, so events parsed from different formats can be compared.
+    """
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value / 1000, tz=timezone.utc)
+    if isinstance(value, str):
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        # Elasticsearch stores dates in UTC, so an offset-less string is UTC too
+        return parsed if parsed.tzinfo is not None else parsed.replace(tzinfo=timezone.utc)
+    return datetime.now(timezone.utc)
+
+def event_type(source: Dict[str, Any]) -> str:
+    """First event.category, falling back to event.action"""
+    category = get_field(source, "event.category")
+    if isinstance(category, list):
+        category = category[0] if category else None
+    return str(category or get_field(source, "event.action") or "unknown")
+
+def description(source: Dict[str, Any]) -> str:
+    """Human readable message for the event"""
+    return str(
+        get_field(source, "message")
+        or get_field(source, "rule.description")
+        or get_field(source, "event.action")
+        or ""
+    )
+
+def map_severity(source: Dict[str, Any]) -> LogLevel:
+    """Derive a LogLevel from ECS severity, risk score or Wazuh rule level"""
+    return LogLevel(severity_name(source))
+
+def severity_name(source: Dict[str, Any]) -> str:
+    """Same as map_severity but returns the plain value, skipping Enum construction"""
+    severity = get_field(source, "event.severity")
+    if isinstance(severity, str):
+        severity = severity.lower()
+        if severity in SEVERITY_NAMES:
+            return severity
+
+    risk_score = get_field(source, "event.risk_score")
+    if isinstance(risk_score, (int, float)):
+        if risk_score >= 74:
+            return "critical"
+        if risk_score >= 48:
+            return "high"
+        if risk_score >= 22:
+            return "medium"
+        return "low"
+
+    rule_level = get_field(source, "rule.level")
+    if isinstance(rule_level, (int, float)):
+        if rule_level >= 12:
+            return "critical"
+        if rule_level >= 8:
+            return "high"
+        if rule_level >= 5:
+            return "medium"
+        return "low"
+
+    return "medium"
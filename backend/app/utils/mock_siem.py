@@ -0,0 +1,823 @@
+"""In-process mock of the Elasticsearch search API, backed by synthetic ECS data
+
+Serves _search, _msearch, _count and point-in-time requests with the query
+clauses and aggregations this application generates, so the whole FastAPI
+stack can be load-tested offline. Point ELASTICSEARCH_HOST at it:
+
+    python -m utils.mock_siem --events 1000000 --port 9200      (from backend/app)
+"""
+import asyncio
+import bisect
+import fnmatch
+import heapq
+import json
+import re
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Callable, Iterable, List, Optional, Tuple
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from utils.synthetic_data import SyntheticEventGenerator
+
+# Analyzed fields: match/match_phrase search words inside them, every other field matches whole values
+TEXT_FIELDS = {"message", "rule.description", "rule.name", "event.original", "process.args"}
+
+DEFAULT_TOTAL_HITS_LIMIT = 10000
+
+CALENDAR_INTERVALS = {
+    "minute": "1m", "1m": "1m", "hour": "1h", "1h": "1h", "day": "1d", "1d": "1d",
+    "week": "1w", "1w": "1w", "month": "1M", "1M": "1M", "quarter": "1q", "1q": "1q", "year": "1y", "1y": "1y"
+}
+UNIT_MILLIS = {"ms": 1, "s": 1000, "m": 60_000, "h": 3_600_000, "d": 86_400_000, "w": 604_800_000}
+
+DATE_MATH = re.compile(r"^now(?P<ops>(?:[+-]\d+[smhdwMy])*)(?:/(?P<round>[smhdwMy]))?$")
+HOUR_SCRIPT = re.compile(r"params\.(\w+)\.contains\(doc\['([^']+)'\]\.value\.getHour\(\)\)")
+
+
+class MockSIEMError(Exception):
+    """A request the mock rejects, reported in Elasticsearch's error shape"""
+
+    def __init__(self, status: int, error_type: str, reason: str):
+        super().__init__(reason)
+        self.status = status
+        self.error_type = error_type
+        self.reason = reason
+
+    def body(self) -> Dict[str, Any]:
+        return {
+            "error": {"root_cause": [{"type": self.error_type, "reason": self.reason}], "type": self.error_type, "reason": self.reason},
+            "status": self.status
+        }
+
+
+class _Doc:
+    __slots__ = ("position", "index", "id", "timestamp", "fields")
+
+    def __init__(self, position: int, index: str, doc_id: str, timestamp: int, fields: Dict[str, Any]):
+        self.position = position
+        self.index = index
+        self.id = doc_id
+        self.timestamp = timestamp
+        self.fields = fields
+
+
+class MockSIEMStore:
+    """Documents held flattened and sorted by @timestamp
+
+    Time-range filters (present in nearly every generated query) become a
+    bisect over the sorted timestamps; the remaining clauses are compiled
+    once per request into a predicate run over that slice.
+    """
+
+    def __init__(self, hits: Iterable[Dict[str, Any]]):
+        docs = []
+        for hit in hits:
+            fields = flatten(hit["_source"])
+            docs.append((to_millis(fields.get("@timestamp")), hit["_index"], hit["_id"], fields))
+        docs.sort(key=lambda doc: doc[0])
+
+        self.docs = [_Doc(position, index, doc_id, timestamp, fields) for position, (timestamp, index, doc_id, fields) in enumerate(docs)]
+        self.timestamps = [doc.timestamp for doc in self.docs]
+        self.indices = sorted({doc.index for doc in self.docs})
+        self.pits: Dict[str, List[str]] = {}
+        # pit id -> (query and sort, matching docs in sort order, their sort keys)
+        self._pit_results: Dict[str, Tuple[str, List[_Doc], List[tuple]]] = {}
+        self.searches = 0
+
+    @classmethod
+    def from_generator(cls, count: int, seed: int = 42, **options) -> "MockSIEMStore":
+        return cls(SyntheticEventGenerator(seed=seed, **options).hits(count))
+
+    def resolve(self, index_expression: Optional[str]) -> List[str]:
+        """Concrete indices for a comma-separated expression; logs-* also reaches every index"""
+        if not index_expression or index_expression in ("_all", "*"):
+            return list(self.indices)
+        patterns = [pattern.strip() for pattern in index_expression.split(",") if pattern.strip()]
+        return [
+            index for index in self.indices
+            if any(fnmatch.fnmatchcase(index, pattern) or fnmatch.fnmatchcase(f"logs-{index}", pattern) for pattern in patterns)
+        ]
+
+    def search(self, index_expression: Optional[str], body: Dict[str, Any]) -> Dict[str, Any]:
+        started = time.perf_counter()
+        self.searches += 1
+        body = body or {}
+
+        pit_id = None
+        if "pit" in body:
+            pit_id = body["pit"].get("id")
+            if pit_id not in self.pits:
+                raise MockSIEMError(404, "search_context_missing_exception", f"No search context found for id [{pit_id}]")
+            indices = self.pits[pit_id]
+        else:
+            indices = self.resolve(index_expression)
+
+        sort_fields = parse_sort(body.get("sort"))
+        size = int(body.get("size", 10))
+        offset = int(body.get("from", 0))
+
+        if pit_id is not None:
+            # Paging through a point in time: match and sort once, then slice
+            matched, keys = self._pit_snapshot(pit_id, indices, body.get("query"), sort_fields)
+            first = bisect.bisect_right(keys, sort_key_of(body["search_after"], sort_fields)) if "search_after" in body else 0
+            page = matched[first + offset:first + offset + size]
+        else:
+            matched = self._matching(indices, body.get("query"))
+            page = matched
+            if "search_after" in body:
+                after = sort_key_of(body["search_after"], sort_fields)
+                page = [doc for doc in page if doc_sort_key(doc, sort_fields) > after]
+            if size + offset < len(page):
+                page = heapq.nsmallest(size + offset, page, key=lambda doc: doc_sort_key(doc, sort_fields))
+            else:
+                page = sorted(page, key=lambda doc: doc_sort_key(doc, sort_fields))
+            page = page[offset:offset + size]
+
+        hits: Dict[str, Any] = {
+            "max_score": None,
+            "hits": [
+                {
+                    "_index": doc.index,
+                    "_id": doc.id,
+                    "_score": None,
+                    "_source": unflatten(doc.fields),
+                    "sort": [sort_value(doc, field) for field, _ in sort_fields]
+                }
+                for doc in page
+            ]
+        }
+        total = self._total(len(matched), body.get("track_total_hits", DEFAULT_TOTAL_HITS_LIMIT))
+        if total is not None:
+            hits["total"] = total
+
+        response = {
+            "took": int((time.perf_counter() - started) * 1000),
+            "timed_out": False,
+            "_shards": {"total": len(indices), "successful": len(indices), "skipped": 0, "failed": 0},
+            "hits": hits
+        }
+        aggregations = body.get("aggs") or body.get("aggregations")
+        if aggregations:
+            response["aggregations"] = run_aggregations(aggregations, matched)
+        if pit_id is not None:
+            response["pit_id"] = pit_id
+        return response
+
+    def msearch(self, index_expression: Optional[str], payload: str) -> Dict[str, Any]:
+        """NDJSON header/body pairs; each failing search reports its own error"""
+        started = time.perf_counter()
+        lines = [line for line in payload.splitlines() if line.strip()]
+        if len(lines) % 2:
+            raise MockSIEMError(400, "illegal_argument_exception", "msearch body must be header/body line pairs")
+
+        responses = []
+        for header_line, body_line in zip(lines[::2], lines[1::2]):
+            try:
+                header = json.loads(header_line)
+                index = header.get("index", index_expression)
+                if isinstance(index, list):
+                    index = ",".join(index)
+                result = self.search(index, json.loads(body_line))
+                result["status"] = 200
+                responses.append(result)
+            except MockSIEMError as e:
+                responses.append(e.body())
+            except ValueError as e:
+                responses.append(MockSIEMError(400, "parsing_exception", str(e)).body())
+        return {"took": int((time.perf_counter() - started) * 1000), "responses": responses}
+
+    def count(self, index_expression: Optional[str], body: Dict[str, Any]) -> Dict[str, Any]:
+        indices = self.resolve(index_expression)
+        return {"count": len(self._matching(indices, (body or {}).get("query")))}
+
+    def open_pit(self, index_expression: Optional[str]) -> Dict[str, Any]:
+        pit_id = uuid.uuid4().hex
+        self.pits[pit_id] = self.resolve(index_expression)
+        return {"id": pit_id}
+
+    def close_pit(self, pit_id: str) -> Dict[str, Any]:
+        self._pit_results.pop(pit_id, None)
+        freed = 1 if self.pits.pop(pit_id, None) is not None else 0
+        return {"succeeded": True, "num_freed": freed}
+
+    def _pit_snapshot(
+        self, pit_id: str, indices: List[str], query: Optional[Dict[str, Any]], sort_fields: List[Tuple[str, str]]
+    ) -> Tuple[List[_Doc], List[tuple]]:
+        request = json.dumps([query, sort_fields], sort_keys=True, default=str)
+        cached = self._pit_results.get(pit_id)
+        if cached is None or cached[0] != request:
+            keyed = sorted(((doc_sort_key(doc, sort_fields), doc) for doc in self._matching(indices, query)), key=lambda item: item[0])
+            cached = (request, [doc for _, doc in keyed], [key for key, _ in keyed])
+            self._pit_results[pit_id] = cached
+        return cached[1], cached[2]
+
+    def _matching(self, indices: List[str], query: Optional[Dict[str, Any]]) -> List[_Doc]:
+        low, high = time_bounds(query)
+        start = bisect.bisect_left(self.timestamps, low) if low is not None else 0
+        end = bisect.bisect_right(self.timestamps, high) if high is not None else len(self.docs)
+
+        predicate = compile_query(query or {"match_all": {}})
+        wanted = set(indices)
+        everything = wanted.issuperset(self.indices)
+        return [
+            doc for doc in self.docs[start:end]
+            if (everything or doc.index in wanted) and predicate(doc)
+        ]
+
+    def _total(self, matched: int, track_total_hits) -> Optional[Dict[str, Any]]:
+        if track_total_hits is False:
+            return None
+        if track_total_hits is True:
+            return {"value": matched, "relation": "eq"}
+        limit = int(track_total_hits)
+        if matched > limit:
+            return {"value": limit, "relation": "gte"}
+        return {"value": matched, "relation": "eq"}
+
+
+# Documents
+
+def flatten(source: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+    """Nested _source to {"dotted.path": value}"""
+    fields = {}
+    for key, value in source.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            fields.update(flatten(value, f"{path}."))
+        else:
+            fields[path] = value
+    return fields
+
+
+def unflatten(fields: Dict[str, Any]) -> Dict[str, Any]:
+    source: Dict[str, Any] = {}
+    for path, value in fields.items():
+        node = source
+        *parents, leaf = path.split(".")
+        for part in parents:
+            node = node.setdefault(part, {})
+        node[leaf] = value
+    return source
+
+
+def field_values(doc: _Doc, field: str) -> List[Any]:
+    """Every value of a field (keyword sub-fields read the field itself)"""
+    if field.endswith(".keyword"):
+        field = field[:-len(".keyword")]
+    if field == "@timestamp":
+        return [doc.timestamp]
+    if field == "_index":
+        return [doc.index]
+    if field == "_id":
+        return [doc.id]
+    value = doc.fields.get(field)
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def to_millis(value: Any, now: Optional[datetime] = None) -> Optional[int]:
+    """Epoch millis from an ISO string, epoch number or date math ("now-24h/d")"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    value = str(value).strip()
+    if value.lstrip("-").isdigit():
+        return int(value)
+
+    match = DATE_MATH.match(value)
+    if match:
+        moment = now or datetime.now(timezone.utc)
+        for sign, amount, unit in re.findall(r"([+-])(\d+)([smhdwMy])", match.group("ops")):
+            amount = int(amount) * (1 if sign == "+" else -1)
+            if unit in "My":
+                months = amount * (12 if unit == "y" else 1)
+                year, month = divmod(moment.month - 1 + months, 12)
+                moment = moment.replace(year=moment.year + year, month=month + 1, day=min(moment.day, 28))
+            else:
+                moment += timedelta(milliseconds=amount * UNIT_MILLIS[unit])
+        if match.group("round"):
+            moment = floor_datetime(moment, match.group("round"))
+        return int(moment.timestamp() * 1000)
+
+    try:
+        moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise MockSIEMError(400, "parse_exception", f"failed to parse date field [{value}]")
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp() * 1000)
+
+
+def floor_datetime(moment: datetime, unit: str) -> datetime:
+    if unit == "y":
+        return moment.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
+    if unit in ("M", "q"):
+        month = moment.month if unit == "M" else (moment.month - 1) // 3 * 3 + 1
+        return moment.replace(month=month, day=1, hour=0, minute=0, second=0, microsecond=0)
+    if unit == "w":
+        return (moment - timedelta(days=moment.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
+    if unit == "d":
+        return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if unit == "h":
+        return moment.replace(minute=0, second=0, microsecond=0)
+    if unit == "m":
+        return moment.replace(second=0, microsecond=0)
+    return moment.replace(microsecond=0)
+
+
+# Queries
+
+Predicate = Callable[[_Doc], bool]
+
+
+def compile_query(query: Dict[str, Any]) -> Predicate:
+    if not isinstance(query, dict) or len(query) != 1:
+        raise MockSIEMError(400, "parsing_exception", f"query malformed, expected a single clause: {query}")
+    (kind, spec), = query.items()
+    compiler = QUERY_COMPILERS.get(kind)
+    if compiler is None:
+        raise MockSIEMError(400, "parsing_exception", f"unknown query [{kind}]")
+    return compiler(spec)
+
+
+def _as_list(value: Any) -> List[Any]:
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def _field_spec(spec: Dict[str, Any], value_key: str) -> Tuple[str, Any]:
+    (field, value), = spec.items()
+    if isinstance(value, dict):
+        value = value.get(value_key)
+    return field, value
+
+
+def _compile_bool(spec: Dict[str, Any]) -> Predicate:
+    must = [compile_query(clause) for clause in _as_list(spec.get("must")) + _as_list(spec.get("filter"))]
+    must_not = [compile_query(clause) for clause in _as_list(spec.get("must_not"))]
+    should = [compile_query(clause) for clause in _as_list(spec.get("should"))]
+    minimum = spec.get("minimum_should_match")
+    if minimum is None:
+        minimum = 0 if must else 1
+    minimum = min(int(minimum), len(should))
+
+    def predicate(doc: _Doc) -> bool:
+        if not all(clause(doc) for clause in must):
+            return False
+        if any(clause(doc) for clause in must_not):
+            return False
+        if minimum:
+            matched = 0
+            for clause in should:
+                if clause(doc):
+                    matched += 1
+                    if matched >= minimum:
+                        return True
+            return False
+        return True
+    return predicate
+
+
+def _compile_match(spec: Dict[str, Any], phrase: bool = False) -> Predicate:
+    field, value = _field_spec(spec, "query")
+    text = str(value).lower()
+    bare = field[:-len(".keyword")] if field.endswith(".keyword") else field
+
+    if bare in TEXT_FIELDS and not field.endswith(".keyword"):
+        if phrase:
+            return lambda doc: any(text in str(v).lower() for v in field_values(doc, field))
+        words = set(re.findall(r"\w+", text))
+        return lambda doc: any(not words.isdisjoint(re.findall(r"\w+", str(v).lower())) for v in field_values(doc, field))
+
+    return lambda doc: any(str(v).lower() == text for v in field_values(doc, field))
+
+
+def _compile_multi_match(spec: Dict[str, Any]) -> Predicate:
+    fields = spec.get("fields") or sorted(TEXT_FIELDS)
+    phrase = spec.get("type") == "phrase"
+    clauses = [_compile_match({field.split("^")[0]: spec["query"]}, phrase) for field in fields]
+    return lambda doc: any(clause(doc) for clause in clauses)
+
+
+def _compile_term(spec: Dict[str, Any]) -> Predicate:
+    field, value = _field_spec(spec, "value")
+    return lambda doc: any(v == value or str(v) == str(value) for v in field_values(doc, field))
+
+
+def _compile_terms(spec: Dict[str, Any]) -> Predicate:
+    spec = {key: value for key, value in spec.items() if key != "boost"}
+    field, values = next(iter(spec.items()))
+    wanted = {str(value) for value in values}
+    return lambda doc: any(str(v) in wanted for v in field_values(doc, field))
+
+
+def _compile_range(spec: Dict[str, Any]) -> Predicate:
+    (field, bounds), = spec.items()
+    is_date = field == "@timestamp" or any(isinstance(bounds.get(op), str) and not _is_number(bounds[op]) for op in ("gte", "gt", "lte", "lt"))
+    convert = to_millis if is_date else float
+    checks = [(op, convert(bounds[op])) for op in ("gte", "gt", "lte", "lt") if bounds.get(op) is not None]
+
+    def in_range(value: Any) -> bool:
+        try:
+            value = to_millis(value) if is_date else float(value)
+        except (TypeError, ValueError, MockSIEMError):
+            return False
+        for op, bound in checks:
+            if (op == "gte" and value < bound) or (op == "gt" and value <= bound) \
+                    or (op == "lte" and value > bound) or (op == "lt" and value >= bound):
+                return False
+        return True
+
+    return lambda doc: any(in_range(v) for v in field_values(doc, field))
+
+
+def _is_number(value: str) -> bool:
+    try:
+        float(value)
+        return True
+    except ValueError:
+        return False
+
+
+def _compile_wildcard(spec: Dict[str, Any]) -> Predicate:
+    field, value = _field_spec(spec, "value")
+    pattern = re.compile(fnmatch.translate(str(value).lower()))
+    return lambda doc: any(pattern.match(str(v).lower()) for v in field_values(doc, field))
+
+
+def _compile_prefix(spec: Dict[str, Any]) -> Predicate:
+    field, value = _field_spec(spec, "value")
+    return lambda doc: any(str(v).startswith(str(value)) for v in field_values(doc, field))
+
+
+def _compile_exists(spec: Dict[str, Any]) -> Predicate:
+    field = spec["field"]
+    return lambda doc: bool(field_values(doc, field))
+
+
+def _compile_query_string(spec: Dict[str, Any]) -> Predicate:
+    """Plain free text only: every term must appear in one of the searched fields"""
+    fields = spec.get("fields") or sorted(TEXT_FIELDS)
+    words = [word for word in re.findall(r"[\w.]+", spec.get("query", "").lower()) if word not in ("and", "or")]
+
+    def predicate(doc: _Doc) -> bool:
+        text = " ".join(str(v).lower() for field in fields for v in field_values(doc, field))
+        return all(word in text for word in words)
+    return predicate
+
+
+def _compile_script(spec: Dict[str, Any]) -> Predicate:
+    """Only the hour-of-day membership script used by the trend aggregations"""
+    script = spec.get("script", spec)
+    match = HOUR_SCRIPT.search(script.get("source", ""))
+    if not match:
+        raise MockSIEMError(400, "script_exception", "the mock SIEM only evaluates hour-of-day scripts")
+    hours = set(script.get("params", {}).get(match.group(1), []))
+    field = match.group(2)
+    return lambda doc: any(
+        datetime.fromtimestamp(to_millis(v) / 1000, timezone.utc).hour in hours for v in field_values(doc, field)
+    )
+
+
+QUERY_COMPILERS: Dict[str, Callable[[Dict[str, Any]], Predicate]] = {
+    "match_all": lambda spec: (lambda doc: True),
+    "match_none": lambda spec: (lambda doc: False),
+    "bool": _compile_bool,
+    "match": _compile_match,
+    "match_phrase": lambda spec: _compile_match(spec, phrase=True),
+    "multi_match": _compile_multi_match,
+    "term": _compile_term,
+    "terms": _compile_terms,
+    "range": _compile_range,
+    "wildcard": _compile_wildcard,
+    "prefix": _compile_prefix,
+    "exists": _compile_exists,
+    "query_string": _compile_query_string,
+    "simple_query_string": _compile_query_string,
+    "script": _compile_script,
+}
+
+
+def time_bounds(query: Optional[Dict[str, Any]]) -> Tuple[Optional[int], Optional[int]]:
+    """Inclusive @timestamp bounds implied by top-level must/filter ranges (for bisecting)"""
+    low, high = None, None
+    clauses = [query] if query else []
+    while clauses:
+        clause = clauses.pop()
+        if "bool" in clause:
+            clauses.extend(_as_list(clause["bool"].get("must")) + _as_list(clause["bool"].get("filter")))
+        elif "range" in clause and "@timestamp" in clause["range"]:
+            bounds = clause["range"]["@timestamp"]
+            for op in ("gte", "gt"):
+                if bounds.get(op) is not None:
+                    value = to_millis(bounds[op])
+                    low = value if low is None else max(low, value)
+            for op in ("lte", "lt"):
+                if bounds.get(op) is not None:
+                    value = to_millis(bounds[op])
+                    high = value if high is None else min(high, value)
+    return low, high
+
+
+# Sorting
+
+class _Descending:
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+    def __gt__(self, other):
+        return other.value > self.value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+
+def parse_sort(sort: Any) -> List[Tuple[str, str]]:
+    """[(field, "asc"|"desc")]; the default is index order, i.e. oldest first"""
+    fields = []
+    for entry in _as_list(sort):
+        if isinstance(entry, str):
+            fields.append((entry, "desc" if entry == "_score" else "asc"))
+        else:
+            (field, options), = entry.items()
+            order = options.get("order", "asc") if isinstance(options, dict) else options
+            fields.append((field, order))
+    return fields or [("_shard_doc", "asc")]
+
+
+def sort_value(doc: _Doc, field: str) -> Any:
+    if field in ("_shard_doc", "_doc", "_score"):
+        return doc.position
+    values = field_values(doc, field)
+    return values[0] if values else None
+
+
+def sort_key_of(values: List[Any], sort_fields: List[Tuple[str, str]]) -> tuple:
+    key = []
+    for value, (_, order) in zip(values, sort_fields):
+        # Missing values sort last in either direction
+        if value is None:
+            key.append((1, 0))
+        else:
+            key.append((0, _Descending(value) if order == "desc" else value))
+    return tuple(key)
+
+
+def doc_sort_key(doc: _Doc, sort_fields: List[Tuple[str, str]]) -> tuple:
+    return sort_key_of([sort_value(doc, field) for field, _ in sort_fields], sort_fields)
+
+
+# Aggregations
+
+def run_aggregations(aggregations: Dict[str, Any], docs: List[_Doc]) -> Dict[str, Any]:
+    results = {}
+    for name, spec in aggregations.items():
+        sub_aggregations = spec.get("aggs") or spec.get("aggregations")
+        kinds = [key for key in spec if key not in ("aggs", "aggregations", "meta")]
+        if len(kinds) != 1 or kinds[0] not in AGGREGATIONS:
+            raise MockSIEMError(400, "parsing_exception", f"unsupported aggregation [{name}]: {kinds}")
+        results[name] = AGGREGATIONS[kinds[0]](spec[kinds[0]], docs, sub_aggregations)
+    return results
+
+
+def _bucket(key: Any, docs: List[_Doc], sub_aggregations: Optional[Dict[str, Any]], **extra) -> Dict[str, Any]:
+    bucket = {"key": key, **extra, "doc_count": len(docs)}
+    if sub_aggregations:
+        bucket.update(run_aggregations(sub_aggregations, docs))
+    return bucket
+
+
+def _group(docs: List[_Doc], field: str) -> Dict[Any, List[_Doc]]:
+    groups: Dict[Any, List[_Doc]] = {}
+    for doc in docs:
+        for value in set(field_values(doc, field)):
+            groups.setdefault(value, []).append(doc)
+    return groups
+
+
+def _terms(spec: Dict[str, Any], docs: List[_Doc], sub_aggregations) -> Dict[str, Any]:
+    groups = _group(docs, spec["field"])
+    size = int(spec.get("size", 10))
+    min_doc_count = int(spec.get("min_doc_count", 1))
+    ranked = sorted(
+        ((key, members) for key, members in groups.items() if len(members) >= min_doc_count),
+        key=lambda item: (-len(item[1]), str(item[0]))
+    )
+    shown = ranked[:size]
+    return {
+        "doc_count_error_upper_bound": 0,
+        "sum_other_doc_count": sum(len(members) for _, members in ranked[size:]),
+        "buckets": [_bucket(key, members, sub_aggregations) for key, members in shown]
+    }
+
+
+def _date_histogram(spec: Dict[str, Any], docs: List[_Doc], sub_aggregations) -> Dict[str, Any]:
+    field = spec.get("field", "@timestamp")
+    interval = spec.get("calendar_interval") or spec.get("fixed_interval") or spec.get("interval")
+    if interval is None:
+        raise MockSIEMError(400, "illegal_argument_exception", "date_histogram needs calendar_interval or fixed_interval")
+    calendar = CALENDAR_INTERVALS.get(interval) if "fixed_interval" not in spec else None
+    if calendar is None:
+        match = re.fullmatch(r"(\d+)(ms|s|m|h|d|w)", interval)
+        if not match:
+            raise MockSIEMError(400, "illegal_argument_exception", f"unsupported interval [{interval}]")
+        width = int(match.group(1)) * UNIT_MILLIS[match.group(2)]
+        floor = lambda millis: millis - millis % width
+        advance = lambda millis: millis + width
+    else:
+        unit = calendar[-1]
+        floor = lambda millis: to_millis(floor_datetime(datetime.fromtimestamp(millis / 1000, timezone.utc), unit).isoformat())
+        advance = lambda millis: _advance_calendar(millis, unit)
+
+    groups: Dict[int, List[_Doc]] = {}
+    for doc in docs:
+        for value in field_values(doc, field):
+            groups.setdefault(floor(to_millis(value)), []).append(doc)
+
+    min_doc_count = int(spec.get("min_doc_count", 0))
+    keys = set(groups)
+    bounds = spec.get("extended_bounds") or {}
+    low = [floor(to_millis(bounds["min"]))] if bounds.get("min") is not None else []
+    high = [floor(to_millis(bounds["max"]))] if bounds.get("max") is not None else []
+    if min_doc_count == 0 and (keys or low or high):
+        # Fill empty buckets across the data and the extended bounds
+        current, last = min(list(keys) + low), max(list(keys) + high)
+        while current <= last:
+            keys.add(current)
+            current = advance(current)
+
+    return {"buckets": [
+        _bucket(
+            key, groups.get(key, []), sub_aggregations,
+            key_as_string=datetime.fromtimestamp(key / 1000, timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+        )
+        for key in sorted(keys) if len(groups.get(key, [])) >= min_doc_count
+    ]}
+
+
+def _advance_calendar(millis: int, unit: str) -> int:
+    moment = datetime.fromtimestamp(millis / 1000, timezone.utc)
+    if unit in ("M", "q", "y"):
+        months = {"M": 1, "q": 3, "y": 12}[unit]
+        year, month = divmod(moment.month - 1 + months, 12)
+        moment = moment.replace(year=moment.year + year, month=month + 1)
+    else:
+        moment += timedelta(milliseconds=UNIT_MILLIS[unit])
+    return int(moment.timestamp() * 1000)
+
+
+def _filter(spec: Dict[str, Any], docs: List[_Doc], sub_aggregations) -> Dict[str, Any]:
+    predicate = compile_query(spec)
+    matched = [doc for doc in docs if predicate(doc)]
+    result = {"doc_count": len(matched)}
+    if sub_aggregations:
+        result.update(run_aggregations(sub_aggregations, matched))
+    return result
+
+
+def _filters(spec: Dict[str, Any], docs: List[_Doc], sub_aggregations) -> Dict[str, Any]:
+    filters = spec["filters"]
+    if isinstance(filters, dict):
+        return {"buckets": {name: _filter(query, docs, sub_aggregations) for name, query in filters.items()}}
+    return {"buckets": [_filter(query, docs, sub_aggregations) for query in filters]}
+
+
+def _numeric(spec: Dict[str, Any], docs: List[_Doc]) -> List[float]:
+    values = []
+    for doc in docs:
+        for value in field_values(doc, spec["field"]):
+            try:
+                values.append(float(value))
+            except (TypeError, ValueError):
+                pass
+    return values
+
+
+def _stats(spec: Dict[str, Any], docs: List[_Doc], sub_aggregations) -> Dict[str, Any]:
+    values = _numeric(spec, docs)
+    return {
+        "count": len(values),
+        "min": min(values) if values else None,
+        "max": max(values) if values else None,
+        "avg": sum(values) / len(values) if values else None,
+        "sum": sum(values)
+    }
+
+
+AGGREGATIONS: Dict[str, Callable[[Dict[str, Any], List[_Doc], Optional[Dict[str, Any]]], Dict[str, Any]]] = {
+    "terms": _terms,
+    "date_histogram": _date_histogram,
+    "filter": _filter,
+    "filters": _filters,
+    "stats": _stats,
+    "cardinality": lambda spec, docs, sub: {"value": len(_group(docs, spec["field"]))},
+    "value_count": lambda spec, docs, sub: {"value": sum(len(field_values(doc, spec["field"])) for doc in docs)},
+    "min": lambda spec, docs, sub: {"value": _stats(spec, docs, sub)["min"]},
+    "max": lambda spec, docs, sub: {"value": _stats(spec, docs, sub)["max"]},
+    "avg": lambda spec, docs, sub: {"value": _stats(spec, docs, sub)["avg"]},
+    "sum": lambda spec, docs, sub: {"value": _stats(spec, docs, sub)["sum"]},
+}
+
+
+# HTTP
+
+def create_mock_siem_app(store: MockSIEMStore) -> FastAPI:
+    """Elasticsearch-compatible HTTP front end for a MockSIEMStore"""
+    app = FastAPI(title="Mock SIEM", docs_url=None, redoc_url=None)
+
+    async def read_json(request: Request) -> Dict[str, Any]:
+        payload = await request.body()
+        if not payload:
+            return {}
+        try:
+            return json.loads(payload)
+        except ValueError as e:
+            raise MockSIEMError(400, "parsing_exception", f"request body is not valid JSON: {e}")
+
+    @app.exception_handler(MockSIEMError)
+    async def mock_siem_error(request: Request, error: MockSIEMError):
+        return JSONResponse(error.body(), status_code=error.status)
+
+    @app.api_route("/", methods=["GET", "HEAD"])
+    async def info():
+        return {
+            "name": "mock-siem",
+            "cluster_name": "mock-siem",
+            "version": {"number": "8.11.0", "distribution": "mock"},
+            "tagline": "You Know, for Search"
+        }
+
+    @app.get("/_cluster/health")
+    async def cluster_health():
+        return {"cluster_name": "mock-siem", "status": "green", "number_of_nodes": 1, "documents": len(store.docs)}
+
+    @app.api_route("/_search", methods=["GET", "POST"])
+    async def search_all(request: Request):
+        return await asyncio.to_thread(store.search, None, await read_json(request))
+
+    @app.api_route("/{index}/_search", methods=["GET", "POST"])
+    async def search(index: str, request: Request):
+        return await asyncio.to_thread(store.search, index, await read_json(request))
+
+    @app.api_route("/_msearch", methods=["GET", "POST"])
+    async def msearch_all(request: Request):
+        return await asyncio.to_thread(store.msearch, None, (await request.body()).decode())
+
+    @app.api_route("/{index}/_msearch", methods=["GET", "POST"])
+    async def msearch(index: str, request: Request):
+        return await asyncio.to_thread(store.msearch, index, (await request.body()).decode())
+
+    @app.api_route("/{index}/_count", methods=["GET", "POST"])
+    async def count(index: str, request: Request):
+        return await asyncio.to_thread(store.count, index, await read_json(request))
+
+    @app.post("/{index}/_pit")
+    async def open_pit(index: str):
+        return store.open_pit(index)
+
+    @app.delete("/_pit")
+    async def close_pit(request: Request):
+        body = await read_json(request)
+        result = store.close_pit(body.get("id"))
+        return JSONResponse(result, status_code=200 if result["num_freed"] else 404)
+
+    return app
+
+
+if __name__ == "__main__":
+    import argparse
+    import logging
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve synthetic ECS events through an Elasticsearch-compatible API")
+    parser.add_argument("--events", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--days", type=float, default=7)
+    parser.add_argument("--attack-ratio", type=float, default=0.05)
+    parser.add_argument("--start", help="ISO start of the data; defaults to --days before today, so 'last week' queries find it")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9200)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.start:
+        start = datetime.fromisoformat(args.start)
+    else:
+        today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        start = today + timedelta(days=1) - timedelta(days=args.days)
+
+    loaded = time.perf_counter()
+    mock_store = MockSIEMStore.from_generator(
+        args.events, seed=args.seed, start=start, days=args.days, attack_ratio=args.attack_ratio
+    )
+    logging.info(f"Generated {len(mock_store.docs)} events in {time.perf_counter() - loaded:.1f}s")
+    uvicorn.run(create_mock_siem_app(mock_store), host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,316 @@
+"""Seeded synthetic ECS documents for load tests and the mock SIEM server"""
+import heapq
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+# Share of background traffic per beat; attack bursts add to these
+DEFAULT_SOURCE_MIX = {"winlogbeat": 0.45, "packetbeat": 0.40, "wazuh": 0.15}
+
+# Relative event rate per hour of day: quiet nights, a mid-afternoon peak
+DIURNAL_PROFILE = [
+    0.25, 0.2, 0.18, 0.18, 0.2, 0.3, 0.5, 0.8, 1.1, 1.3, 1.4, 1.4,
+    1.3, 1.4, 1.5, 1.45, 1.3, 1.1, 0.8, 0.6, 0.5, 0.4, 0.35, 0.3
+]
+WEEKEND_FACTOR = 0.45
+
+BURST_TYPES = ("brute_force", "port_scan", "data_exfiltration", "privilege_escalation")
+
+INDEX_NAMES = {
+    "winlogbeat": "winlogbeat-8.11.0",
+    "packetbeat": "packetbeat-8.11.0",
+    "wazuh": "wazuh-alerts-4.x",
+}
+
+WINDOWS_PROCESSES = ["svchost.exe", "chrome.exe", "outlook.exe", "teams.exe", "explorer.exe", "msedge.exe", "code.exe"]
+SERVICE_PORTS = {53: "dns", 80: "http", 443: "tls", 445: "smb", 3389: "rdp", 22: "ssh", 389: "ldap"}
+WAZUH_RULES = [
+    (5501, 3, "PAM: Login session opened.", ["pam", "syslog", "authentication_success"], "authentication"),
+    (5502, 3, "PAM: Login session closed.", ["pam", "syslog"], "authentication"),
+    (550, 7, "Integrity checksum changed.", ["ossec", "syscheck"], "file"),
+    (31101, 5, "Web server 400 error code.", ["web", "accesslog"], "web"),
+    (510, 7, "Host-based anomaly detection event (rootcheck).", ["ossec", "rootcheck"], "intrusion_detection"),
+    (2502, 10, "syslog: User missed the password more than one time", ["syslog", "access_control"], "authentication"),
+]
+
+
+class SyntheticEventGenerator:
+    """Realistic-looking ECS hits from winlogbeat, packetbeat and Wazuh
+
+    Background traffic arrives as a Poisson process whose rate follows a
+    diurnal, weekday-heavy profile; attack bursts (brute force, port
+    scans, off-hours exfiltration, privilege escalation) are interleaved
+    at attack_ratio of all events. hits() yields in timestamp order with
+    constant memory, so millions of events can be streamed to disk or an
+    index; the same seed always produces the same documents.
+    """
+
+    def __init__(
+        self,
+        seed: int = 42,
+        start: Optional[datetime] = None,
+        days: float = 7,
+        hosts: int = 200,
+        users: int = 500,
+        attack_ratio: float = 0.05,
+        source_mix: Optional[Dict[str, float]] = None
+    ):
+        self.seed = seed
+        self.start = start or datetime(2024, 1, 1, tzinfo=timezone.utc)
+        if self.start.tzinfo is None:
+            self.start = self.start.replace(tzinfo=timezone.utc)
+        self.days = days
+        self.attack_ratio = attack_ratio
+        self.source_mix = source_mix or DEFAULT_SOURCE_MIX
+
+        # The population is derived from the seed too, so documents refer to stable hosts and users
+        rng = random.Random(seed)
+        self.hosts = [f"{rng.choice(['ws', 'srv', 'dc', 'db', 'web'])}-{i:04d}" for i in range(hosts)]
+        self.host_ips = {host: f"10.{i // 250 % 250}.{i % 250}.{rng.randint(2, 254)}" for i, host in enumerate(self.hosts)}
+        self.users = [f"{rng.choice(['j', 'a', 'm', 's', 'k', 'r'])}{rng.choice(['smith', 'lee', 'patel', 'garcia', 'chen', 'novak'])}{i}" for i in range(users)]
+        self.admin_users = self.users[:max(1, users // 50)]
+        self.external_ips = [f"{rng.randint(31, 223)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}" for _ in range(200)]
+
+    def hits(self, count: int) -> Iterator[Dict[str, Any]]:
+        """Yield count search hits ({_index, _id, _source}) in timestamp order"""
+        rng = random.Random(self.seed + 1)
+        sources = list(self.source_mix)
+        weights = list(self.source_mix.values())
+
+        span_seconds = self.days * 86400
+        mean_profile = self._mean_rate_factor()
+        # Bursts average ~30 events; start them often enough to hit attack_ratio overall
+        base_rate = count * (1 - self.attack_ratio) / span_seconds / mean_profile
+        burst_probability = self.attack_ratio / (1 - self.attack_ratio) / 30 if self.attack_ratio < 1 else 1.0
+
+        pending: List[Tuple[float, int, Dict[str, Any]]] = []
+        order = 0
+        offset = 0.0
+        emitted = 0
+        while emitted < count:
+            offset += rng.expovariate(base_rate * self._rate_factor(offset))
+            while pending and pending[0][0] <= offset and emitted < count:
+                yield self._finish(heapq.heappop(pending), emitted)
+                emitted += 1
+            if emitted >= count:
+                break
+
+            source = rng.choices(sources, weights)[0]
+            yield self._finish((offset, order, getattr(self, f"_{source}_event")(rng)), emitted)
+            order += 1
+            emitted += 1
+
+            if rng.random() < burst_probability:
+                for burst_offset, doc in self._burst(rng, offset):
+                    heapq.heappush(pending, (burst_offset, order, doc))
+                    order += 1
+
+    def documents(self, count: int) -> List[Dict[str, Any]]:
+        """hits() collected into a list"""
+        return list(self.hits(count))
+
+    def _mean_rate_factor(self) -> float:
+        hours = max(1, int(self.days * 24))
+        return sum(self._rate_factor(hour * 3600.0) for hour in range(hours)) / hours
+
+    def _rate_factor(self, offset: float) -> float:
+        moment = self.start + timedelta(seconds=offset)
+        factor = DIURNAL_PROFILE[moment.hour]
+        return factor * WEEKEND_FACTOR if moment.weekday() >= 5 else factor
+
+    def _finish(self, item: Tuple[float, int, Dict[str, Any]], number: int) -> Dict[str, Any]:
+        offset, _, (index, source) = item
+        source["@timestamp"] = (self.start + timedelta(seconds=offset)).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+        return {"_index": INDEX_NAMES[index], "_id": f"{self.seed}-{number}", "_source": source}
+
+    # Background traffic
+
+    def _winlogbeat_event(self, rng: random.Random) -> Tuple[str, Dict[str, Any]]:
+        host = rng.choice(self.hosts)
+        user = rng.choice(self.users)
+        roll = rng.random()
+        if roll < 0.45:
+            return self._windows_logon(host, user, self.host_ips[rng.choice(self.hosts)], success=True)
+        if roll < 0.50:
+            return self._windows_logon(host, user, self.host_ips[rng.choice(self.hosts)], success=False)
+        if roll < 0.75:
+            return self._windows_event(host, user, 4634, "logged-out", ["authentication"], "success", "low",
+                                       f"An account was logged off. Account Name: {user}")
+        process = rng.choice(WINDOWS_PROCESSES)
+        source = self._windows_event(host, user, 4688, "created-process", ["process"], "success", "low",
+                                     f"A new process has been created. New Process Name: C:\\Program Files\\{process}")
+        source[1]["process"] = {"name": process, "pid": rng.randint(400, 30000), "args": [process]}
+        return source
+
+    def _packetbeat_event(self, rng: random.Random) -> Tuple[str, Dict[str, Any]]:
+        host = rng.choice(self.hosts)
+        port = rng.choice(list(SERVICE_PORTS))
+        outbound = port in (53, 80, 443) and rng.random() < 0.7
+        destination = rng.choice(self.external_ips) if outbound else self.host_ips[rng.choice(self.hosts)]
+        return self._flow(host, destination, port, rng.randint(200, 200000), rng, "low")
+
+    def _wazuh_event(self, rng: random.Random) -> Tuple[str, Dict[str, Any]]:
+        rule_id, level, description, groups, category = rng.choice(WAZUH_RULES)
+        host = rng.choice(self.hosts)
+        return self._wazuh_alert(host, rng.choice(self.users), rule_id, level, description, groups, category)
+
+    # Attack bursts
+
+    def _burst(self, rng: random.Random, offset: float) -> Iterator[Tuple[float, Tuple[str, Dict[str, Any]]]]:
+        kind = rng.choice(BURST_TYPES)
+        for burst_offset, (index, source) in self._burst_events(rng, kind, offset):
+            # Ground truth for checking detections; ECS keeps custom keywords under labels
+            source["labels"] = {"attack": kind}
+            yield burst_offset, (index, source)
+
+    def _burst_events(self, rng: random.Random, kind: str, offset: float) -> Iterator[Tuple[float, Tuple[str, Dict[str, Any]]]]:
+        attacker = rng.choice(self.external_ips)
+        target = rng.choice(self.hosts)
+
+        if kind == "brute_force":
+            user = rng.choice(self.admin_users + self.users[:20])
+            attempts = rng.randint(20, 80)
+            for _ in range(attempts):
+                offset += rng.uniform(0.3, 4.0)
+                yield offset, self._windows_logon(target, user, attacker, success=False)
+            if rng.random() < 0.3:
+                # ...and sometimes it works
+                yield offset + 1.0, self._windows_logon(target, user, attacker, success=True)
+
+        elif kind == "port_scan":
+            for port in rng.sample(range(1, 10000), rng.randint(30, 80)):
+                offset += rng.uniform(0.01, 0.3)
+                yield offset, self._flow(target, self.host_ips[target], port, rng.randint(40, 120), rng, "medium",
+                                         source_ip=attacker, message=f"connection attempt from {attacker} to port {port}")
+
+        elif kind == "data_exfiltration":
+            # Move the burst into the small hours, where the detector looks for it
+            moment = self.start + timedelta(seconds=offset)
+            night = moment.replace(hour=rng.choice([1, 2, 3, 4]), minute=rng.randint(0, 59))
+            if night < moment:
+                night += timedelta(days=1)
+            offset = (night - self.start).total_seconds()
+            for _ in range(rng.randint(5, 20)):
+                offset += rng.uniform(10, 90)
+                size = rng.randint(20_000_000, 900_000_000)
+                yield offset, self._flow(target, attacker, 443, size, rng, "high",
+                                         message=f"network_transfer of {size} bytes from {target} to {attacker}")
+
+        else:
+            user = rng.choice(self.users)
+            steps = [
+                (4720, "added-user-account", ["iam"], f"user_add: account {user}_adm created by {user}"),
+                (4732, "added-member-to-group", ["iam"], f"permission_change: {user}_adm added to Administrators by {user}"),
+                (4688, "created-process", ["process"], "powershell -nop -w hidden -encodedcommand JABjAGwAaQBlAG4AdAA="),
+                (4739, "changed-domain-policy", ["configuration"], f"policy_modify: Domain Policy was changed by {user}"),
+            ]
+            for code, action, category, message in steps[:rng.randint(2, 4)]:
+                offset += rng.uniform(5, 60)
+                yield offset, self._windows_event(target, user, code, action, category, "success", "high", message)
+            offset += rng.uniform(1, 10)
+            yield offset, self._wazuh_alert(target, user, 100002, 12, "Possible privilege escalation: user_add followed by group change",
+                                            ["windows", "privilege_escalation"], "intrusion_detection")
+
+    # Document shapes
+
+    def _windows_event(
+        self, host: str, user: str, code: int, action: str, category: List[str], outcome: str, severity: str, message: str
+    ) -> Tuple[str, Dict[str, Any]]:
+        return "winlogbeat", {
+            "message": message,
+            "event": {
+                "code": str(code),
+                "kind": "event",
+                "provider": "Microsoft-Windows-Security-Auditing",
+                "module": "security",
+                "category": category,
+                "action": action,
+                "outcome": outcome,
+                "severity": severity
+            },
+            "host": {"name": host, "ip": [self.host_ips[host]], "os": {"family": "windows"}},
+            "user": {"name": user, "domain": "CORP"},
+            "winlog": {
+                "channel": "Security",
+                "event_id": code,
+                "computer_name": f"{host}.corp.local",
+                "event_data": {"TargetUserName": user}
+            },
+            "agent": {"type": "winlogbeat", "hostname": host}
+        }
+
+    def _windows_logon(self, host: str, user: str, source_ip: str, success: bool) -> Tuple[str, Dict[str, Any]]:
+        if success:
+            index, source = self._windows_event(host, user, 4624, "logged-in", ["authentication"], "success", "low",
+                                                f"An account was successfully logged on. Account Name: {user}")
+        else:
+            index, source = self._windows_event(host, user, 4625, "logon-failed", ["authentication"], "failure", "medium",
+                                                f"failed_login: An account failed to log on. Account Name: {user}")
+        source["source"] = {"ip": source_ip}
+        return index, source
+
+    def _flow(
+        self, host: str, destination_ip: str, port: int, size: int, rng: random.Random, severity: str,
+        source_ip: str = None, message: str = None
+    ) -> Tuple[str, Dict[str, Any]]:
+        source_ip = source_ip or self.host_ips[host]
+        protocol = SERVICE_PORTS.get(port, "unknown")
+        return "packetbeat", {
+            "message": message or f"{protocol} flow {source_ip} -> {destination_ip}:{port}",
+            "event": {
+                "kind": "event",
+                "dataset": "flow",
+                "category": ["network"],
+                "action": "network_flow",
+                "outcome": "success",
+                "severity": severity,
+                "duration": rng.randint(1_000_000, 9_000_000_000)
+            },
+            "source": {"ip": source_ip, "port": rng.randint(1024, 65535), "bytes": size // 10},
+            "destination": {"ip": destination_ip, "port": port, "bytes": size},
+            "network": {"transport": "udp" if port == 53 else "tcp", "protocol": protocol, "bytes": size + size // 10},
+            "host": {"name": host},
+            "agent": {"type": "packetbeat", "hostname": host}
+        }
+
+    def _wazuh_alert(
+        self, host: str, user: str, rule_id: int, level: int, description: str, groups: List[str], category: str
+    ) -> Tuple[str, Dict[str, Any]]:
+        severity = "critical" if level >= 12 else "high" if level >= 8 else "medium" if level >= 5 else "low"
+        return "wazuh", {
+            "message": description,
+            "rule": {
+                "id": str(rule_id),
+                "level": level,
+                "description": description,
+                "groups": groups,
+                "name": description
+            },
+            "event": {"kind": "alert", "category": [category], "severity": severity, "risk_score": round(level * 100 / 15)},
+            "agent": {"name": host, "type": "wazuh"},
+            "host": {"name": host},
+            "user": {"name": user}
+        }
+
+
+def generate_hits(count: int, seed: int = 42, **options) -> List[Dict[str, Any]]:
+    """Shortcut for SyntheticEventGenerator(seed, **options).documents(count)"""
+    return SyntheticEventGenerator(seed=seed, **options).documents(count)
+
+
+if __name__ == "__main__":
+    # Write NDJSON hits, e.g. for a bulk load into a real cluster
+    import argparse
+    import json
+    import sys
+
+    parser = argparse.ArgumentParser(description="Write synthetic ECS hits as NDJSON to stdout")
+    parser.add_argument("--events", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--days", type=float, default=7)
+    parser.add_argument("--attack-ratio", type=float, default=0.05)
+    args = parser.parse_args()
+
+    generator = SyntheticEventGenerator(seed=args.seed, days=args.days, attack_ratio=args.attack_ratio)
+    for hit in generator.hits(args.events):
+        sys.stdout.write(json.dumps(hit) + "\n")
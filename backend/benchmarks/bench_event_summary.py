@@ -0,0 +1,121 @@
+"""Benchmark: report summaries, legacy multi-pass helpers vs single-pass EventSummary
+
+Usage (from backend/):
+    python benchmarks/bench_event_summary.py [--events 5000 100000] [--repeat 3]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from models.siem_models import SecurityEvent, LogLevel
+from services.event_summary import EventSummary
+
+EVENT_TYPES = ["authentication", "network", "process", "file", "malware", "iam"]
+SEVERITIES = list(LogLevel)
+
+
+def build_events(size: int, seed: int = 42) -> list:
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    return [
+        SecurityEvent.model_construct(
+            id=str(i),
+            timestamp=start + timedelta(seconds=rng.randint(0, 30 * 86400)),
+            event_type=rng.choice(EVENT_TYPES),
+            severity=rng.choice(SEVERITIES),
+            source_ip=f"10.0.{rng.randint(0, 40)}.{rng.randint(1, 254)}" if rng.random() < 0.8 else None,
+            destination_ip=None,
+            user=f"user{rng.randint(1, 500)}" if rng.random() < 0.7 else None,
+            description="benchmark event",
+            raw_data={}
+        )
+        for i in range(size)
+    ]
+
+
+def legacy_summary(events: list, aggregations: dict) -> tuple:
+    """The removed ResponseFormatter helpers, each walking the events again"""
+    event_types, severity_counts, source_ips = {}, {}, {}
+    for event in events:
+        event_types[event.event_type] = event_types.get(event.event_type, 0) + 1
+        severity_counts[event.severity.value] = severity_counts.get(event.severity.value, 0) + 1
+        if event.source_ip:
+            source_ips[event.source_ip] = source_ips.get(event.source_ip, 0) + 1
+    summary = {
+        "event_types": event_types,
+        "severity_counts": severity_counts,
+        "top_source_ips": dict(sorted(source_ips.items(), key=lambda x: x[1], reverse=True)[:10]),
+        "time_range": {
+            "start": min(event.timestamp for event in events).isoformat(),
+            "end": max(event.timestamp for event in events).isoformat()
+        }
+    }
+    if aggregations:
+        summary["aggregations"] = aggregations
+
+    span = max(1.0, (max(e.timestamp for e in events) - min(e.timestamp for e in events)).total_seconds() / 3600)
+    summary["metrics"] = {
+        "events_per_hour": len(events) / max(1, span),
+        "unique_source_ips": len(set(e.source_ip for e in events if e.source_ip)),
+        "unique_users": len(set(e.user for e in events if e.user)),
+        "high_severity_percentage": len([e for e in events if e.severity.value in ['high', 'critical']]) / len(events) * 100
+    }
+
+    severity_data = {}
+    for event in events:
+        severity_data[event.severity.value] = severity_data.get(event.severity.value, 0) + 1
+
+    start_time = min(event.timestamp for event in events)
+    end_time = max(event.timestamp for event in events)
+    time_range = f"{start_time.strftime('%Y-%m-%d %H:%M')} to {end_time.strftime('%Y-%m-%d %H:%M')}"
+    return summary, severity_data, time_range
+
+
+def single_pass_summary(events: list, aggregations: dict) -> tuple:
+    summary = EventSummary.from_events(events)
+    return (
+        summary.as_dict(aggregations, include_metrics=True),
+        dict(summary.severity_counts),
+        summary.time_range_summary()
+    )
+
+
+def best_of(func, repeat: int, *args) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings), statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, nargs="+", default=[5000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    aggregations = {"event_types": {"buckets": []}}
+    for size in args.events:
+        events = build_events(size)
+        if legacy_summary(events, aggregations) != single_pass_summary(events, aggregations):
+            print(f"ERROR: summaries differ at {size} events")
+            sys.exit(1)
+
+        legacy_best, legacy_median = best_of(legacy_summary, args.repeat, events, aggregations)
+        single_best, single_median = best_of(single_pass_summary, args.repeat, events, aggregations)
+        print(
+            f"{size:>8} events  legacy {legacy_best * 1000:8.1f} ms (median {legacy_median * 1000:.1f})   "
+            f"EventSummary {single_best * 1000:8.1f} ms (median {single_median * 1000:.1f})   "
+            f"{legacy_best / single_best:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
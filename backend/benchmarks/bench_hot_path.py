@@ -0,0 +1,200 @@
+"""Benchmark suite: NLP -> query generation -> analysis -> formatting hot path
+
+Times each stage of a chat query on seeded synthetic corpora from
+utils/test_helpers.py at several scales (queries for the NLP and query
+generation cases, events for analysis and formatting), and writes JSON
+that a later run can be compared against.
+
+Usage (from backend/):
+    python benchmarks/bench_hot_path.py [--scales 10 1000 100000] [--repeat 5] [--only format]
+        [--output results.json] [--compare baseline.json] [--threshold 0.10]
+"""
+import argparse
+import asyncio
+import atexit
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from services.nlp_service import NLPService
+from services.query_generator import QueryGenerator
+from services.ai_threat_detection import AIThreatDetectionService
+from services.anomaly_model import AnomalyModel
+from services.response_formatter import ResponseFormatter
+from utils.test_helpers import create_security_event_corpus, create_query_corpus, create_siem_response_from_events
+
+DEFAULT_SCALES = [10, 1000, 100000]
+
+
+def setup_extract_intent(scale: int):
+    nlp = NLPService()
+    queries = create_query_corpus(scale)
+    return lambda: [nlp.extract_intent(query) for query in queries]
+
+
+def setup_custom_entities(scale: int):
+    nlp = NLPService()
+    queries = create_query_corpus(scale)
+    return lambda: [nlp._extract_custom_entities(query) for query in queries]
+
+
+def _query_inputs(scale: int) -> list:
+    """(intent, entity dicts) per query, as process_query would hand them on"""
+    nlp = NLPService()
+    return [
+        (nlp.extract_intent(query)[0], [entity.to_dict() for entity in nlp._extract_custom_entities(query)])
+        for query in create_query_corpus(scale)
+    ]
+
+
+def setup_elasticsearch_query(scale: int):
+    generator = QueryGenerator()
+    inputs = _query_inputs(scale)
+    return lambda: [generator.generate_elasticsearch_query(intent, entities) for intent, entities in inputs]
+
+
+def setup_kql_query(scale: int):
+    generator = QueryGenerator()
+    inputs = _query_inputs(scale)
+    return lambda: [generator.generate_kql_query(intent, entities) for intent, entities in inputs]
+
+
+def setup_analyze_events(scale: int):
+    service = AIThreatDetectionService()
+    # Measure the analysis itself rather than process-pool start-up and pickling
+    service.executor = None
+    # A fresh model in a scratch directory: every run starts untrained, and
+    # nothing trained on synthetic data lands in the app's ANOMALY_MODEL_PATH
+    model_dir = tempfile.mkdtemp(prefix="bench_anomaly_model_")
+    service.anomaly_model = AnomalyModel(model_path=os.path.join(model_dir, "anomaly_model.joblib"))
+    atexit.register(shutil.rmtree, model_dir, ignore_errors=True)
+    atexit.register(service.anomaly_model.shutdown)
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(service._load_threat_patterns())
+    events = create_security_event_corpus(scale)
+    return lambda: loop.run_until_complete(service.analyze_events(events))
+
+
+def _setup_formatter(method_name: str):
+    def setup(scale: int):
+        formatter = ResponseFormatter()
+        siem_response = create_siem_response_from_events(create_security_event_corpus(scale))
+        method = getattr(formatter, method_name)
+        return lambda: method(siem_response, "benchmark query")
+    return setup
+
+
+CASES = {
+    "nlp.extract_intent": setup_extract_intent,
+    "nlp._extract_custom_entities": setup_custom_entities,
+    "query_generator.generate_elasticsearch_query": setup_elasticsearch_query,
+    "query_generator.generate_kql_query": setup_kql_query,
+    "ai_threat_detection.analyze_events": setup_analyze_events,
+    "response_formatter._format_search_response": _setup_formatter("_format_search_response"),
+    "response_formatter._format_report_response": _setup_formatter("_format_report_response"),
+    "response_formatter._format_statistics_response": _setup_formatter("_format_statistics_response"),
+    "response_formatter._format_generic_response": _setup_formatter("_format_generic_response"),
+}
+
+
+def measure(run, repeat: int) -> dict:
+    run()  # warm caches and lazily compiled patterns
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    return {
+        "min_s": min(timings),
+        "median_s": statistics.median(timings),
+        "mean_s": statistics.fmean(timings),
+        "repeat": repeat
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Print median ratios against a baseline; return the cases slower than threshold allows"""
+    regressions = []
+    for key, result in results.items():
+        previous = baseline.get("results", {}).get(key)
+        if previous is None:
+            continue
+        ratio = result["median_s"] / previous["median_s"]
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressions.append(key)
+        print(f"{key:<60} {previous['median_s'] * 1000:10.2f} ms -> {result['median_s'] * 1000:10.2f} ms  {ratio:5.2f}x{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", help="run only cases whose name contains this text")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="JSON from an earlier run to compare medians against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown before a case is flagged")
+    args = parser.parse_args()
+
+    results = {}
+    for name, setup in CASES.items():
+        if args.only and args.only not in name:
+            continue
+        for scale in args.scales:
+            result = measure(setup(scale), args.repeat)
+            result["per_item_us"] = result["median_s"] / scale * 1e6
+            results[f"{name}@{scale}"] = result
+            print(
+                f"{name:<50} {scale:>7}  median {result['median_s'] * 1000:10.2f} ms  "
+                f"min {result['min_s'] * 1000:10.2f} ms  {result['per_item_us']:8.2f} us/item"
+            )
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "scales": args.scales,
+            "repeat": args.repeat
+        },
+        "results": results
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\nCompared with {baseline['meta'].get('revision')} ({baseline['meta'].get('timestamp')}):")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} case(s) slower than the {args.threshold:.0%} threshold")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
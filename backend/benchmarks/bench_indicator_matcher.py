@@ -0,0 +1,100 @@
+"""Micro-benchmark: threat indicator scanning, per-detector substring loops vs IndicatorMatcher
+
+Usage (from backend/):
+    python benchmarks/bench_indicator_matcher.py [--events 50000] [--extra-indicators 0 100 500]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from services.indicator_matcher import IndicatorMatcher
+
+BASE_GROUPS = {
+    "brute_force": ["failed_login", "authentication_failure"],
+    "data_exfiltration": ["file_access", "network_transfer"],
+    "admin_actions": ["user_add", "permission_change", "policy_modify"],
+    "suspicious_processes": ["powershell", "cmd", "wmic"],
+}
+
+WORDS = (
+    "user logged on from host process started connection blocked for admin account "
+    "file read write network session token service outbound inbound rule matched"
+).split()
+
+
+def build_groups(extra: int, rng: random.Random) -> dict:
+    groups = {name: list(indicators) for name, indicators in BASE_GROUPS.items()}
+    groups["extra"] = [
+        "".join(rng.choice("abcdefghijklmnopqrstuvwxyz_") for _ in range(rng.randint(5, 14)))
+        for _ in range(extra)
+    ]
+    return groups
+
+
+def build_descriptions(size: int, groups: dict, rng: random.Random) -> list:
+    indicators = [indicator for group in groups.values() for indicator in group]
+    descriptions = []
+    for _ in range(size):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(6, 18))]
+        if rng.random() < 0.2:
+            words.insert(rng.randrange(len(words)), rng.choice(indicators).upper())
+        descriptions.append(" ".join(words))
+    return descriptions
+
+
+def legacy_scan(descriptions: list, groups: dict) -> list:
+    """Each detector lowercases and scans the description with its own list"""
+    results = []
+    for description in descriptions:
+        results.append({
+            name: any(indicator in description.lower() for indicator in indicators)
+            for name, indicators in groups.items()
+        })
+    return results
+
+
+def matcher_scan(descriptions: list, groups: dict, matcher: IndicatorMatcher) -> list:
+    results = []
+    for tags in matcher.tag(descriptions):
+        results.append({name: not tags.isdisjoint(indicators) for name, indicators in groups.items()})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=50000)
+    parser.add_argument("--extra-indicators", type=int, nargs="+", default=[0, 100, 500])
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    for extra in args.extra_indicators:
+        rng = random.Random(args.seed)
+        groups = build_groups(extra, rng)
+        descriptions = build_descriptions(args.events, groups, rng)
+        matcher = IndicatorMatcher(indicator for group in groups.values() for indicator in group)
+
+        start = time.perf_counter()
+        legacy = legacy_scan(descriptions, groups)
+        legacy_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        matched = matcher_scan(descriptions, groups, matcher)
+        matcher_seconds = time.perf_counter() - start
+
+        if legacy != matched:
+            print(f"ERROR: results differ with {extra} extra indicators")
+            sys.exit(1)
+
+        total = len(matcher.indicators)
+        print(
+            f"{total:>4} indicators  legacy {legacy_seconds / args.events * 1e6:6.2f} us/event   "
+            f"IndicatorMatcher {matcher_seconds / args.events * 1e6:6.2f} us/event"
+        )
+
+
+if __name__ == "__main__":
+    main()
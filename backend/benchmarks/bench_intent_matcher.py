@@ -0,0 +1,112 @@
+"""Micro-benchmark: NLPService intent extraction, legacy loop vs IntentMatcher
+
+Usage (from backend/):
+    python benchmarks/bench_intent_matcher.py [--queries 5000] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import re
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from models.chat_models import QueryIntent
+from services.intent_matcher import IntentMatcher, DEFAULT_INTENT_PATTERNS
+
+TEMPLATES = [
+    "Show me failed login attempts from {ip} {time}",
+    "show all firewall logs for {host} {time}",
+    "Find events involving user {user} {time}",
+    "search for connections to {ip} on port {port}",
+    "What happened on {host} {time}?",
+    "Any suspicious activity from {user} {time}",
+    "malware detection alerts on {host}",
+    "Generate a report on authentication failures {time}",
+    "Create a summary of network anomalies {time}",
+    "summarize the incidents for {host}",
+    "Give me an overview of security posture {time}",
+    "How many failed logins did {user} have {time}?",
+    "Count the blocked connections from {ip}",
+    "statistics on brute force attempts {time}",
+    "total number of alerts per host {time}",
+    "Filter to critical events only",
+    "only show results from {ip}",
+    "exclude traffic from {ip}",
+    "just the ones with high severity",
+    "limit to events on {host}",
+    "list privilege changes for {user} {time}",
+    "investigate lateral movement from {host} to {ip}",
+    "Were there any outbound transfers to {ip} {time}?",
+]
+
+USERS = ["admin", "jsmith", "svc_backup", "alice", "bob", "root", "oracle"]
+HOSTS = ["web01", "dc-01", "fileserver", "vpn-gw", "db-prod-3", "laptop-4411"]
+TIMES = ["yesterday", "in the last 24 hours", "last week", "today", "past month", "in the last hour", ""]
+
+
+def build_corpus(size: int, seed: int = 42) -> list:
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(size):
+        template = rng.choice(TEMPLATES)
+        corpus.append(template.format(
+            ip=f"{rng.randint(1, 223)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}",
+            port=rng.choice([22, 80, 443, 3389, 445, 8080]),
+            user=rng.choice(USERS),
+            host=rng.choice(HOSTS),
+            time=rng.choice(TIMES)
+        ).strip())
+    return corpus
+
+
+def legacy_extract_intent(text: str):
+    """The original nested re.search loop from NLPService.extract_intent"""
+    text_lower = text.lower()
+    for intent, patterns in DEFAULT_INTENT_PATTERNS.items():
+        for pattern in patterns:
+            if re.search(pattern, text_lower):
+                return intent, 0.8
+    return QueryIntent.SEARCH_LOGS, 0.6
+
+
+def time_per_call(func, corpus: list, repeat: int) -> list:
+    """Return per-call latency (microseconds) for each repeat"""
+    results = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for query in corpus:
+            func(query)
+        results.append((time.perf_counter() - start) / len(corpus) * 1e6)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.queries, args.seed)
+    matcher = IntentMatcher()
+
+    def matcher_extract_intent(text):
+        match = matcher.match(text)
+        return match.intent, match.confidence
+
+    mismatches = [q for q in corpus if legacy_extract_intent(q) != matcher_extract_intent(q)]
+    if mismatches:
+        print(f"ERROR: {len(mismatches)} queries classified differently, e.g. {mismatches[0]!r}")
+        sys.exit(1)
+
+    print(f"Corpus: {len(corpus)} queries, {args.repeat} repeats")
+    for name, func in (("legacy loop", legacy_extract_intent), ("IntentMatcher", matcher_extract_intent)):
+        samples = time_per_call(func, corpus, args.repeat)
+        print(f"  {name:<14} median {statistics.median(samples):6.2f} us/call   best {min(samples):6.2f} us/call")
+
+
+if __name__ == "__main__":
+    main()
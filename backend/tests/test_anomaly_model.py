@@ -0,0 +1,94 @@
+import threading
+import time
+from concurrent.futures import Future
+import numpy as np
+from services import anomaly_model as anomaly_module
+from services.anomaly_model import AnomalyModel
+
+
+class SlowExecutor:
+    """Stands in for the spawned pool: slow to create, never finishes a fit"""
+
+    instances = []
+
+    def __init__(self, **kwargs):
+        time.sleep(0.05)
+        self.submitted = 0
+        SlowExecutor.instances.append(self)
+
+    def submit(self, *args):
+        self.submitted += 1
+        return Future()
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+
+def test_concurrent_start_training_submits_once(tmp_path, monkeypatch):
+    SlowExecutor.instances = []
+    monkeypatch.setattr(anomaly_module, "ProcessPoolExecutor", SlowExecutor)
+    model = AnomalyModel(model_path=str(tmp_path / "model.joblib"), sample_size=100, min_training_samples=10)
+    with model._lock:
+        model._sample(np.random.default_rng(0).normal(size=(50, 6)))
+
+    barrier = threading.Barrier(8)
+    started = []
+
+    def train():
+        barrier.wait()
+        started.append(model.start_training())
+
+    threads = [threading.Thread(target=train) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(started) == [False] * 7 + [True]
+    assert len(SlowExecutor.instances) == 1
+    assert SlowExecutor.instances[0].submitted == 1
+    model.shutdown()
+
+
+def test_explicit_zero_is_not_replaced_by_settings(tmp_path):
+    model = AnomalyModel(
+        model_path=str(tmp_path / "model.joblib"),
+        retrain_interval_seconds=0,
+        min_training_samples=0
+    )
+    assert model.retrain_interval_seconds == 0
+    assert model.min_training_samples == 0
+
+
+def test_concurrent_score_loads_once(tmp_path, monkeypatch):
+    model = AnomalyModel(model_path=str(tmp_path / "model.joblib"))
+    loads = []
+
+    def slow_load():
+        loads.append(threading.get_ident())
+        time.sleep(0.05)
+        return False
+
+    monkeypatch.setattr(model, "load", slow_load)
+    barrier = threading.Barrier(8)
+
+    def score():
+        barrier.wait()
+        assert model.score(np.zeros((1, 6))) is None
+
+    threads = [threading.Thread(target=score) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(loads) == 1
+
+    # A finished fit asks for exactly one more load
+    model._reload_pending = True
+    threads = [threading.Thread(target=score) for _ in range(8)]
+    barrier.reset()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(loads) == 2
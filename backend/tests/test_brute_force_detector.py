@@ -0,0 +1,122 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from models.siem_models import SecurityEvent, LogLevel
+from services.ai_threat_detection import AIThreatDetectionService
+from services.brute_force_detector import BruteForceDetector
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def test_alerts_at_threshold_within_window():
+    detector = BruteForceDetector(min_attempts=3, time_window=60)
+
+    assert [detector.observe("10.0.0.1", t) for t in (0, 10, 20)] == [False, False, True]
+    assert detector.peak("10.0.0.1") == (3, 20)
+    # Failures more than time_window apart never add up
+    assert not any(detector.observe("10.0.0.2", t) for t in (0, 100, 200, 300))
+
+
+def test_late_event_is_inserted_in_order():
+    detector = BruteForceDetector(min_attempts=4, time_window=60)
+    for t in (100, 110, 130):
+        detector.observe("10.0.0.1", t)
+
+    # Arrives after 130 but belongs between 100 and 110
+    assert detector.observe("10.0.0.1", 105)
+    assert list(detector._windows["10.0.0.1"]) == [100, 105, 110, 130]
+
+    # A late event outside the window is dropped from the front again
+    detector.observe("10.0.0.1", 50)
+    assert list(detector._windows["10.0.0.1"]) == [100, 105, 110, 130]
+    assert detector.peak("10.0.0.1") == (4, 30)
+
+
+def test_idle_sources_are_evicted_in_activity_order():
+    detector = BruteForceDetector(min_attempts=2, time_window=10, idle_timeout=100)
+    detector.observe("a", 0)
+    detector.observe("b", 50)
+    detector.observe("a", 60)  # a is now the most recently active
+
+    detector.observe("c", 155)
+    assert list(detector._windows) == ["a", "c"]  # b idle since 50
+    detector.observe("c", 170)
+    assert list(detector._windows) == ["c"]       # a idle since 60
+    assert detector.evictions == 2
+
+
+def test_max_sources_evicts_least_recently_active():
+    detector = BruteForceDetector(min_attempts=2, time_window=10, idle_timeout=1000, max_sources=2)
+    for source in ("a", "b", "c"):
+        detector.observe(source, 0)
+    assert list(detector._windows) == ["b", "c"]
+
+
+def test_evicted_peaks_are_still_reported():
+    detector = BruteForceDetector(min_attempts=2, time_window=10, idle_timeout=20)
+    for t in (0, 2, 5):
+        detector.observe("a", t)
+    detector.observe("b", 100)  # evicts a
+
+    assert "a" not in detector._windows
+    assert [threat["source_ip"] for threat in detector.threats()] == ["a"]
+    assert detector.peak("a") == (3, 5)
+
+    # A new, weaker burst from a does not hide the older peak
+    detector.observe("a", 200)
+    detector.observe("a", 201)
+    assert detector.peak("a") == (3, 5)
+    assert [threat["source_ip"] for threat in detector.threats()] == ["a"]
+
+
+def test_closed_findings_are_capped_keeping_the_strongest():
+    detector = BruteForceDetector(min_attempts=2, time_window=10, idle_timeout=20, max_findings=3)
+    t = 0
+    for source, attempts in [("s1", 2), ("s2", 5), ("s3", 3), ("s4", 4), ("s5", 2), ("s6", 6)]:
+        for _ in range(attempts):
+            detector.observe(source, t)
+            t += 1
+        t += 100  # idle long enough for the next source to evict this one
+    detector.observe("flush", t)
+
+    assert len(detector._closed) == 3
+    assert sorted(detector._closed) == ["s2", "s4", "s6"]
+    assert detector.dropped_findings == 3
+    assert sorted(threat["attempts"] for threat in detector.threats()) == [4, 5, 6]
+    assert len(detector._closed_heap) <= 2 * detector.max_findings
+
+
+def failed_login(source_ip: str, seconds: float) -> SecurityEvent:
+    return SecurityEvent(
+        id=f"{source_ip}-{seconds}",
+        timestamp=START + timedelta(seconds=seconds),
+        source_ip=source_ip,
+        event_type="authentication",
+        severity=LogLevel.MEDIUM,
+        description="failed_login for admin"
+    )
+
+
+@pytest.mark.asyncio
+async def test_window_spans_stream_batches():
+    service = AIThreatDetectionService()
+    service.executor = None
+
+    async def batches():
+        # Three failures per batch: neither batch alone reaches min_attempts=5
+        yield [failed_login("10.0.0.9", s) for s in (0, 20, 40)]
+        yield [failed_login("10.0.0.9", s) for s in (60, 80, 100)]
+
+    result = await service.analyze_event_stream(batches())
+
+    [threat] = [threat for threat in result["threats"] if threat["threat_type"] == "brute_force"]
+    assert threat["source_ip"] == "10.0.0.9"
+    assert threat["attempts"] == 6
+    assert threat["time_window"] == 100
+    assert result["total_events"] == 6
+
+    # Each batch on its own finds nothing
+    for batch in (
+        [failed_login("10.0.0.9", s) for s in (0, 20, 40)],
+        [failed_login("10.0.0.9", s) for s in (60, 80, 100)]
+    ):
+        assert service.analyze_events_sync(batch)["threats"] == []
@@ -0,0 +1,160 @@
+import asyncio
+from datetime import datetime, timezone
+import pytest
+from fastapi.testclient import TestClient
+import main
+from api.routes import chat
+from core.config import settings
+from models.chat_models import QueryIntent, QueryRequest
+from models.siem_models import SIEMQuery, SIEMResponse, SecurityEvent, LogLevel
+from services.response_formatter import ResponseFormatter
+
+
+class FakeContext:
+    def __init__(self):
+        self.messages = []
+
+    async def add_message(self, session_id, message_type, content, metadata=None):
+        self.messages.append((message_type, content))
+
+    async def get_context(self, session_id):
+        return {}
+
+    async def update_context(self, session_id, updates):
+        pass
+
+
+class FakeNLP:
+    async def wait_until_ready(self):
+        pass
+
+    def process_query(self, message, context):
+        return {"processed": True, "intent": QueryIntent.SEARCH_LOGS, "confidence": 0.9, "entities": []}
+
+
+class FakeQueryGenerator:
+    def generate_elasticsearch_query(self, intent, entities, context):
+        return SIEMQuery(query_type="elasticsearch_dsl", query={"query": {"match_all": {}}}, index_pattern="hits")
+
+    def generate_aggregation_query(self, siem_query, intent):
+        return SIEMQuery(query_type="elasticsearch_dsl", query={"size": 0, "aggs": {}}, index_pattern="aggs", size=0)
+
+
+class FakeSIEM:
+    """Hits answer at once; the aggregation query runs until released (or cancelled)"""
+
+    def __init__(self):
+        self.release_aggregations = asyncio.Event()
+        self.aggregation_started = asyncio.Event()
+        self.aggregation_cancelled = False
+
+    async def execute_query(self, siem_query):
+        if siem_query.index_pattern == "aggs":
+            self.aggregation_started.set()
+            try:
+                await self.release_aggregations.wait()
+            except asyncio.CancelledError:
+                self.aggregation_cancelled = True
+                raise
+            return SIEMResponse(total_hits=0, events=[], aggregations={"by_type": {"buckets": []}}, execution_time=0.01)
+
+        event = SecurityEvent(
+            id="1",
+            timestamp=datetime(2024, 1, 1, tzinfo=timezone.utc),
+            event_type="authentication",
+            severity=LogLevel.HIGH,
+            description="failed login"
+        )
+        return SIEMResponse(total_hits=1, events=[event], execution_time=0.01)
+
+
+@pytest.fixture
+def services():
+    return {
+        "nlp": FakeNLP(),
+        "query_gen": FakeQueryGenerator(),
+        "siem": FakeSIEM(),
+        "context": FakeContext(),
+        "formatter": ResponseFormatter()
+    }
+
+
+@pytest.mark.asyncio
+async def test_stages_arrive_in_order(services):
+    services["siem"].release_aggregations.set()
+    timings = {}
+
+    stages = [
+        (stage, payload) async for stage, payload in
+        chat.chat_query_stages(QueryRequest(message="failed logins", session_id=""), services, timings)
+    ]
+
+    assert [stage for stage, _ in stages] == ["intent", "events", "results", "suggestions"]
+    assert stages[1][1]["total_hits"] == 1
+    assert {"context", "nlp", "siem_query", "aggregation_query", "formatting", "total"} <= set(timings)
+
+
+@pytest.mark.asyncio
+async def test_closing_the_stream_cancels_the_aggregation_query(services):
+    siem = services["siem"]
+    stream = chat.chat_query_stages(QueryRequest(message="failed logins", session_id="s1"), services)
+
+    assert (await stream.__anext__())[0] == "intent"
+    assert (await stream.__anext__())[0] == "events"
+    await siem.aggregation_started.wait()
+
+    # The consumer goes away (e.g. the WebSocket closed) while the aggregation query runs
+    await stream.aclose()
+    await asyncio.sleep(0)
+
+    assert siem.aggregation_cancelled
+
+
+@pytest.mark.asyncio
+async def test_stream_chat_query_sends_each_stage_then_complete(services, monkeypatch):
+    services["siem"].release_aggregations.set()
+
+    async def get_services():
+        return services
+
+    monkeypatch.setattr(chat, "get_services", get_services)
+    sent = []
+
+    async def send(message_type, payload):
+        sent.append((message_type, payload["request_id"]))
+
+    await chat.stream_chat_query({"message": "failed logins", "request_id": "r1"}, send)
+
+    assert sent == [
+        ("chat_intent", "r1"),
+        ("chat_events", "r1"),
+        ("chat_results", "r1"),
+        ("chat_suggestions", "r1"),
+        ("chat_complete", "r1")
+    ]
+
+
+class BatchNLP:
+    def __init__(self):
+        self.batches = []
+
+    def process_queries_batch(self, messages, context=None):
+        self.batches.append(len(messages))
+        return [{"intent": "search_logs"} for _ in messages]
+
+
+@pytest.mark.parametrize("count, status", [(1, 200), (settings.NLP_MAX_BATCH, 200), (settings.NLP_MAX_BATCH + 1, 422)])
+def test_classify_batch_size_is_bounded(count, status):
+    nlp = BatchNLP()
+
+    async def get_services():
+        return {"nlp": nlp}
+
+    main.app.dependency_overrides[chat.get_services] = get_services
+    try:
+        response = TestClient(main.app).post("/api/chat/classify/batch", json={"messages": ["failed logins"] * count})
+    finally:
+        main.app.dependency_overrides.clear()
+
+    assert response.status_code == status
+    assert nlp.batches == ([count] if status == 200 else [])
@@ -0,0 +1,74 @@
+import pytest
+import pytest_asyncio
+from services.collaboration_service import CollaborativeInvestigationService, investigation_room
+from services.pubsub import InMemoryPubSub
+
+
+class RecordingHub:
+    def __init__(self):
+        self.broadcasts = []
+
+    def broadcast(self, room: str, message_type: str, payload: dict):
+        self.broadcasts.append((room, message_type, payload))
+
+
+@pytest_asyncio.fixture
+async def workers():
+    """Two services on separate InMemoryPubSub instances, standing in for two API workers"""
+    services = []
+    for _ in range(2):
+        pubsub = InMemoryPubSub()
+        await pubsub.start()
+        service = CollaborativeInvestigationService(context_manager=None, pubsub=pubsub, hub=RecordingHub())
+        await service.start()
+        services.append(service)
+    yield services
+    for service in services:
+        await service.stop()
+        await service.pubsub.close()
+
+
+@pytest.mark.asyncio
+async def test_changes_reach_the_other_worker(workers):
+    local, remote = workers
+
+    investigation_id = await local.create_investigation("alice", "Lateral movement", "Hosts in finance")
+    assert await remote.join_investigation(investigation_id, "bob")
+    assert await remote.add_collaborative_note(investigation_id, "bob", "Seen on fin-ws-12")
+
+    for service in workers:
+        summary = await service.get_investigation_summary(investigation_id)
+        assert summary["participants"] == ["alice", "bob"]
+        assert [note["content"] for note in summary["investigation"]["collaborative_notes"]] == ["Seen on fin-ws-12"]
+
+    # Each worker pushes every change to its own sockets exactly once
+    room = f"investigation:{investigation_id}:messages"
+    for service in workers:
+        assert [(r, t) for r, t, _ in service.hub.broadcasts] == [(room, "update"), (room, "update"), (room, "message")]
+
+
+@pytest.mark.asyncio
+async def test_stopped_service_no_longer_receives_changes(workers):
+    local, remote = workers
+    await remote.stop()
+
+    investigation_id = await local.create_investigation("alice", "Phishing wave", "")
+    assert await remote.get_investigation_summary(investigation_id) is None
+
+
+@pytest.mark.asyncio
+async def test_only_participants_may_join_the_room(workers):
+    local, remote = workers
+    investigation_id = await local.create_investigation("alice", "Lateral movement", "")
+    room = investigation_room(investigation_id)
+
+    for service in workers:
+        assert service.can_join_room("alice", room)
+        assert not service.can_join_room("bob", room)
+
+    await remote.join_investigation(investigation_id, "bob")
+    assert local.can_join_room("bob", room)
+
+    assert not local.can_join_room("alice", investigation_room("inv_unknown"))
+    assert not local.can_join_room("alice", investigation_id)
+    assert not local.can_join_room("alice", "investigations")
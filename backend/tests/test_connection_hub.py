@@ -0,0 +1,98 @@
+import asyncio
+import json
+import pytest
+from services.connection_hub import ConnectionHub
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+        self.closed_with = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text: str):
+        self.sent.append(json.loads(text)["payload"])
+
+    async def close(self, code: int = 1000):
+        self.closed_with = code
+
+
+async def drain():
+    """Let the writer tasks empty their queues"""
+    await asyncio.sleep(0.05)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("policy, delivered, accepted", [
+    ("drop_oldest", [1, 2], 3),
+    ("drop_newest", [0, 1], 3),
+])
+async def test_full_queue_drops_per_policy(policy, delivered, accepted):
+    hub = ConnectionHub(max_queue_size=2, policy=policy)
+    websocket = FakeWebSocket()
+    connection = await hub.connect(websocket, "alice")
+
+    # No await in between: the writer task cannot drain the queue yet
+    assert sum(hub.send(connection, "update", i) for i in range(3)) == accepted
+    await drain()
+
+    assert websocket.sent == delivered
+    assert connection.dropped == 1
+    assert hub.stats()["dropped_messages"] == 1
+    assert not connection.closed
+    await hub.close_all()
+
+
+@pytest.mark.asyncio
+async def test_disconnect_policy_closes_only_the_slow_socket():
+    hub = ConnectionHub(max_queue_size=2, policy="disconnect")
+    slow_socket, fast_socket = FakeWebSocket(), FakeWebSocket()
+    slow = await hub.connect(slow_socket, "alice")
+    fast = await hub.connect(fast_socket, "bob")
+    for connection in (slow, fast):
+        hub.join(connection, "investigation:inv_1:messages")
+
+    hub.send(slow, "update", 0)
+    hub.send(slow, "update", 1)
+    # The room broadcast overflows alice's queue, not bob's
+    assert hub.broadcast("investigation:inv_1:messages", "message", 2) == 1
+    await drain()
+
+    assert slow.closed and slow_socket.closed_with == 1013
+    assert hub.slow_consumer_disconnects == 1
+    assert hub.room_members("investigation:inv_1:messages") == ["bob"]
+    assert "alice" not in hub.users
+    assert fast_socket.sent == [2]
+    await hub.close_all()
+
+
+@pytest.mark.asyncio
+async def test_broadcast_skips_excluded_and_reaches_every_socket_of_a_user():
+    hub = ConnectionHub(max_queue_size=10)
+    sockets = [FakeWebSocket() for _ in range(3)]
+    first = await hub.connect(sockets[0], "alice")
+    await hub.connect(sockets[1], "alice")
+    await hub.connect(sockets[2], "bob")
+
+    assert hub.send_to_user("alice", "update", "a") == 2
+    assert hub.broadcast_all("update", "all") == 3
+    for connection in list(hub.connections.values()):
+        hub.join(connection, "room")
+    assert hub.broadcast("room", "update", "room", exclude=first) == 2
+    await drain()
+
+    assert [websocket.sent for websocket in sockets] == [["a", "all"], ["a", "all", "room"], ["all", "room"]]
+
+    hub.disconnect(first)
+    hub.disconnect(first)  # safe twice
+    assert hub.stats()["connections"] == 2
+    await hub.close_all()
+    assert hub.stats()["connections"] == 0
+    assert all(websocket.closed_with == 1001 for websocket in sockets[1:])
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        ConnectionHub(policy="block")
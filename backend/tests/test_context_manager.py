@@ -0,0 +1,94 @@
+import asyncio
+import threading
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from database.models import ChatMessageRecord
+from models.chat_models import MessageType
+from services.context_manager import ContextManager
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    yield engine
+    engine.dispose()
+
+
+def make_manager(engine, **kwargs) -> ContextManager:
+    return ContextManager(
+        session_factory=sessionmaker(bind=engine),
+        bind=engine,
+        flush_interval=60,
+        **kwargs
+    )
+
+
+def stored_seqs(engine, session_id: str) -> list:
+    with sessionmaker(bind=engine)() as session:
+        return session.execute(
+            select(ChatMessageRecord.seq)
+            .where(ChatMessageRecord.session_id == session_id)
+            .order_by(ChatMessageRecord.seq)
+        ).scalars().all()
+
+
+@pytest.mark.asyncio
+async def test_session_reloaded_during_flush_keeps_its_sequence(engine):
+    manager = make_manager(engine, max_sessions=1)
+    write_batch = manager._write_batch
+    writing = threading.Event()
+    release = threading.Event()
+
+    def slow_write_batch(*args):
+        writing.set()
+        release.wait(5)
+        write_batch(*args)
+
+    manager._write_batch = slow_write_batch
+
+    await manager.add_message("a", MessageType.USER, "first")
+    await manager.add_message("a", MessageType.ASSISTANT, "second")
+    flush = asyncio.create_task(manager.flush())
+    await asyncio.to_thread(writing.wait, 5)
+
+    # Evict "a" while its batch is being written, then bring it back
+    await manager.add_message("b", MessageType.USER, "other")
+    await manager.add_message("a", MessageType.USER, "third")
+
+    release.set()
+    await flush
+    await manager.flush()
+
+    assert manager.flush_errors == 0
+    assert stored_seqs(engine, "a") == [0, 1, 2]
+    assert [m.content for m in await manager.get_conversation_history("a")] == ["first", "second", "third"]
+
+
+@pytest.mark.asyncio
+async def test_failing_batch_is_dropped_after_max_retries(engine):
+    manager = make_manager(engine, flush_max_retries=3)
+
+    def failing_write_batch(*args):
+        raise RuntimeError("database unavailable")
+
+    manager._write_batch = failing_write_batch
+    await manager.add_message("a", MessageType.USER, "lost")
+
+    for _ in range(2):
+        await manager.flush()
+        assert manager.stats()["pending_messages"] == 1
+
+    await manager.flush()
+    stats = manager.stats()
+    assert stats["pending_messages"] == 0
+    assert stats["dirty_sessions"] == 0
+    assert stats["dropped_messages"] == 1
+    assert stats["flush_errors"] == 3
+
+    # Later writes are not held back by the dropped batch
+    del manager._write_batch
+    await manager.add_message("a", MessageType.USER, "kept")
+    await manager.flush()
+    assert stored_seqs(engine, "a") == [1]
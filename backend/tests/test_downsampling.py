@@ -0,0 +1,130 @@
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import pytest
+from core.config import settings
+from models.chat_models import QueryIntent
+from models.siem_models import SIEMResponse, SecurityEvent, LogLevel
+from services import chart_specs, downsampling
+from services.response_formatter import ResponseFormatter
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def noisy_series(n: int):
+    rng = np.random.default_rng(7)
+    x = np.arange(n, dtype=np.float64)
+    y = rng.normal(size=n)
+    y[n // 3] = 50.0  # a spike that must survive
+    return x, y
+
+
+@pytest.mark.parametrize("reduce", [downsampling.lttb, downsampling.minmax_lttb])
+@pytest.mark.parametrize("n, max_points", [(10000, 500), (10000, 3), (501, 500), (100, 500)])
+def test_line_reduction_keeps_endpoints_within_budget(reduce, n, max_points):
+    x, y = noisy_series(n)
+    kept = reduce(x, y, max_points)
+
+    assert len(kept) == min(n, max_points)
+    assert kept[0] == 0 and kept[-1] == n - 1
+    assert np.all(np.diff(kept) > 0)
+    if max_points >= 3:
+        assert n // 3 in kept
+
+
+@pytest.mark.parametrize("max_points", [1, 2])
+def test_lttb_tiny_budget(max_points):
+    x, y = noisy_series(100)
+    assert list(downsampling.lttb(x, y, max_points)) == [0, 99][:max_points]
+
+
+def test_min_max_keeps_bucket_extremes():
+    _, y = noisy_series(10000)
+    kept = downsampling.min_max(y, 200)
+
+    assert len(kept) <= 200
+    assert np.all(np.diff(kept) > 0)
+    assert int(np.argmax(y)) in kept and int(np.argmin(y)) in kept
+
+
+@pytest.mark.parametrize("categories, max_points", [
+    (3, 100),
+    (300, 1000),    # fewer points than cells: one bin
+    (300, 300),
+    (300, 50),      # more categories than points: the rarest share a cell
+    (300, 1),
+])
+def test_time_grid_stays_within_max_points(categories, max_points):
+    n = 5000
+    x = np.arange(n, dtype=np.float64)
+    labels = [f"type-{i % categories}" for i in range(n)]
+    kept, counts = downsampling.time_grid(x, labels, max_points)
+
+    assert len(kept) <= max_points
+    assert counts.sum() == n
+    assert np.all(np.diff(kept) > 0)
+    assert kept[0] == 0
+
+
+def test_time_grid_keeps_frequent_categories_apart():
+    labels = ["common"] * 900 + [f"rare-{i}" for i in range(100)]
+    kept, counts = downsampling.time_grid(np.arange(1000.0), labels, 2)
+
+    assert [labels[i] for i in kept] == ["common", "rare-0"]
+    assert list(counts) == [900, 100]
+
+
+def test_timeline_chart_reports_reduction():
+    n = 5000
+    timestamps = [START + timedelta(seconds=i) for i in range(n)]
+    event_types = [f"type-{i % 400}" for i in range(n)]
+    severities = ["high" if i % 5 else "low" for i in range(n)]
+    chart = chart_specs.timeline_chart(timestamps, event_types, severities, ["e"] * n, max_points=100)
+
+    points = sum(len(trace["x"]) for trace in chart["data"])
+    assert all(len(trace["x"]) <= 100 for trace in chart["data"])
+    assert sum(count for trace in chart["data"] for _, count in trace["customdata"]) == n
+    assert chart["layout"]["meta"]["downsampling"] == {
+        "method": "time_grid",
+        "original_points": n,
+        "points": points,
+        "ratio": points / n
+    }
+
+
+def test_time_series_chart_keeps_first_and_last_bucket():
+    n = 10000
+    timestamps = [START + timedelta(minutes=i) for i in range(n)]
+    chart = chart_specs.time_series_chart(timestamps, list(range(n)), max_points=250)
+
+    trace = chart["data"][0]
+    assert len(trace["x"]) == 250
+    assert trace["x"][0] == chart_specs.plotly_date(timestamps[0])
+    assert trace["x"][-1] == chart_specs.plotly_date(timestamps[-1])
+    assert chart["layout"]["meta"]["downsampling"] == {
+        "method": "minmax_lttb",
+        "original_points": n,
+        "points": 250,
+        "ratio": 250 / n
+    }
+
+
+def test_report_data_carries_downsampling_info(monkeypatch):
+    monkeypatch.setattr(settings, "CHART_MAX_POINTS_PER_SERIES", 100)
+    n = 3000
+    buckets = [{"key": int((START + timedelta(minutes=i)).timestamp() * 1000), "doc_count": i % 17} for i in range(n)]
+    events = [
+        SecurityEvent(id="1", timestamp=START, event_type="login", severity=LogLevel.HIGH, description="failed login")
+    ]
+    response = SIEMResponse(
+        total_hits=n,
+        events=events,
+        aggregations={"events_over_time": {"buckets": buckets}},
+        execution_time=0.1
+    )
+
+    formatted = ResponseFormatter().format_response(response, QueryIntent.GENERATE_REPORT, "weekly report")
+
+    assert formatted["data"]["downsampling"] == {
+        "Events Over Time": {"method": "minmax_lttb", "original_points": n, "points": 100, "ratio": 100 / n}
+    }
+    assert len(formatted["visualization"]["data"][0]["x"]) == 100
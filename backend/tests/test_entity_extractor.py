@@ -0,0 +1,90 @@
+import pytest
+from models.siem_models import EntityType
+from services.entity_extractor import EntityExtractor, EntitySpan
+
+extractor = EntityExtractor()
+
+
+def values(text: str, entity_type: EntityType) -> list:
+    return [entity.value for entity in extractor.extract(text) if entity.type == entity_type]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("login from 192.168.1.10 failed", ["192.168.1.10"]),
+    ("block 10.0.0.0/8 now", ["10.0.0.0/8"]),
+    ("0.0.0.0 and 255.255.255.255", ["0.0.0.0", "255.255.255.255"]),
+    ("bogus 256.1.1.1", []),
+    ("bogus 999.999.999.999", []),
+    ("bogus 1.2.3.300", []),
+    ("leading zero 01.2.3.4", []),
+    ("bad prefix 10.0.0.0/33", []),
+    ("version 1.2.3.4.5", []),
+])
+def test_ipv4(text, expected):
+    assert values(text, EntityType.IP_ADDRESS) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("traffic from 2001:db8::1 blocked", ["2001:db8::1"]),
+    ("loopback ::1", ["::1"]),
+    ("net fe80::/10", ["fe80::/10"]),
+    ("mapped ::ffff:10.0.0.1", ["::ffff:10.0.0.1"]),
+    ("scope std::vector in C++", []),
+    ("a bare :: here", []),
+    ("bare prefix ::/0", []),
+    ("too many groups 1:2:3:4:5:6:7:8:9", []),
+    ("two gaps 2001::db8::1", []),
+    ("clock 10:30:45", []),
+])
+def test_ipv6(text, expected):
+    assert values(text, EntityType.IP_ADDRESS) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("connections on port 22", ["22"]),
+    ("port 65535 open", ["65535"]),
+    ("port 65536 open", []),
+    ("port 99999 open", []),
+    ("airport 22", []),
+])
+def test_port(text, expected):
+    assert values(text, EntityType.PORT) == expected
+
+
+def test_port_span_excludes_whitespace():
+    text = "scan on port   8080"
+    [port] = [entity for entity in extractor.extract(text) if entity.type == EntityType.PORT]
+    assert text[port.start_pos:port.end_pos] == "8080"
+
+
+def span(entity_type: EntityType, text: str, value: str) -> EntitySpan:
+    start = text.index(value)
+    return EntitySpan(entity_type, value, 0.5, start, start + len(value))
+
+
+TEXT = "failed logins from 10.0.0.5 by admin yesterday"
+
+
+@pytest.mark.parametrize("named, kept", [
+    # Same span as a regex entity: the regex type wins
+    ([span(EntityType.HOSTNAME, TEXT, "10.0.0.5")], []),
+    # Partial overlaps on either side
+    ([span(EntityType.HOSTNAME, TEXT, "from 10.0")], []),
+    ([span(EntityType.HOSTNAME, TEXT, "0.5 by")], []),
+    ([span(EntityType.TIME_RANGE, TEXT, "admin yesterday")], []),
+    # Touching but not overlapping, or well clear of any regex entity
+    ([span(EntityType.USERNAME, TEXT, "admin")], ["admin"]),
+    ([span(EntityType.PROCESS, TEXT, "failed")], ["failed"]),
+    ([span(EntityType.USERNAME, TEXT, "by"), span(EntityType.HOSTNAME, TEXT, "5 by")], ["by"]),
+])
+def test_merge_prefers_regex_entities(named, kept):
+    regex_entities = extractor.extract(TEXT)
+    assert [entity.value for entity in regex_entities] == ["10.0.0.5", "yesterday"]
+
+    merged = extractor.merge(named, regex_entities)
+
+    assert [entity.start_pos for entity in merged] == sorted(entity.start_pos for entity in merged)
+    assert [entity for entity in merged if entity not in regex_entities] == [
+        entity for entity in named if entity.value in kept
+    ]
+    assert all(entity in merged for entity in regex_entities)
@@ -0,0 +1,171 @@
+import json
+from types import SimpleNamespace
+import httpx
+import pytest
+from models.siem_models import SIEMQuery, SIEMResponse
+from services import query_cache as query_cache_module
+from services.query_cache import QueryResultCache
+from services.siem_connector import SIEMConnector
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(query_cache_module, "time", SimpleNamespace(monotonic=clock))
+    return clock
+
+
+def ranged_query(gte: str, lte: str, index: str = "security-*", size: int = 100, term: str = "failed_login") -> SIEMQuery:
+    return SIEMQuery(
+        query_type="elasticsearch_dsl",
+        query={"query": {"bool": {
+            "must": [{"match": {"message": term}}],
+            "filter": [{"range": {"@timestamp": {"gte": gte, "lte": lte}}}]
+        }}},
+        index_pattern=index,
+        size=size
+    )
+
+
+def response(total_hits: int = 1, aggregations=None) -> SIEMResponse:
+    return SIEMResponse(total_hits=total_hits, events=[], aggregations=aggregations, execution_time=0.01)
+
+
+def make_cache(**kwargs) -> QueryResultCache:
+    options = {"max_entries": 100, "max_bytes": 1_000_000, "ttl_seconds": 60, "time_bucket_seconds": 60}
+    options.update(kwargs)
+    return QueryResultCache(**options)
+
+
+@pytest.mark.parametrize("first, second, same", [
+    # Microseconds apart, as QueryGenerator's datetime.now() produces them
+    (("2024-03-04T10:15:01.123456", "2024-03-05T10:15:01.123456"),
+     ("2024-03-04T10:15:59.999999", "2024-03-05T10:15:59.999999"), True),
+    # Same instant in another notation
+    (("2024-03-04T10:15:00Z", "2024-03-05T10:15:00Z"),
+     ("2024-03-04T11:15:00+01:00", "2024-03-05T11:15:00+01:00"), True),
+    # Across a 60s boundary
+    (("2024-03-04T10:15:59", "2024-03-05T10:15:59"),
+     ("2024-03-04T10:16:00", "2024-03-05T10:16:00"), False),
+    # Date math is left alone
+    (("now-24h", "now"), ("now-24h", "now"), True),
+    (("now-24h", "now"), ("now-7d", "now"), False),
+])
+def test_range_bounds_are_floored_to_the_time_bucket(first, second, same):
+    cache = make_cache()
+    assert (cache.make_key(ranged_query(*first)) == cache.make_key(ranged_query(*second))) is same
+
+
+@pytest.mark.parametrize("change", [
+    {"index": "auth-*"},
+    {"size": 10},
+    {"term": "privilege_escalation"},
+])
+def test_key_covers_index_size_and_query(change):
+    cache = make_cache()
+    bounds = ("2024-03-04T10:15:00", "2024-03-05T10:15:00")
+    assert cache.make_key(ranged_query(*bounds)) != cache.make_key(ranged_query(*bounds, **change))
+
+
+def test_key_ignores_dict_order():
+    cache = make_cache()
+    a = SIEMQuery(query_type="elasticsearch_dsl", query={"query": {"match_all": {}}, "size": 5}, index_pattern="*")
+    b = SIEMQuery(query_type="elasticsearch_dsl", query={"size": 5, "query": {"match_all": {}}}, index_pattern="*")
+    assert cache.make_key(a) == cache.make_key(b)
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = make_cache(ttl_seconds=30)
+    query = ranged_query("now-1h", "now")
+    cache.put(query, response())
+
+    clock.now += 29.9
+    assert cache.get(query) is not None
+    clock.now += 0.1
+    assert cache.get(query) is None
+    assert cache.expirations == 1
+    assert cache.stats()["entries"] == 0 and cache.current_bytes == 0
+
+
+def test_least_recently_used_entry_is_evicted_first(clock):
+    cache = make_cache(max_entries=2)
+    a, b, c = (ranged_query("now-1h", "now", term=term) for term in "abc")
+    cache.put(a, response(1))
+    cache.put(b, response(2))
+    assert cache.get(a).total_hits == 1  # a is now the most recently used
+
+    cache.put(c, response(3))
+
+    assert cache.get(b) is None
+    assert cache.get(a).total_hits == 1
+    assert cache.get(c).total_hits == 3
+    assert cache.evictions == 1
+
+
+def test_byte_cap_evicts_until_the_new_entry_fits(clock):
+    aggregations = {"blob": "x" * 1000}
+    size = len(json.dumps(aggregations)) + 256
+    cache = make_cache(max_bytes=size * 2 + 10)
+    queries = [ranged_query("now-1h", "now", term=str(i)) for i in range(3)]
+
+    for i, query in enumerate(queries):
+        cache.put(query, response(i, aggregations))
+        assert cache.current_bytes <= cache.max_bytes
+
+    assert cache.get(queries[0]) is None
+    assert cache.stats()["entries"] == 2
+    assert cache.current_bytes == size * 2
+
+    # A response bigger than the whole cache is not stored and evicts nothing
+    cache.put(ranged_query("now-1h", "now", term="huge"), response(9, {"blob": "x" * 10000}))
+    assert cache.stats()["entries"] == 2
+
+
+def test_replacing_an_entry_keeps_the_byte_count(clock):
+    cache = make_cache()
+    query = ranged_query("now-1h", "now")
+    cache.put(query, response(1, {"blob": "x" * 100}))
+    cache.put(query, response(2, {"blob": "x" * 100}))
+    assert cache.stats()["entries"] == 1
+    assert cache.current_bytes == len(json.dumps({"blob": "x" * 100})) + 256
+    assert cache.get(query).total_hits == 2
+
+
+def search_transport(timed_out: bool, searches: list) -> httpx.MockTransport:
+    def handler(request: httpx.Request) -> httpx.Response:
+        searches.append(request.url.path)
+        return httpx.Response(200, json={
+            "took": 5,
+            "timed_out": timed_out,
+            "hits": {"total": {"value": 0, "relation": "eq"}, "hits": []}
+        })
+    return httpx.MockTransport(handler)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("timed_out, searches_expected", [(False, 1), (True, 2)])
+async def test_execute_query_caches_only_complete_responses(timed_out, searches_expected):
+    searches = []
+    connector = SIEMConnector(
+        hosts=["http://es:9200"],
+        cache=make_cache(),
+        transport=search_transport(timed_out, searches)
+    )
+    query = ranged_query("now-1h", "now")
+    try:
+        first = await connector.execute_query(query)
+        second = await connector.execute_query(query)
+    finally:
+        await connector.cleanup()
+
+    assert len(searches) == searches_expected
+    assert first.query_metadata["timed_out"] is timed_out
+    assert second.query_metadata.get("cache_hit", False) is not timed_out
@@ -0,0 +1,70 @@
+from datetime import datetime, timezone
+import httpx
+import pytest
+from api.routes import reports
+from core.config import settings
+from models.chat_models import QueryIntent
+from models.report_models import ReportRequest, ReportType
+from models.siem_models import SIEMQuery
+from services.query_cache import QueryResultCache
+from services.query_generator import QueryGenerator
+from services.response_formatter import ResponseFormatter
+from services.siem_connector import SIEMConnector
+from utils.mock_siem import MockSIEMStore, create_mock_siem_app
+
+START = datetime(2024, 3, 4, tzinfo=timezone.utc)
+
+
+class FakeNLP:
+    async def wait_until_ready(self):
+        pass
+
+    def process_query(self, message, context=None):
+        return {"processed": True, "intent": QueryIntent.GENERATE_REPORT, "confidence": 0.9, "entities": []}
+
+
+class AllEventsQueryGenerator(QueryGenerator):
+    """Real aggregation queries, but no relative time range (the mock data is from 2024)"""
+
+    def generate_elasticsearch_query(self, intent, entities, context=None):
+        return SIEMQuery(query_type="elasticsearch_dsl", query={"query": {"match_all": {}}}, index_pattern="*", size=100)
+
+
+@pytest.fixture(scope="module")
+def store():
+    return MockSIEMStore.from_generator(3000, seed=3, start=START, days=1)
+
+
+@pytest.fixture
+def services(store):
+    return {
+        "nlp": FakeNLP(),
+        "query_gen": AllEventsQueryGenerator(),
+        "siem": SIEMConnector(
+            hosts=["http://mock-es:9200"],
+            cache=QueryResultCache(),
+            transport=httpx.ASGITransport(app=create_mock_siem_app(store))
+        ),
+        "formatter": ResponseFormatter()
+    }
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("limit, total, limited", [(1200, 1200, True), (10000, 3000, False)])
+async def test_detailed_report_stream_is_capped(services, store, monkeypatch, limit, total, limited):
+    monkeypatch.setattr(settings, "REPORT_MAX_STREAM_EVENTS", limit)
+    monkeypatch.setattr(settings, "ELASTICSEARCH_STREAM_BATCH_SIZE", 500)
+    try:
+        report = await reports.generate_report(
+            ReportRequest(description="daily report", report_type=ReportType.DETAILED),
+            services
+        )
+    finally:
+        await services["siem"].cleanup()
+
+    assert report.total_events == total
+    assert report.data["stream_limit_reached"] is limited
+    # Aggregations still cover every matching event
+    assert sum(bucket["doc_count"] for bucket in report.data["aggregations"]["events_over_time"]["buckets"]) == 3000
+    # The point-in-time is closed even when the stream stops early
+    assert not store._pit_results
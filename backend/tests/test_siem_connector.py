@@ -0,0 +1,147 @@
+from datetime import datetime, timezone
+import httpx
+import pytest
+from core.config import settings
+from models.siem_models import SIEMQuery
+from services.ai_threat_detection import AIThreatDetectionService
+from services.anomaly_model import AnomalyModel
+from services.query_cache import QueryResultCache
+from services.siem_connector import SIEMConnector, SIEMConnectorError
+from utils import ecs
+from utils.mock_siem import MockSIEMStore, create_mock_siem_app
+
+HOST = "http://mock-es:9200"
+START = datetime(2024, 3, 4, tzinfo=timezone.utc)
+
+
+@pytest.fixture(scope="module")
+def store():
+    return MockSIEMStore.from_generator(2000, seed=7, start=START, days=2)
+
+
+def make_connector(store, **kwargs) -> SIEMConnector:
+    """Connector talking to the mock SIEM server in-process, with a private cache"""
+    return SIEMConnector(
+        hosts=[HOST],
+        cache=QueryResultCache(),
+        transport=httpx.ASGITransport(app=create_mock_siem_app(store)),
+        **kwargs
+    )
+
+
+def all_events(size: int = 100) -> SIEMQuery:
+    return SIEMQuery(
+        query_type="elasticsearch_dsl",
+        query={"query": {"match_all": {}}, "sort": [{"@timestamp": {"order": "asc"}}]},
+        index_pattern="*",
+        size=size
+    )
+
+
+@pytest.mark.asyncio
+async def test_execute_query_against_local_server(store):
+    connector = make_connector(store)
+    query = all_events(size=25)
+    query.query["aggs"] = {"by_type": {"terms": {"field": "event.category"}}}
+    try:
+        assert await connector.ping()
+        response = await connector.execute_query(query)
+    finally:
+        await connector.cleanup()
+
+    assert response.total_hits == 2000
+    assert len(response.events) == 25
+    timestamps = [event.timestamp for event in response.events]
+    assert timestamps == sorted(timestamps)
+    assert all(timestamp.tzinfo is not None for timestamp in timestamps)
+    assert response.aggregations["by_type"]["buckets"]
+
+
+@pytest.mark.asyncio
+async def test_stream_query_pages_through_every_event(store):
+    connector = make_connector(store)
+    try:
+        batches = [batch async for batch in connector.stream_query(all_events(), batch_size=300)]
+    finally:
+        await connector.cleanup()
+
+    assert [len(batch) for batch in batches] == [300] * 6 + [200]
+    ids = [event.id for batch in batches for event in batch]
+    assert len(set(ids)) == 2000
+    # The point-in-time is closed once the stream ends
+    assert not store._pit_results
+
+
+@pytest.mark.asyncio
+async def test_threat_analysis_consumes_the_stream(tmp_path):
+    store = MockSIEMStore.from_generator(3000, seed=7, start=START, days=1, attack_ratio=0.3)
+    connector = make_connector(store)
+    service = AIThreatDetectionService()
+    service.executor = None
+    # A private, never-trained model: no baseline file, no training process
+    service.anomaly_model = AnomalyModel(model_path=str(tmp_path / "model.joblib"), min_training_samples=10 ** 9)
+    try:
+        streamed = await service.analyze_event_stream(connector.stream_query(all_events(), batch_size=300))
+        events = [event async for batch in connector.stream_query(all_events(), batch_size=5000) for event in batch]
+    finally:
+        await connector.cleanup()
+
+    assert streamed["total_events"] == 3000
+    assert not store._pit_results
+
+    # Brute force windows that straddle page boundaries are found as in one pass over everything
+    def brute_force(threats):
+        return sorted((t["source_ip"], t["attempts"]) for t in threats if t["threat_type"] == "brute_force")
+
+    expected = brute_force(service.analyze_events_sync(events)["threats"])
+    assert expected
+    assert brute_force(streamed["threats"]) == expected
+
+
+@pytest.mark.asyncio
+async def test_request_fails_over_to_the_next_host():
+    requested = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requested.append(request.url.host)
+        if request.url.host == "down":
+            raise httpx.ConnectError("connection refused", request=request)
+        return httpx.Response(200, json={"cluster_name": "test"})
+
+    connector = SIEMConnector(hosts=["http://down:9200", "http://up:9200"], transport=httpx.MockTransport(handler))
+    try:
+        assert await connector.ping()
+    finally:
+        await connector.cleanup()
+    assert requested == ["down", "up"]
+
+
+@pytest.mark.asyncio
+async def test_error_status_raises():
+    connector = SIEMConnector(
+        hosts=[HOST],
+        transport=httpx.MockTransport(lambda request: httpx.Response(503, text="unavailable"))
+    )
+    try:
+        with pytest.raises(SIEMConnectorError):
+            await connector.execute_query(all_events())
+    finally:
+        await connector.cleanup()
+
+
+def test_bare_hosts_use_the_configured_port(monkeypatch):
+    monkeypatch.setattr(settings, "ELASTICSEARCH_PORT", 9201)
+    monkeypatch.setattr(settings, "ELASTICSEARCH_USE_SSL", False)
+    hosts = SIEMConnector(hosts=["unused"])._parse_hosts("es1, es2:9300, [::1], https://es3.example.com/")
+    assert hosts == ["http://es1:9201", "http://es2:9300", "http://[::1]:9201", "https://es3.example.com"]
+
+
+def test_parse_timestamp_is_always_utc_aware():
+    expected = datetime(2024, 3, 4, 12, 30, tzinfo=timezone.utc)
+    parsed = [
+        ecs.parse_timestamp("2024-03-04T12:30:00Z"),
+        ecs.parse_timestamp("2024-03-04T12:30:00"),
+        ecs.parse_timestamp(expected.timestamp() * 1000)
+    ]
+    assert parsed == [expected] * 3
+    assert ecs.parse_timestamp(None).tzinfo is not None
@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta, timezone
+import httpx
+import pytest
+import pytest_asyncio
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from services.ai_threat_detection import AIThreatDetectionService
+from services.query_cache import QueryResultCache
+from services.query_generator import QueryGenerator
+from services.risk_rollup_store import RiskRollupStore
+from services.siem_connector import SIEMConnector
+from services.trend_analyzer import TrendAnalyzer
+from utils.mock_siem import MockSIEMStore, create_mock_siem_app
+
+TODAY = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+DAYS = 7
+
+
+@pytest.fixture(scope="module")
+def siem_store():
+    return MockSIEMStore.from_generator(5000, seed=12, start=TODAY - timedelta(days=DAYS - 1), days=DAYS)
+
+
+@pytest.fixture
+def rollup_store(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'rollups.db'}", connect_args={"check_same_thread": False})
+    return RiskRollupStore(session_factory=sessionmaker(bind=engine), bind=engine)
+
+
+@pytest.fixture
+def ai_service():
+    service = AIThreatDetectionService()
+    service.load_threat_patterns()
+    return service
+
+
+class RecordingConnector(SIEMConnector):
+    """Mock SIEM connector that remembers the time range of every query"""
+
+    def __init__(self, siem_store):
+        super().__init__(
+            hosts=["http://mock-es:9200"],
+            cache=QueryResultCache(),
+            transport=httpx.ASGITransport(app=create_mock_siem_app(siem_store))
+        )
+        self.ranges = []
+
+    async def execute_query(self, siem_query):
+        bounds = siem_query.query["query"]["bool"]["filter"][0]["range"]["@timestamp"]
+        self.ranges.append((bounds["gte"][:10], bounds["lt"][:10]))
+        return await super().execute_query(siem_query)
+
+
+@pytest_asyncio.fixture
+async def make_analyzer(siem_store, rollup_store, ai_service):
+    connectors = []
+
+    def make(ingest_lag: timedelta) -> TrendAnalyzer:
+        connector = RecordingConnector(siem_store)
+        connectors.append(connector)
+        return TrendAnalyzer(connector, QueryGenerator(), ai_service, store=rollup_store, ingest_lag=ingest_lag)
+
+    yield make
+    for connector in connectors:
+        await connector.cleanup()
+
+
+def day(offset: int) -> str:
+    return (TODAY + timedelta(days=offset)).date().isoformat()
+
+
+@pytest.mark.asyncio
+async def test_settled_buckets_are_fetched_once(make_analyzer):
+    analyzer = make_analyzer(timedelta(0))
+
+    first = await analyzer.daily_stats(DAYS)
+    assert analyzer.queries == 1
+    assert [stats["date"] for stats in first] == [day(offset) for offset in range(1 - DAYS, 1)]
+    assert all(stats["events"] > 0 for stats in first)
+
+    second = await analyzer.daily_stats(DAYS)
+    # Only the open bucket (today) is asked for again
+    assert analyzer.queries == 2
+    assert analyzer.siem_connector.ranges[1] == (day(0), day(1))
+    assert second == first
+
+
+@pytest.mark.asyncio
+async def test_buckets_within_the_ingest_lag_are_refetched(make_analyzer, rollup_store):
+    # Today and the two days before it can still receive late events
+    analyzer = make_analyzer(timedelta(days=2))
+
+    first = await analyzer.daily_stats(DAYS)
+    second = await analyzer.daily_stats(DAYS)
+
+    assert analyzer.queries == 2
+    assert analyzer.siem_connector.ranges == [(day(1 - DAYS), day(1)), (day(-2), day(1))]
+    assert second == first
+
+    # Only settled buckets are materialized
+    starts = [(TODAY + timedelta(days=offset)).replace(tzinfo=None) for offset in range(1 - DAYS, 1)]
+    assert sorted(rollup_store.load("winlogbeat-*", "day", starts)) == starts[:DAYS - 3]
+
+
+@pytest.mark.asyncio
+async def test_restart_reloads_settled_buckets_from_the_store(make_analyzer):
+    before = make_analyzer(timedelta(0))
+    first = await before.daily_stats(DAYS)
+
+    # A new process: empty in-memory cache, same rollup store
+    after = make_analyzer(timedelta(0))
+    second = await after.daily_stats(DAYS)
+
+    assert after.queries == 1
+    assert after.siem_connector.ranges == [(day(0), day(1))]
+    assert second == first
@@ -0,0 +1,70 @@
+import asyncio
+import threading
+import pytest
+from fastapi.testclient import TestClient
+import main
+from api.routes import chat
+from services.collaboration_service import CollaborativeInvestigationService, investigation_room
+from services.connection_hub import connection_hub
+from services.pubsub import InMemoryPubSub
+
+
+@pytest.fixture
+def client():
+    # No lifespan: the endpoint only needs the process-wide connection hub
+    return TestClient(main.app)
+
+
+def test_chat_queries_overlap_and_are_cancelled_on_disconnect(client, monkeypatch):
+    cancelled = threading.Event()
+
+    async def stream_chat_query(payload, send):
+        await send("chat_started", {"request_id": payload["request_id"]})
+        if payload["request_id"] == "slow":
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+        await send("chat_complete", {"request_id": payload["request_id"]})
+
+    monkeypatch.setattr(chat, "stream_chat_query", stream_chat_query)
+
+    with client.websocket_connect("/ws/analyst") as websocket:
+        websocket.send_json({"type": "chat_query", "payload": {"message": "x", "request_id": "slow"}})
+        assert websocket.receive_json() == {"type": "chat_started", "payload": {"request_id": "slow"}}
+
+        # The slow query is still running, yet the next one is answered
+        websocket.send_json({"type": "chat_query", "payload": {"message": "y", "request_id": "fast"}})
+        assert websocket.receive_json() == {"type": "chat_started", "payload": {"request_id": "fast"}}
+        assert websocket.receive_json() == {"type": "chat_complete", "payload": {"request_id": "fast"}}
+
+        websocket.send_text("ping")
+        assert websocket.receive_text() == "Echo: ping"
+
+    assert cancelled.wait(5)
+
+
+def test_subscribe_requires_investigation_membership(client, monkeypatch):
+    pubsub = InMemoryPubSub()
+    service = CollaborativeInvestigationService(context_manager=None, pubsub=pubsub)
+    monkeypatch.setattr(main, "get_collaboration_service", lambda: service)
+    investigation_id = asyncio.run(service.create_investigation("alice", "Phishing wave", ""))
+    room = investigation_room(investigation_id)
+
+    try:
+        with client.websocket_connect("/ws/alice") as websocket:
+            websocket.send_json({"type": "subscribe", "payload": {"channel": room}})
+            websocket.send_json({"type": "subscribe", "payload": {"channel": "investigation:inv_other:messages"}})
+            assert websocket.receive_json() == {"type": "subscribe_error", "payload": {
+                "channel": "investigation:inv_other:messages",
+                "detail": "Not a participant of this investigation"
+            }}
+
+            with client.websocket_connect("/ws/mallory") as intruder:
+                intruder.send_json({"type": "subscribe", "payload": {"channel": room}})
+                assert intruder.receive_json()["type"] == "subscribe_error"
+                # Messages are handled in order, so both subscribes have been decided
+                assert connection_hub.room_members(room) == ["alice"]
+    finally:
+        asyncio.run(pubsub.close())